@@ -0,0 +1,88 @@
+# benchmarks/bench_arranque.py
+# Mide el tiempo de arranque en frío (importación) de los módulos principales,
+# cada uno en un intérprete nuevo, e informa qué bibliotecas pesadas carga.
+# Sirve para detectar regresiones: el acceso a datos y la lógica de negocio no
+# deben cargar PyQt6 ni ReportLab.
+#
+# Uso:
+#     python benchmarks/bench_arranque.py [--repeticiones 5]
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos a medir y si se les permite cargar PyQt6 / ReportLab.
+MODULOS = [
+    ("src.db.database", False, False),
+    ("src.logic.invoice_manager", False, False),
+    ("src.__main__", False, False),
+    ("src.pdf.pdf_generator", False, True),
+    ("src.ui.main_window", True, False),
+]
+
+# Bibliotecas cuya carga se informa.
+PESADAS = ("PyQt6", "reportlab", "numpy", "pandas")
+
+# Programa que ejecuta cada intérprete: importa el módulo y mide el tiempo.
+PROGRAMA = """
+import sys, time, json
+inicio = time.perf_counter()
+import {modulo}
+segundos = time.perf_counter() - inicio
+cargadas = sorted({{m.split(".")[0] for m in sys.modules}} & set({pesadas!r}))
+print(json.dumps({{"segundos": segundos, "cargadas": cargadas}}))
+"""
+
+
+def medir(modulo: str, repeticiones: int) -> dict:
+    """
+    Importa un módulo en 'repeticiones' intérpretes nuevos.
+
+    Returns:
+        dict: Mediana y mínimo del tiempo de importación (ms), y las bibliotecas pesadas cargadas.
+    """
+    tiempos, cargadas = [], []
+    entorno = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", PROGRAMA.format(modulo=modulo, pesadas=PESADAS)],
+            cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+        )
+        datos = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(datos["segundos"] * 1000)
+        cargadas = datos["cargadas"]
+    return {"mediana_ms": statistics.median(tiempos), "minimo_ms": min(tiempos), "cargadas": cargadas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de importación en frío.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON.")
+    args = parser.parse_args()
+
+    resultados, fallas = {}, []
+    for modulo, permite_qt, permite_reportlab in MODULOS:
+        medicion = resultados[modulo] = medir(modulo, args.repeticiones)
+        if not permite_qt and "PyQt6" in medicion["cargadas"]:
+            fallas.append(f"{modulo} carga PyQt6")
+        if not permite_reportlab and "reportlab" in medicion["cargadas"]:
+            fallas.append(f"{modulo} carga ReportLab")
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        print(f"{'módulo':30} {'mediana':>10} {'mínimo':>10}  bibliotecas pesadas")
+        for modulo, m in resultados.items():
+            print(f"{modulo:30} {m['mediana_ms']:8.1f}ms {m['minimo_ms']:8.1f}ms  {', '.join(m['cargadas']) or '-'}")
+    for falla in fallas:
+        print(f"REGRESIÓN: {falla}", file=sys.stderr)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# benchmarks/bench_dinero.py
+# Compara el cálculo de totales escalar (producto por producto) con el
+# vectorizado de NumPy sobre un lote sintético, y verifica que ambos
+# den exactamente los mismos centavos.
+#
+# Uso:
+#     python benchmarks/bench_dinero.py [--facturas 20000] [--lineas 50] [--tasa 1900]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Permite ejecutar el script desde la raíz del proyecto sin instalar el paquete.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.utils import dinero
+
+
+def generar_lote(facturas: int, lineas: int, semilla: int = 0):
+    """
+    Genera cantidades y precios aleatorios para un lote de facturas.
+
+    Returns:
+        tuple[list[int], list[float], list[int]]: Cantidades, precios y el inicio de cada factura.
+    """
+    azar = random.Random(semilla)
+    cantidades, precios, inicios = [], [], []
+    for _ in range(facturas):
+        inicios.append(len(cantidades))
+        for _ in range(azar.randint(1, 2 * lineas - 1)):
+            cantidades.append(azar.randint(1, 100))
+            # Precios con dos decimales, como los que ingresa un usuario.
+            precios.append(round(azar.uniform(0.01, 5000), 2))
+    return cantidades, precios, inicios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de totales escalares vs. vectorizados.")
+    parser.add_argument("--facturas", type=int, default=20000)
+    parser.add_argument("--lineas", type=int, default=50, help="Promedio de productos por factura.")
+    parser.add_argument("--tasa", type=int, default=1900, help="Tasa de impuesto en puntos básicos.")
+    args = parser.parse_args()
+
+    cantidades, precios, inicios = generar_lote(args.facturas, args.lineas)
+    limites = inicios[1:] + [len(cantidades)]
+
+    # --- Versión escalar: una factura a la vez ---
+    inicio = time.perf_counter()
+    escalar = [
+        dinero.totales_factura(cantidades[a:b], precios[a:b], args.tasa)
+        for a, b in zip(inicios, limites)
+    ]
+    t_escalar = time.perf_counter() - inicio
+
+    # --- Versión vectorizada: todo el lote en una llamada ---
+    inicio = time.perf_counter()
+    arr_cantidades = np.asarray(cantidades, dtype=np.int64)
+    arr_precios = np.asarray(precios, dtype=np.float64)
+    subtotales, impuestos, totales = dinero.totales_lote_np(arr_cantidades, arr_precios, inicios, args.tasa)
+    t_vector = time.perf_counter() - inicio
+
+    # Los resultados deben coincidir centavo por centavo.
+    iguales = (
+        [s for s, _, _ in escalar] == subtotales.tolist()
+        and [i for _, i, _ in escalar] == impuestos.tolist()
+        and [t for _, _, t in escalar] == totales.tolist()
+    )
+
+    print(f"{args.facturas} facturas, {len(cantidades)} productos")
+    print(f"escalar:     {t_escalar * 1000:10.1f} ms")
+    print(f"vectorizado: {t_vector * 1000:10.1f} ms  ({t_escalar / t_vector:.1f}x)")
+    print(f"resultados idénticos: {'sí' if iguales else 'NO'}")
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
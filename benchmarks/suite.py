@@ -0,0 +1,253 @@
+# benchmarks/suite.py
+# Suite de benchmarks reproducible del flujo de facturación: numeración,
+# guardado, generación de PDFs y el camino completo crear -> guardar -> PDF.
+# Genera datos sintéticos (con semilla fija) a varias escalas, y escribe un
+# JSON con percentiles de latencia y picos de memoria para comparar corridas.
+#
+# Uso:
+#     python benchmarks/suite.py [--filas 1000,100000] [--lineas 1,100,10000]
+#                                [--repeticiones 20] [--backend csv] [--salida resultados.json]
+#                                [--comparar anterior.json]
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+# Permite ejecutar el script desde la raíz del proyecto sin instalar el paquete.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db import database
+from src.db.models import Cliente, Factura, Producto
+from src.logic.invoice_manager import InvoiceManager
+from src.pdf import pdf_generator
+
+# Facturas por escritura al llenar el archivo de facturas de prueba.
+BLOQUE_LLENADO = 10_000
+# A partir de esta cantidad de productos, el PDF tarda segundos: se repite menos.
+LINEAS_COSTOSAS = 1000
+
+
+def generar_cliente(azar: random.Random) -> Cliente:
+    """Genera un cliente sintético; las identificaciones se repiten entre facturas."""
+    identificacion = str(azar.randint(1, 5000)).zfill(10)
+    return Cliente(
+        nombre=f"Cliente {identificacion}",
+        identificacion=identificacion,
+        direccion=f"Calle {azar.randint(1, 200)} # {azar.randint(1, 99)}-{azar.randint(1, 99)}",
+        telefono=str(azar.randint(3_000_000_000, 3_999_999_999)),
+    )
+
+
+def generar_productos(azar: random.Random, cantidad: int) -> list[Producto]:
+    """Genera 'cantidad' productos con precios de dos decimales."""
+    return [
+        Producto(f"Producto {azar.randint(1, 10_000)}", azar.randint(1, 20), round(azar.uniform(0.5, 2000), 2))
+        for _ in range(cantidad)
+    ]
+
+
+def generar_factura(azar: random.Random, numero: int, lineas: int) -> Factura:
+    """Genera una factura sintética con fecha dentro del último año."""
+    fecha = datetime(2024, 1, 1) + timedelta(seconds=azar.randint(0, 365 * 24 * 3600))
+    return Factura(numero, generar_cliente(azar), generar_productos(azar, lineas), fecha)
+
+
+def llenar_archivo(azar: random.Random, filas: int) -> None:
+    """Guarda 'filas' facturas sintéticas (de 1 a 5 productos) en bloques."""
+    numero = database.obtener_ultimo_numero()
+    while filas > 0:
+        bloque = min(filas, BLOQUE_LLENADO)
+        database.guardar_facturas(
+            [generar_factura(azar, numero + i + 1, azar.randint(1, 5)) for i in range(bloque)]
+        )
+        numero += bloque
+        filas -= bloque
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    """Percentil por el método del rango más cercano sobre una lista ordenada."""
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def medir(funcion: Callable[[], object], repeticiones: int, preparar: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Mide la latencia de 'funcion' y, en una ejecución aparte, su pico de memoria.
+    tracemalloc hace más lenta la ejecución, por eso no se usa durante las mediciones de tiempo.
+
+    Args:
+        funcion: La operación a medir.
+        repeticiones (int): Cantidad de ejecuciones cronometradas.
+        preparar: Función opcional que se ejecuta antes de cada medición, fuera del cronómetro.
+
+    Returns:
+        dict: Percentiles y extremos en milisegundos, y el pico de memoria en KiB.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "p50_ms": _percentil(tiempos, 50),
+        "p90_ms": _percentil(tiempos, 90),
+        "p99_ms": _percentil(tiempos, 99),
+        "min_ms": tiempos[0],
+        "max_ms": tiempos[-1],
+        "media_ms": sum(tiempos) / len(tiempos),
+        "pico_memoria_kib": pico / 1024,
+    }
+
+
+def ejecutar(filas_por_escala: list[int], lineas_por_factura: list[int], repeticiones: int, semilla: int) -> list[dict]:
+    """
+    Ejecuta todos los benchmarks en el directorio actual (que debe estar vacío).
+
+    Returns:
+        list[dict]: Un resultado por benchmark y escala.
+    """
+    azar = random.Random(semilla)
+    manager = InvoiceManager()
+    resultados = []
+
+    def anotar(nombre: str, filas: Optional[int], lineas: Optional[int], medicion: dict) -> None:
+        resultados.append({"nombre": nombre, "filas": filas, "lineas": lineas, **medicion})
+        print(f"  {nombre:36} filas={filas!s:>8} lineas={lineas!s:>6}  p50={medicion['p50_ms']:9.3f} ms",
+              file=sys.stderr)
+
+    # --- Generación de PDFs: no depende del tamaño del archivo de facturas ---
+    for lineas in lineas_por_factura:
+        factura = generar_factura(azar, 1, lineas)
+        veces = repeticiones if lineas < LINEAS_COSTOSAS else max(1, repeticiones // 10)
+        anotar("generar_pdf", None, lineas,
+               medir(lambda: pdf_generator.generar_pdf(factura, usar_cache=False), veces))
+
+    existentes = 0
+    for filas in sorted(filas_por_escala):
+        # Agrega solo las filas que faltan para llegar a la escala pedida.
+        llenar_archivo(azar, filas - existentes)
+        existentes = filas
+
+        anotar("obtener_ultimo_numero", filas, None, medir(database.obtener_ultimo_numero, repeticiones))
+        if database.BACKEND == "csv":
+            # Sin el contador auxiliar hay que recorrer el CSV completo.
+            anotar("obtener_ultimo_numero_sin_contador", filas, None, medir(
+                database.obtener_ultimo_numero,
+                max(1, repeticiones // 4),
+                preparar=lambda: os.remove(database.DB_FILE + database.SEQ_SUFFIX),
+            ))
+
+        def guardar():
+            numero = database.obtener_ultimo_numero() + 1
+            database.guardar_factura(generar_factura(azar, numero, 5))
+
+        anotar("guardar_factura", filas, None, medir(guardar, repeticiones))
+
+        # --- Camino completo: validar y crear, guardar con numeración atómica, generar el PDF ---
+        for lineas in lineas_por_factura:
+            cliente, productos = generar_cliente(azar), generar_productos(azar, lineas)
+
+            def completo():
+                factura = manager.crear_factura(cliente, productos, numero=0)
+                manager.emitir_factura(factura)
+                pdf_generator.generar_pdf(factura, usar_cache=False)
+
+            veces = repeticiones if lineas < LINEAS_COSTOSAS else max(1, repeticiones // 10)
+            anotar("crear_guardar_renderizar", filas, lineas, medir(completo, veces))
+        existentes = database.obtener_ultimo_numero()
+    return resultados
+
+
+def comparar(anteriores: list[dict], actuales: list[dict]) -> None:
+    """Imprime la variación de la mediana de cada benchmark respecto de una corrida anterior."""
+    previos = {(r["nombre"], r["filas"], r["lineas"]): r for r in anteriores}
+    print(f"{'benchmark':36} {'filas':>8} {'lineas':>6} {'antes':>10} {'ahora':>10} {'cambio':>8}")
+    for r in actuales:
+        previo = previos.get((r["nombre"], r["filas"], r["lineas"]))
+        if previo is None:
+            continue
+        cambio = (r["p50_ms"] / previo["p50_ms"] - 1) * 100 if previo["p50_ms"] else 0.0
+        print(f"{r['nombre']:36} {r['filas']!s:>8} {r['lineas']!s:>6} "
+              f"{previo['p50_ms']:8.3f}ms {r['p50_ms']:8.3f}ms {cambio:+7.1f}%")
+
+
+def _enteros(texto: str) -> list[int]:
+    return [int(x) for x in texto.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de facturación.")
+    parser.add_argument("--filas", type=_enteros, default=[1000, 10_000],
+                        help="Tamaños del archivo de facturas, separados por comas (por ejemplo 1000,1000000).")
+    parser.add_argument("--lineas", type=_enteros, default=[1, 100, 1000],
+                        help="Productos por factura, separados por comas (por ejemplo 1,100,10000).")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--backend", choices=database.BACKENDS, default=database.BACKEND)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados. Por defecto, la salida estándar.")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultados anteriores contra los que comparar.")
+    args = parser.parse_args()
+
+    # Todo se escribe en un directorio temporal para no tocar los datos reales.
+    directorio = tempfile.mkdtemp(prefix="bench_facturas_")
+    origen = os.getcwd()
+    salida_pdf = pdf_generator.OUTPUT_DIR
+    try:
+        os.chdir(directorio)
+        pdf_generator.OUTPUT_DIR = os.path.join(directorio, "output")
+        database.configurar_backend(args.backend)
+        resultados = ejecutar(args.filas, args.lineas, args.repeticiones, args.semilla)
+    finally:
+        os.chdir(origen)
+        pdf_generator.OUTPUT_DIR = salida_pdf
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    informe = {
+        "entorno": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "procesadores": os.cpu_count(),
+            "backend": args.backend,
+            "semilla": args.semilla,
+            "repeticiones": args.repeticiones,
+        },
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, mode="w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+    else:
+        print(json.dumps(informe, indent=2))
+
+    if args.comparar:
+        with open(args.comparar, mode="r", encoding="utf-8") as f:
+            comparar(json.load(f)["resultados"], resultados)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
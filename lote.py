@@ -0,0 +1,115 @@
+# lote.py
+# Punto de entrada sin interfaz gráfica para la facturación por lotes.
+# Lee un archivo de clientes y productos (JSON lines o CSV), guarda las facturas
+# y genera sus PDFs, informando el rendimiento y los registros que fallaron.
+#
+# Uso:
+#     python lote.py entrada.jsonl [--sin-pdf] [--backend sqlite] [--bloque 1000] [--fsync] [--trabajadores 8]
+#                                  [--zip facturas.zip | --pdf-unico facturas.pdf]
+#                                  [--metricas metricas.json|metricas.prom] [--perfil lote.prof]
+#                                  [--diario entrada.diario.jsonl]
+#
+# Con --diario, un lote interrumpido se reanuda volviendo a ejecutar el mismo comando:
+# las facturas ya guardadas conservan su número y los PDFs ya generados no se repiten.
+
+import os
+import sys
+import json
+import argparse
+from src.db import database
+from src.logic.invoice_manager import InvoiceManager
+from src.logic.lote import DiarioLote, ResultadoLote, leer_registros
+from src.utils import metricas
+
+
+def main(argv=None) -> int:
+    """
+    Interpreta los argumentos de la línea de comandos y ejecuta el lote.
+
+    Args:
+        argv (list[str], optional): Argumentos a interpretar. Por defecto, los de sys.argv.
+
+    Returns:
+        int: Código de salida; 0 si todos los registros se procesaron sin errores.
+    """
+    parser = argparse.ArgumentParser(description="Genera facturas en lote a partir de un archivo.")
+    parser.add_argument("entrada", help="Archivo de entrada (.jsonl o .csv).")
+    parser.add_argument("--sin-pdf", action="store_true", help="Solo guarda las facturas, sin generar PDFs.")
+    parser.add_argument("--backend", choices=database.BACKENDS, default=database.BACKEND,
+                        help="Almacenamiento de facturas a usar.")
+    parser.add_argument("--bloque", type=int, default=1000, help="Registros por bloque de escritura.")
+    parser.add_argument("--fsync", action="store_true",
+                        help="Fuerza cada bloque guardado a disco antes de seguir con el siguiente.")
+    parser.add_argument("--trabajadores", type=int, default=1,
+                        help="Procesos para generar PDFs en paralelo (0 = uno por núcleo).")
+    combinado = parser.add_mutually_exclusive_group()
+    combinado.add_argument("--zip", metavar="RUTA", help="Reúne todos los PDFs en un archivo ZIP.")
+    combinado.add_argument("--pdf-unico", metavar="RUTA", help="Reúne todas las facturas en un solo PDF.")
+    parser.add_argument("--metricas", metavar="RUTA",
+                        help="Guarda tiempos y contadores por etapa (Prometheus si termina en .prom, si no JSON).")
+    parser.add_argument("--perfil", metavar="RUTA", help="Ejecuta el lote bajo cProfile y guarda el perfil.")
+    parser.add_argument("--diario", metavar="RUTA",
+                        help="Diario del lote: permite reanudarlo sin repetir números ni trabajo ya hecho.")
+    args = parser.parse_args(argv)
+
+    database.configurar_backend(args.backend)
+    if args.fsync:
+        database.SINCRONIZAR = True
+    if args.metricas:
+        metricas.activar()
+    manager = InvoiceManager()
+    # El diario se abre antes que la salida: si no corresponde a la entrada, no se crea ningún archivo.
+    try:
+        diario = DiarioLote(args.diario, args.entrada) if args.diario else None
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    def informar(resultado: ResultadoLote):
+        # Muestra el avance en la misma línea de la terminal.
+        print(f"\r{resultado.resumen()}", end="", file=sys.stderr, flush=True)
+
+    # Con --zip o --pdf-unico, todas las facturas van a un solo archivo de salida.
+    # El módulo de PDF (y ReportLab) solo se importa si hace falta.
+    salida = None
+    if not args.sin_pdf and args.zip:
+        from src.pdf.pdf_generator import EscritorZip
+        salida = EscritorZip(args.zip)
+    elif not args.sin_pdf and args.pdf_unico:
+        from src.pdf.pdf_generator import EscritorPdfCombinado
+        salida = EscritorPdfCombinado(args.pdf_unico)
+
+    try:
+        with metricas.perfilar(args.perfil):
+            resultado = manager.procesar_lote(
+                leer_registros(args.entrada),
+                renderizar=not args.sin_pdf,
+                tamano_bloque=args.bloque,
+                al_avanzar=informar,
+                trabajadores=args.trabajadores or os.cpu_count() or 1,
+                salida=salida,
+                diario=diario,
+            )
+    finally:
+        if salida is not None:
+            salida.cerrar()
+        if diario is not None:
+            diario.cerrar()
+    print(file=sys.stderr)
+    if args.metricas:
+        metricas.escribir(args.metricas)
+
+    if salida is not None:
+        # Guarda junto al archivo combinado el índice número de factura -> página o posición.
+        with open(salida.ruta + ".indice.json", mode="w", encoding="utf-8") as f:
+            json.dump(salida.indice, f)
+
+    # Lista los registros fallidos con su posición en el archivo de entrada.
+    for indice, mensaje in resultado.errores:
+        print(f"Registro {indice + 1}: {mensaje}", file=sys.stderr)
+    print(resultado.resumen())
+    return 1 if resultado.errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
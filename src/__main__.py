@@ -0,0 +1,251 @@
+# src/__main__.py
+# Punto de entrada sin interfaz gráfica: python -m src <comando> ...
+# Permite crear, guardar, renderizar y consultar facturas desde scripts o tareas
+# programadas. No importa PyQt6, y ReportLab solo se carga si se genera un PDF,
+# por lo que los comandos que solo escriben o consultan arrancan rápido.
+#
+# Uso:
+#     python -m src crear --nombre "Ana" --identificacion 123 --direccion "Calle 1" \
+#         --telefono 555 --producto "Servicio:2:150.50" [--producto ...] [--sku "AB-1:3" ...] [--pdf]
+#     python -m src guardar entrada.jsonl
+#     python -m src validar entrada.csv [--bloque 100000]
+#     python -m src renderizar 15 16 17 [--forzar]
+#     python -m src reporte mensual --desde 2024-01 --hasta 2024-12
+#     python -m src reporte diario --desde 2024-03-01 --hasta 2024-03-31
+#     python -m src reporte cliente 123 [--desde 2024-01 --hasta 2024-03]
+#     python -m src catalogo importar productos.csv
+#     python -m src catalogo buscar teclado
+#     python -m src --backend segmentado compactar
+#
+# Las opciones globales --metricas RUTA y --perfil RUTA (antes del comando) guardan
+# los tiempos por etapa y un perfil de cProfile de la ejecución.
+
+import sys
+import argparse
+import calendar
+from datetime import date, datetime
+from src.db import database
+from src.db.models import Cliente, Producto
+from src.logic.invoice_manager import InvoiceManager
+from src.logic.lote import leer_registros
+from src.utils import dinero, metricas
+
+
+def _producto(texto: str) -> Producto:
+    """
+    Interpreta un producto escrito como "descripcion:cantidad:precio".
+    Se separa desde la derecha, así que la descripción puede contener ':'.
+    """
+    try:
+        descripcion, cantidad, precio = texto.rsplit(":", 2)
+        return Producto(descripcion, int(cantidad), float(precio))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Producto inválido '{texto}'; use descripcion:cantidad:precio.")
+
+
+def _sku(texto: str) -> tuple[str, int]:
+    """Interpreta un producto del catálogo escrito como "codigo:cantidad" (o solo "codigo", una unidad)."""
+    codigo, _, cantidad = texto.rpartition(":") if ":" in texto else (texto, "", "1")
+    try:
+        return codigo, int(cantidad)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Producto inválido '{texto}'; use codigo:cantidad.")
+
+
+def _fecha(texto: str) -> date:
+    """Interpreta una fecha "AAAA-MM-DD" o un mes "AAAA-MM" (el primer día del mes)."""
+    for formato in ("%Y-%m-%d", "%Y-%m"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Fecha inválida '{texto}'; use AAAA-MM-DD o AAAA-MM.")
+
+
+def _fecha_final(texto: str) -> date:
+    """Interpreta el fin de un rango como _fecha, pero un mes "AAAA-MM" es su último día."""
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except ValueError:
+        pass
+    # Un mes incluye todos sus días: --hasta 2026-02 llega hasta el 2026-02-28.
+    fecha = _fecha(texto)
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def comando_crear(manager: InvoiceManager, args) -> int:
+    """Crea una factura con los datos de la línea de comandos, la guarda y opcionalmente genera su PDF."""
+    cliente = Cliente(args.nombre, args.identificacion, args.direccion, args.telefono)
+    # Los productos indicados por código toman la descripción y el precio del catálogo.
+    productos = (args.producto or []) + [manager.producto_de_catalogo(sku, cantidad) for sku, cantidad in args.sku or []]
+    if not productos:
+        print("Indique al menos un producto con --producto o --sku.", file=sys.stderr)
+        return 2
+    # El número definitivo se asigna al guardar.
+    factura = manager.crear_factura(cliente, productos, numero=0)
+    numero = manager.emitir_factura(factura)
+    print(f"Factura No. {numero} guardada. Total: ${factura.total:.2f}")
+    if args.pdf:
+        from src.pdf.pdf_generator import generar_pdf
+        print(generar_pdf(factura))
+    return 0
+
+
+def comando_guardar(manager: InvoiceManager, args) -> int:
+    """Guarda las facturas de un archivo JSON lines o CSV, sin generar PDFs."""
+    resultado = manager.procesar_lote(leer_registros(args.entrada), renderizar=False)
+    for indice, mensaje in resultado.errores:
+        print(f"Registro {indice + 1}: {mensaje}", file=sys.stderr)
+    print(resultado.resumen())
+    return 1 if resultado.errores else 0
+
+
+def comando_validar(manager: InvoiceManager, args) -> int:
+    """Valida un archivo CSV de lotes por columnas, sin guardar nada, e informa cada fila inválida."""
+    reporte = manager.validar_archivo(args.entrada, args.bloque)
+    for fila, mensaje in reporte.errores:
+        print(f"Fila {fila + 1}: {mensaje}", file=sys.stderr)
+    print(reporte.resumen())
+    return 0 if reporte.valido else 1
+
+
+def comando_renderizar(manager: InvoiceManager, args) -> int:
+    """Genera el PDF de facturas ya guardadas; las que no cambiaron se toman de la caché."""
+    from src.pdf import cache_render
+    from src.pdf.pdf_generator import OUTPUT_DIR, generar_pdf
+
+    codigo = 0
+    for numero in args.numeros:
+        factura = database.cargar_factura(numero)
+        if factura is None:
+            print(f"No existe la factura No. {numero}.", file=sys.stderr)
+            codigo = 1
+            continue
+        print(generar_pdf(factura, usar_cache=not args.forzar))
+    if not args.forzar:
+        estadisticas = cache_render.cache_de(OUTPUT_DIR).estadisticas()
+        print(f"Caché: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos", file=sys.stderr)
+    return codigo
+
+
+def comando_reporte(manager: InvoiceManager, args) -> int:
+    """Muestra lo facturado por mes, por día o a un cliente, usando los totales precalculados."""
+    if args.tipo == "cliente":
+        if not args.identificacion:
+            print("Indique la identificación del cliente.", file=sys.stderr)
+            return 2
+        total = manager.total_cliente(args.identificacion, args.desde, args.hasta)
+        print(f"{args.identificacion}\t{total:.2f}")
+        return 0
+
+    # Sin fecha, ese extremo del rango queda abierto.
+    if args.tipo == "mensual":
+        filas = manager.ingresos_por_mes(args.desde, args.hasta)
+    else:
+        filas = manager.ingresos_por_dia(args.desde, args.hasta)
+    for periodo, facturas, total in filas:
+        print(f"{periodo}\t{facturas}\t{total:.2f}")
+    return 0
+
+
+def comando_catalogo(manager: InvoiceManager, args) -> int:
+    """Importa productos al catálogo desde un CSV o busca productos por el comienzo del código o la descripción."""
+    catalogo = manager.catalogo()
+    if args.accion == "importar":
+        print(f"{catalogo.importar_csv(args.valor)} productos importados al catálogo.")
+        return 0
+    for item in catalogo.buscar(args.valor, args.limite):
+        print(f"{item.sku}\t{item.descripcion}\t{dinero.formato_precio(item.precio_unitario)}")
+    return 0
+
+
+def comando_compactar(manager: InvoiceManager, args) -> int:
+    """Compacta en Parquet los segmentos cerrados del libro segmentado."""
+    try:
+        compactados = database.compactar_segmentos()
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{compactados} segmentos compactados.")
+    return 0
+
+
+def main(argv=None) -> int:
+    """
+    Interpreta los argumentos de la línea de comandos y ejecuta el comando pedido.
+
+    Args:
+        argv (list[str], optional): Argumentos a interpretar. Por defecto, los de sys.argv.
+
+    Returns:
+        int: Código de salida; 0 si el comando terminó sin errores.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src", description="Facturación sin interfaz gráfica.")
+    parser.add_argument("--backend", choices=database.BACKENDS, default=database.BACKEND,
+                        help="Almacenamiento de facturas a usar.")
+    parser.add_argument("--metricas", metavar="RUTA",
+                        help="Guarda tiempos y contadores por etapa (Prometheus si termina en .prom, si no JSON).")
+    parser.add_argument("--perfil", metavar="RUTA", help="Ejecuta el comando bajo cProfile y guarda el perfil.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    crear = comandos.add_parser("crear", help="Crea y guarda una factura.")
+    crear.add_argument("--nombre", required=True)
+    crear.add_argument("--identificacion", required=True)
+    crear.add_argument("--direccion", required=True)
+    crear.add_argument("--telefono", required=True)
+    crear.add_argument("--producto", type=_producto, action="append",
+                       help="Producto como descripcion:cantidad:precio (se puede repetir).")
+    crear.add_argument("--sku", type=_sku, action="append",
+                       help="Producto del catálogo como codigo:cantidad (se puede repetir).")
+    crear.add_argument("--pdf", action="store_true", help="Genera también el PDF.")
+    crear.set_defaults(funcion=comando_crear)
+
+    guardar = comandos.add_parser("guardar", help="Guarda las facturas de un archivo .jsonl o .csv.")
+    guardar.add_argument("entrada")
+    guardar.set_defaults(funcion=comando_guardar)
+
+    validar = comandos.add_parser("validar", help="Revisa un archivo .csv de lotes sin guardar facturas.")
+    validar.add_argument("entrada")
+    validar.add_argument("--bloque", type=int, default=100_000, help="Filas validadas a la vez.")
+    validar.set_defaults(funcion=comando_validar)
+
+    renderizar = comandos.add_parser("renderizar", help="Genera el PDF de facturas guardadas.")
+    renderizar.add_argument("numeros", type=int, nargs="+", metavar="NUMERO")
+    renderizar.add_argument("--forzar", action="store_true", help="Vuelve a generar aunque el PDF no haya cambiado.")
+    renderizar.set_defaults(funcion=comando_renderizar)
+
+    reporte = comandos.add_parser("reporte", help="Muestra lo facturado por período o por cliente.")
+    reporte.add_argument("tipo", choices=("mensual", "diario", "cliente"))
+    reporte.add_argument("identificacion", nargs="?", help="Identificación del cliente (reporte cliente).")
+    reporte.add_argument("--desde", type=_fecha, help="Inicio del rango (AAAA-MM-DD o AAAA-MM).")
+    reporte.add_argument("--hasta", type=_fecha_final, help="Fin del rango (AAAA-MM-DD, o AAAA-MM hasta el último día del mes).")
+    reporte.set_defaults(funcion=comando_reporte)
+
+    catalogo = comandos.add_parser("catalogo", help="Importa o busca productos del catálogo.")
+    catalogo.add_argument("accion", choices=("importar", "buscar"))
+    catalogo.add_argument("valor", help="Archivo CSV (sku,descripcion,precio_unitario) o texto a buscar.")
+    catalogo.add_argument("--limite", type=int, default=20, help="Cantidad máxima de resultados de la búsqueda.")
+    catalogo.set_defaults(funcion=comando_catalogo)
+
+    compactar = comandos.add_parser("compactar",
+                                    help="Compacta en Parquet los meses cerrados (--backend segmentado).")
+    compactar.set_defaults(funcion=comando_compactar)
+
+    args = parser.parse_args(argv)
+    database.configurar_backend(args.backend)
+    if args.metricas:
+        metricas.activar()
+    manager = InvoiceManager()
+    try:
+        with metricas.perfilar(args.perfil):
+            return args.funcion(manager, args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.metricas:
+            metricas.escribir(args.metricas)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# src/db/agregados.py
+# Este módulo mantiene un índice de totales precalculados sobre las facturas:
+# lo facturado por cliente y mes, por día y por mes. Se actualiza con cada
+# factura guardada, de modo que las consultas de reportes no recorren el
+# archivo de facturas completo.
+#
+# Las tablas viven en una base SQLite: la misma de las facturas con el backend
+# "sqlite" (y se actualizan en la misma transacción), o un archivo aparte con el
+# backend "csv". Los montos se guardan en centavos enteros.
+
+import sqlite3
+import threading
+from typing import Iterable, Optional
+from src.db import clientes
+
+# Conexiones abiertas a archivos de agregados independientes (backend CSV), una por hilo
+# como en sqlite_store, para que las transacciones de distintos hilos no se mezclen.
+_conexiones: dict[tuple[str, int], sqlite3.Connection] = {}
+# Protege los cambios en _conexiones, que se abren desde varios hilos.
+_candado = threading.Lock()
+
+# Un registro para el índice: (fecha de emisión "AAAA-MM-DD HH:MM:SS", identificación del cliente, total en centavos).
+RegistroAgregado = tuple[str, str, int]
+
+
+def conectar(ruta: str) -> sqlite3.Connection:
+    """
+    Devuelve una conexión a un archivo de agregados independiente, creando el esquema si hace falta.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite de agregados.
+
+    Returns:
+        sqlite3.Connection: La conexión reutilizable para ese archivo en el hilo actual.
+    """
+    clave = (ruta, threading.get_ident())
+    conexion = _conexiones.get(clave)
+    if conexion is None:
+        # Sin comprobación de hilo: un hilo nuevo puede heredar el identificador de uno terminado.
+        conexion = sqlite3.connect(ruta, check_same_thread=False)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        crear_esquema(conexion)
+        with _candado:
+            _conexiones[clave] = conexion
+    return conexion
+
+
+def crear_esquema(conexion: sqlite3.Connection) -> None:
+    """Crea las tablas de totales si todavía no existen."""
+    with conexion:
+        # Totales por cliente y mes; la clave primaria permite sumar un rango de meses de un cliente.
+        conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agregado_cliente_mes (
+                cliente_identificacion TEXT NOT NULL,
+                mes TEXT NOT NULL,
+                facturas INTEGER NOT NULL,
+                centavos INTEGER NOT NULL,
+                PRIMARY KEY (cliente_identificacion, mes)
+            ) WITHOUT ROWID
+            """
+        )
+        conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agregado_dia (
+                dia TEXT PRIMARY KEY,
+                facturas INTEGER NOT NULL,
+                centavos INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agregado_mes (
+                mes TEXT PRIMARY KEY,
+                facturas INTEGER NOT NULL,
+                centavos INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        # Datos de control, como la marca que indica hasta dónde está al día el índice.
+        conexion.execute(
+            "CREATE TABLE IF NOT EXISTS agregado_meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)"
+        )
+    # El registro de clientes es otro índice derivado de las facturas y comparte la marca.
+    clientes.crear_esquema(conexion)
+
+
+def registrar(conexion: sqlite3.Connection, registros: Iterable[RegistroAgregado]) -> None:
+    """
+    Suma facturas nuevas a los totales. No confirma la transacción: quien llama
+    decide cuándo hacerlo, para poder agruparla con la escritura de las facturas.
+
+    Args:
+        conexion (sqlite3.Connection): Conexión con el esquema de agregados.
+        registros (Iterable[RegistroAgregado]): Las facturas a sumar.
+    """
+    # Combina primero en memoria las facturas del mismo cliente, día o mes.
+    por_cliente_mes: dict[tuple[str, str], list[int]] = {}
+    por_dia: dict[str, list[int]] = {}
+    por_mes: dict[str, list[int]] = {}
+    for fecha, identificacion, centavos in registros:
+        dia, mes = fecha[:10], fecha[:7]
+        for tabla, clave in ((por_cliente_mes, (identificacion, mes)), (por_dia, dia), (por_mes, mes)):
+            acumulado = tabla.setdefault(clave, [0, 0])
+            acumulado[0] += 1
+            acumulado[1] += centavos
+
+    conexion.executemany(
+        """
+        INSERT INTO agregado_cliente_mes VALUES (?, ?, ?, ?)
+        ON CONFLICT (cliente_identificacion, mes)
+        DO UPDATE SET facturas = facturas + excluded.facturas, centavos = centavos + excluded.centavos
+        """,
+        ((c, m, n, t) for (c, m), (n, t) in por_cliente_mes.items()),
+    )
+    for tabla, columna, datos in (("agregado_dia", "dia", por_dia), ("agregado_mes", "mes", por_mes)):
+        conexion.executemany(
+            f"""
+            INSERT INTO {tabla} VALUES (?, ?, ?)
+            ON CONFLICT ({columna})
+            DO UPDATE SET facturas = facturas + excluded.facturas, centavos = centavos + excluded.centavos
+            """,
+            ((k, n, t) for k, (n, t) in datos.items()),
+        )
+
+
+def vaciar(conexion: sqlite3.Connection) -> None:
+    """Borra todos los totales (sin confirmar la transacción), antes de reconstruirlos."""
+    for tabla in ("agregado_cliente_mes", "agregado_dia", "agregado_mes"):
+        conexion.execute(f"DELETE FROM {tabla}")
+
+
+def leer_marca(conexion: sqlite3.Connection) -> Optional[str]:
+    """
+    Lee la marca que identifica el estado del archivo de facturas al que corresponden los totales.
+
+    Returns:
+        Optional[str]: La marca guardada, o None si no hay ninguna.
+    """
+    fila = conexion.execute("SELECT valor FROM agregado_meta WHERE clave = 'marca'").fetchone()
+    return fila[0] if fila else None
+
+
+def guardar_marca(conexion: sqlite3.Connection, marca: str) -> None:
+    """Guarda la marca del archivo de facturas (sin confirmar la transacción)."""
+    conexion.execute(
+        "INSERT INTO agregado_meta VALUES ('marca', ?) ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor",
+        (marca,),
+    )
+
+
+def total_cliente(conexion: sqlite3.Connection, identificacion: str, desde_mes: str, hasta_mes: str) -> tuple[int, int]:
+    """
+    Suma lo facturado a un cliente en un rango de meses (ambos incluidos).
+
+    Args:
+        conexion (sqlite3.Connection): Conexión con el esquema de agregados.
+        identificacion (str): La identificación del cliente.
+        desde_mes (str): Primer mes, en formato "AAAA-MM".
+        hasta_mes (str): Último mes, en formato "AAAA-MM".
+
+    Returns:
+        tuple[int, int]: Cantidad de facturas y total en centavos.
+    """
+    fila = conexion.execute(
+        """
+        SELECT COALESCE(SUM(facturas), 0), COALESCE(SUM(centavos), 0) FROM agregado_cliente_mes
+        WHERE cliente_identificacion = ? AND mes BETWEEN ? AND ?
+        """,
+        (identificacion, desde_mes, hasta_mes),
+    ).fetchone()
+    return fila[0], fila[1]
+
+
+def por_periodo(conexion: sqlite3.Connection, periodo: str, desde: str, hasta: str) -> list[tuple[str, int, int]]:
+    """
+    Devuelve los totales por día o por mes dentro de un rango (ambos extremos incluidos).
+
+    Args:
+        conexion (sqlite3.Connection): Conexión con el esquema de agregados.
+        periodo (str): "dia" o "mes".
+        desde (str): Inicio del rango ("AAAA-MM-DD" para días, "AAAA-MM" para meses).
+        hasta (str): Fin del rango, en el mismo formato.
+
+    Returns:
+        list[tuple[str, int, int]]: (período, cantidad de facturas, total en centavos), en orden.
+    """
+    if periodo not in ("dia", "mes"):
+        raise ValueError(f"Período desconocido: '{periodo}'.")
+    return conexion.execute(
+        f"SELECT {periodo}, facturas, centavos FROM agregado_{periodo} WHERE {periodo} BETWEEN ? AND ? ORDER BY {periodo}",
+        (desde, hasta),
+    ).fetchall()
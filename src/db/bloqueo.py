@@ -0,0 +1,85 @@
+# src/db/bloqueo.py
+# Este módulo implementa un bloqueo exclusivo entre procesos basado en un
+# archivo auxiliar. Evita que dos instancias de la aplicación que comparten
+# el mismo archivo de facturas (por ejemplo, en una unidad de red) escriban
+# filas intercaladas o asignen el mismo número de factura.
+
+import os
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Extensión del archivo de bloqueo, que se ubica junto al archivo protegido.
+LOCK_SUFFIX = ".lock"
+
+
+class BloqueoArchivo:
+    """
+    Bloqueo exclusivo sobre un archivo, válido entre procesos y entre hilos.
+    Se usa como administrador de contexto y es reentrante: un mismo hilo puede
+    volver a adquirirlo sin bloquearse, y se libera al salir del bloque más externo.
+    """
+
+    def __init__(self, ruta: str):
+        """
+        Args:
+            ruta (str): El archivo a proteger; el bloqueo se toma sobre ruta + LOCK_SUFFIX.
+        """
+        self.ruta = ruta + LOCK_SUFFIX
+        # Protege entre hilos del mismo proceso; el bloqueo del sistema protege entre procesos.
+        self._hilos = threading.RLock()
+        self._profundidad = 0
+        self._descriptor = None
+
+    def __enter__(self):
+        self._hilos.acquire()
+        if self._profundidad == 0:
+            try:
+                self._descriptor = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+                _bloquear(self._descriptor)
+            except BaseException:
+                if self._descriptor is not None:
+                    os.close(self._descriptor)
+                    self._descriptor = None
+                self._hilos.release()
+                raise
+        self._profundidad += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._profundidad -= 1
+        if self._profundidad == 0:
+            try:
+                _desbloquear(self._descriptor)
+            finally:
+                os.close(self._descriptor)
+                self._descriptor = None
+        self._hilos.release()
+        return False
+
+
+def _bloquear(descriptor: int) -> None:
+    """Espera hasta obtener el bloqueo exclusivo del archivo abierto en 'descriptor'."""
+    if os.name == "nt":
+        # msvcrt.locking bloquea un rango de bytes; LK_LOCK reintenta durante unos segundos,
+        # así que se repite hasta conseguirlo.
+        while True:
+            try:
+                os.lseek(descriptor, 0, os.SEEK_SET)
+                msvcrt.locking(descriptor, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(descriptor, fcntl.LOCK_EX)
+
+
+def _desbloquear(descriptor: int) -> None:
+    """Libera el bloqueo tomado con _bloquear."""
+    if os.name == "nt":
+        os.lseek(descriptor, 0, os.SEEK_SET)
+        msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(descriptor, fcntl.LOCK_UN)
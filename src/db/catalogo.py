@@ -0,0 +1,307 @@
+# src/db/catalogo.py
+# Este módulo implementa el catálogo de productos: cada producto tiene un código
+# (SKU), una descripción y un precio unitario. Al facturar, basta con escribir el
+# código (o el comienzo del código o de la descripción) para obtener el resto.
+#
+# El catálogo se guarda en una base SQLite propia, con índices sobre el código y
+# sobre la descripción normalizada, de modo que la búsqueda por prefijo es una
+# consulta de rango sobre el índice y no recorre la tabla. Los productos usados
+# hace poco se conservan en memoria (LRU), porque al facturar se repiten mucho.
+# Los precios se guardan en millonésimas enteras (dinero.ESCALA_PRECIO), la misma
+# escala con que se calculan los subtotales, para no perder precios menores que un centavo.
+
+import csv
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+from src.db.models import Producto
+from src.utils import dinero
+from src.utils.texto import normalizar
+
+# Archivo predeterminado del catálogo.
+CATALOGO_FILE = "catalogo.db"
+# Cantidad de productos usados recientemente que se conservan en memoria.
+TAMANO_RECIENTES = 256
+# Carácter mayor que cualquier otro: 'prefijo' + FIN_PREFIJO acota el rango de un prefijo.
+FIN_PREFIJO = "\U0010ffff"
+
+
+class ItemCatalogo:
+    """Un producto del catálogo: código, descripción y precio unitario."""
+    __slots__ = ("sku", "descripcion", "precio_unitario")
+
+    def __init__(self, sku: str, descripcion: str, precio_unitario: float):
+        """
+        Args:
+            sku (str): El código del producto.
+            descripcion (str): La descripción que aparece en la factura.
+            precio_unitario (float): El precio por unidad.
+        """
+        self.sku = sku
+        self.descripcion = descripcion
+        self.precio_unitario = precio_unitario
+
+    def producto(self, cantidad: int = 1) -> Producto:
+        """
+        Crea la línea de factura de este producto.
+
+        Args:
+            cantidad (int): Número de unidades.
+
+        Returns:
+            Producto: El producto con la descripción y el precio del catálogo.
+        """
+        return Producto(self.descripcion, cantidad, self.precio_unitario)
+
+
+def normalizar_sku(sku: str) -> str:
+    """Los códigos no distinguen mayúsculas ni espacios alrededor: ' ab-1 ' es 'AB-1'."""
+    return sku.strip().upper()
+
+
+class Catalogo:
+    """
+    Catálogo de productos guardado en SQLite, con búsqueda por prefijo y una
+    caché LRU de los productos consultados recientemente. Se puede usar desde
+    varios hilos (por ejemplo, la interfaz y la cola de trabajos).
+    """
+
+    def __init__(self, ruta: str = CATALOGO_FILE, tamano_recientes: int = TAMANO_RECIENTES):
+        """
+        Abre el catálogo, creándolo si no existe.
+
+        Args:
+            ruta (str): Ruta del archivo SQLite del catálogo.
+            tamano_recientes (int): Cantidad de productos que se conservan en memoria.
+        """
+        self.ruta = ruta
+        self.tamano_recientes = tamano_recientes
+        # Consultas de obtener() resueltas en memoria y en la base, para medir la caché.
+        self.aciertos = 0
+        self.fallos = 0
+        # Código -> producto, del usado hace más tiempo al más reciente.
+        self._recientes: OrderedDict[str, ItemCatalogo] = OrderedDict()
+        self._candado = threading.RLock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        with self._conexion:
+            self._conexion.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalogo (
+                    sku TEXT PRIMARY KEY,
+                    descripcion TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    precio_millonesimas INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            _migrar_precios(self._conexion)
+            # 'clave' es la descripción normalizada, para buscar sin mayúsculas ni tildes.
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_catalogo_clave ON catalogo (clave)")
+
+    def __len__(self) -> int:
+        with self._candado:
+            return self._conexion.execute("SELECT COUNT(*) FROM catalogo").fetchone()[0]
+
+    def agregar(self, sku: str, descripcion: str, precio_unitario: float) -> ItemCatalogo:
+        """
+        Agrega un producto al catálogo o actualiza el que tiene el mismo código.
+
+        Args:
+            sku (str): El código del producto.
+            descripcion (str): La descripción.
+            precio_unitario (float): El precio por unidad.
+
+        Returns:
+            ItemCatalogo: El producto guardado.
+
+        Raises:
+            ValueError: Si el código o la descripción están vacíos, o el precio no es positivo
+                (también si es tan pequeño que no llega a una millonésima).
+        """
+        self.agregar_varios([(sku, descripcion, precio_unitario)])
+        return self.obtener(sku)
+
+    def agregar_varios(self, productos: Iterable[tuple[str, str, float]]) -> int:
+        """
+        Agrega o actualiza varios productos en una sola transacción.
+
+        Args:
+            productos (Iterable[tuple[str, str, float]]): Tuplas (código, descripción, precio unitario).
+
+        Returns:
+            int: Cantidad de productos guardados.
+
+        Raises:
+            ValueError: Si algún producto es inválido; en ese caso no se guarda ninguno.
+        """
+        filas = []
+        for sku, descripcion, precio in productos:
+            sku, descripcion = normalizar_sku(sku), descripcion.strip()
+            if not sku or not descripcion:
+                raise ValueError("El código y la descripción del producto son obligatorios.")
+            # Se valida el precio ya convertido: uno que se redondea a cero no es positivo.
+            millonesimas = dinero.a_millonesimas(precio)
+            if millonesimas <= 0:
+                raise ValueError(f"El precio del producto '{sku}' debe ser mayor que cero.")
+            filas.append((sku, descripcion, normalizar(descripcion), millonesimas))
+        with self._candado, self._conexion:
+            self._conexion.executemany(
+                """
+                INSERT INTO catalogo VALUES (?, ?, ?, ?)
+                ON CONFLICT (sku) DO UPDATE SET
+                    descripcion = excluded.descripcion, clave = excluded.clave,
+                    precio_millonesimas = excluded.precio_millonesimas
+                """,
+                filas,
+            )
+            # Los productos modificados dejan de ser válidos en memoria.
+            for sku, *_ in filas:
+                self._recientes.pop(sku, None)
+        return len(filas)
+
+    def eliminar(self, sku: str) -> None:
+        """Quita un producto del catálogo."""
+        sku = normalizar_sku(sku)
+        with self._candado, self._conexion:
+            self._conexion.execute("DELETE FROM catalogo WHERE sku = ?", (sku,))
+            self._recientes.pop(sku, None)
+
+    def obtener(self, sku: str) -> Optional[ItemCatalogo]:
+        """
+        Busca un producto por su código exacto. Consulta primero los productos
+        usados recientemente y, si no está ahí, la base de datos.
+
+        Args:
+            sku (str): El código del producto.
+
+        Returns:
+            Optional[ItemCatalogo]: El producto, o None si el código no existe.
+        """
+        sku = normalizar_sku(sku)
+        with self._candado:
+            item = self._recientes.get(sku)
+            if item is not None:
+                self._recientes.move_to_end(sku)
+                self.aciertos += 1
+                return item
+            self.fallos += 1
+            fila = self._conexion.execute(
+                "SELECT sku, descripcion, precio_millonesimas FROM catalogo WHERE sku = ?", (sku,)
+            ).fetchone()
+            if fila is None:
+                return None
+            item = _item(fila)
+            self._recordar(item)
+            return item
+
+    def buscar(self, prefijo: str, limite: int = 20) -> list[ItemCatalogo]:
+        """
+        Busca productos cuyo código o descripción empiecen por un prefijo.
+        Primero aparecen las coincidencias por código y luego por descripción,
+        cada grupo en orden alfabético y sin repetidos.
+
+        Args:
+            prefijo (str): El texto escrito; la descripción no distingue mayúsculas ni tildes.
+            limite (int): Cantidad máxima de resultados.
+
+        Returns:
+            list[ItemCatalogo]: Los productos encontrados.
+        """
+        sku, clave = normalizar_sku(prefijo), normalizar(prefijo)
+        if not sku:
+            return []
+        with self._candado:
+            encontrados: dict[str, ItemCatalogo] = {}
+            # Cada consulta es un recorrido de rango sobre un índice: [prefijo, prefijo + FIN_PREFIJO).
+            for columna, valor in (("sku", sku), ("clave", clave)):
+                filas = self._conexion.execute(
+                    f"""
+                    SELECT sku, descripcion, precio_millonesimas FROM catalogo
+                    WHERE {columna} >= ? AND {columna} < ? ORDER BY {columna} LIMIT ?
+                    """,
+                    (valor, valor + FIN_PREFIJO, limite),
+                )
+                for fila in filas:
+                    encontrados.setdefault(fila[0], _item(fila))
+                    if len(encontrados) >= limite:
+                        return list(encontrados.values())
+            return list(encontrados.values())
+
+    def recientes(self, limite: int = 20) -> list[ItemCatalogo]:
+        """
+        Devuelve los productos consultados más recientemente, del más reciente al más antiguo.
+
+        Args:
+            limite (int): Cantidad máxima de resultados.
+
+        Returns:
+            list[ItemCatalogo]: Los productos usados hace menos tiempo.
+        """
+        with self._candado:
+            return list(reversed(self._recientes.values()))[:limite]
+
+    def usar(self, item: ItemCatalogo) -> None:
+        """Marca un producto como usado recientemente (por ejemplo, al elegirlo de una búsqueda)."""
+        with self._candado:
+            self._recordar(item)
+
+    def importar_csv(self, ruta: str) -> int:
+        """
+        Importa productos desde un CSV con las columnas 'sku', 'descripcion' y 'precio_unitario'.
+        Los códigos que ya existen se actualizan.
+
+        Args:
+            ruta (str): Ruta del archivo CSV.
+
+        Returns:
+            int: Cantidad de productos importados.
+
+        Raises:
+            ValueError: Si alguna fila es inválida; en ese caso no se importa ninguna.
+        """
+        with open(ruta, mode="r", newline="", encoding="utf-8") as f:
+            productos = []
+            for numero, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    productos.append((row["sku"], row["descripcion"], float(row["precio_unitario"])))
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"Fila {numero} del catálogo inválida: {e!r}")
+        return self.agregar_varios(productos)
+
+    def cerrar(self) -> None:
+        """Cierra la base de datos del catálogo."""
+        with self._candado:
+            self._conexion.close()
+
+    def _recordar(self, item: ItemCatalogo) -> None:
+        """Agrega un producto a los recientes y descarta el más antiguo si se supera el tamaño. Requiere el candado."""
+        self._recientes[item.sku] = item
+        self._recientes.move_to_end(item.sku)
+        while len(self._recientes) > self.tamano_recientes:
+            self._recientes.popitem(last=False)
+
+
+def _item(fila: tuple) -> ItemCatalogo:
+    """Convierte una fila (sku, descripcion, precio_millonesimas) en un ItemCatalogo."""
+    return ItemCatalogo(fila[0], fila[1], dinero.desde_millonesimas(fila[2]))
+
+
+def _migrar_precios(conexion: sqlite3.Connection) -> None:
+    """
+    Convierte un catálogo creado con los precios en centavos a millonésimas.
+    Se llama dentro de un bloque 'with conexion', que confirma el cambio; un catálogo
+    ya convertido no se modifica.
+    """
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(catalogo)")}
+    if "precio_centavos" in columnas:
+        # sqlite3 no abre una transacción antes de un ALTER: se abre aquí para que
+        # el cambio de nombre y el cambio de escala se apliquen juntos o ninguno.
+        if not conexion.in_transaction:
+            conexion.execute("BEGIN")
+        conexion.execute("ALTER TABLE catalogo RENAME COLUMN precio_centavos TO precio_millonesimas")
+        conexion.execute(
+            "UPDATE catalogo SET precio_millonesimas = precio_millonesimas * ?",
+            (dinero.ESCALA_PRECIO // 100,),
+        )
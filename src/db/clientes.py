@@ -0,0 +1,209 @@
+# src/db/clientes.py
+# Este módulo mantiene el registro de clientes: los datos de cada cliente por
+# identificación, sin repetirlos por cada factura. Como los totales precalculados
+# (ver agregados), se deriva del archivo de facturas, se guarda en la misma base
+# SQLite y se actualiza con cada factura guardada.
+#
+# El registro conserva una versión por cada cambio de datos del cliente (por
+# ejemplo, una mudanza), con el número de la primera factura que la usa. Así,
+# una factura guardada solo con la identificación del cliente (ver
+# database.CLIENTES_POR_REFERENCIA) se completa con los datos vigentes en su fecha.
+#
+# También ofrece IndiceClientes, un índice en memoria para autocompletar por
+# prefijo del nombre o de la identificación. Usa listas ordenadas y búsqueda
+# binaria (bisect): cada consulta cuesta O(log n + resultados), y con 100.000
+# clientes ocupa bastante menos memoria que un árbol de prefijos (trie).
+
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator, Optional
+from src.db.models import Cliente
+from src.utils.texto import normalizar
+
+# Un registro para el índice: (número de factura, identificación, nombre, dirección, teléfono).
+RegistroCliente = tuple[int, str, str, str, str]
+
+
+def crear_esquema(conexion: sqlite3.Connection) -> None:
+    """
+    Crea la tabla de clientes si todavía no existe. Si la base ya tenía totales
+    calculados (de una versión sin registro de clientes), borra su marca para
+    que se reconstruya todo, incluido el registro, en la próxima consulta.
+    """
+    existe = conexion.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes'").fetchone()
+    if existe:
+        return
+    with conexion:
+        # Una fila por cada versión de los datos de un cliente, desde la factura en que aparece.
+        conexion.execute(
+            """
+            CREATE TABLE clientes (
+                identificacion TEXT NOT NULL,
+                desde_factura INTEGER NOT NULL,
+                nombre TEXT NOT NULL,
+                direccion TEXT NOT NULL,
+                telefono TEXT NOT NULL,
+                PRIMARY KEY (identificacion, desde_factura)
+            ) WITHOUT ROWID
+            """
+        )
+        conexion.execute("DELETE FROM agregado_meta WHERE clave = 'marca'")
+
+
+def registrar(conexion: sqlite3.Connection, registros: Iterable[RegistroCliente]) -> None:
+    """
+    Actualiza el registro con los clientes de facturas nuevas, en orden de número:
+    se agrega una versión solo cuando los datos difieren de la última conocida.
+    Las filas sin nombre (facturas que referencian al cliente solo por su
+    identificación) no cambian nada. No confirma la transacción.
+
+    Args:
+        conexion (sqlite3.Connection): Conexión con el esquema de clientes.
+        registros (Iterable[RegistroCliente]): Los clientes de las facturas guardadas.
+    """
+    # Últimos datos conocidos de cada cliente visto en esta llamada.
+    ultimos: dict[str, Optional[tuple[str, str, str]]] = {}
+    nuevas = []
+    for numero, identificacion, nombre, direccion, telefono in registros:
+        if not nombre:
+            continue
+        if identificacion not in ultimos:
+            fila = conexion.execute(
+                """
+                SELECT nombre, direccion, telefono FROM clientes
+                WHERE identificacion = ? ORDER BY desde_factura DESC LIMIT 1
+                """,
+                (identificacion,),
+            ).fetchone()
+            ultimos[identificacion] = tuple(fila) if fila else None
+        datos = (nombre, direccion, telefono)
+        if ultimos[identificacion] != datos:
+            ultimos[identificacion] = datos
+            nuevas.append((identificacion, int(numero), nombre, direccion, telefono))
+
+    conexion.executemany("INSERT OR REPLACE INTO clientes VALUES (?, ?, ?, ?, ?)", nuevas)
+
+
+def vaciar(conexion: sqlite3.Connection) -> None:
+    """Borra el registro (sin confirmar la transacción), antes de reconstruirlo."""
+    conexion.execute("DELETE FROM clientes")
+
+
+def obtener(conexion: sqlite3.Connection, identificacion: str, numero: Optional[int] = None) -> Optional[Cliente]:
+    """
+    Busca un cliente por su identificación.
+
+    Args:
+        conexion (sqlite3.Connection): Conexión con el esquema de clientes.
+        identificacion (str): La identificación del cliente.
+        numero (Optional[int]): Si se indica, devuelve los datos vigentes en esa factura;
+            si no, los más recientes.
+
+    Returns:
+        Optional[Cliente]: Los datos del cliente, o None si no está registrado.
+    """
+    fila = conexion.execute(
+        """
+        SELECT nombre, identificacion, direccion, telefono FROM clientes
+        WHERE identificacion = ? AND desde_factura <= ? ORDER BY desde_factura DESC LIMIT 1
+        """,
+        (identificacion, numero if numero is not None else 2 ** 62),
+    ).fetchone()
+    return Cliente(*fila) if fila else None
+
+
+def todos(conexion: sqlite3.Connection) -> Iterator[Cliente]:
+    """Recorre todos los clientes registrados, con sus datos más recientes."""
+    # Con MAX(), SQLite toma las demás columnas de la fila que tiene el máximo.
+    filas = conexion.execute(
+        "SELECT nombre, identificacion, direccion, telefono, MAX(desde_factura) FROM clientes GROUP BY identificacion"
+    )
+    for nombre, identificacion, direccion, telefono, _ in filas:
+        yield Cliente(nombre, identificacion, direccion, telefono)
+
+
+class IndiceClientes:
+    """
+    Índice en memoria de los clientes para buscarlos por prefijo del nombre o de
+    la identificación. Se puede actualizar desde otro hilo mientras se consulta.
+    """
+
+    def __init__(self, clientes: Iterable[Cliente] = ()):
+        """
+        Args:
+            clientes (Iterable[Cliente]): Los clientes iniciales, por ejemplo database.cargar_clientes().
+        """
+        self._clientes: dict[str, Cliente] = {}
+        for cliente in clientes:
+            self._clientes[cliente.identificacion] = cliente
+        # Listas ordenadas de (clave normalizada, identificación) para la búsqueda binaria.
+        self._por_nombre = sorted((normalizar(c.nombre), i) for i, c in self._clientes.items())
+        self._por_identificacion = sorted((normalizar(i), i) for i in self._clientes)
+        self._candado = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clientes)
+
+    def obtener(self, identificacion: str) -> Optional[Cliente]:
+        """Devuelve el cliente con esa identificación exacta, o None."""
+        return self._clientes.get(identificacion)
+
+    def agregar(self, cliente: Cliente) -> None:
+        """
+        Agrega un cliente o reemplaza los datos del que tiene la misma identificación.
+
+        Args:
+            cliente (Cliente): Los datos más recientes del cliente.
+        """
+        with self._candado:
+            anterior = self._clientes.get(cliente.identificacion)
+            if anterior is None:
+                insort(self._por_identificacion, (normalizar(cliente.identificacion), cliente.identificacion))
+            elif normalizar(anterior.nombre) != normalizar(cliente.nombre):
+                _quitar(self._por_nombre, (normalizar(anterior.nombre), cliente.identificacion))
+                anterior = None
+            if anterior is None:
+                insort(self._por_nombre, (normalizar(cliente.nombre), cliente.identificacion))
+            self._clientes[cliente.identificacion] = cliente
+
+    def buscar(self, prefijo: str, limite: int = 20) -> list[Cliente]:
+        """
+        Busca clientes cuya identificación o nombre empiecen por un prefijo.
+        Primero aparecen las coincidencias por identificación y luego por nombre,
+        cada grupo en orden alfabético y sin repetidos.
+
+        Args:
+            prefijo (str): El texto escrito; no distingue mayúsculas ni tildes.
+            limite (int): Cantidad máxima de resultados.
+
+        Returns:
+            list[Cliente]: Los clientes encontrados.
+        """
+        clave = normalizar(prefijo)
+        if not clave:
+            return []
+        with self._candado:
+            encontrados: dict[str, Cliente] = {}
+            for lista in (self._por_identificacion, self._por_nombre):
+                for _, identificacion in _con_prefijo(lista, clave, limite):
+                    encontrados.setdefault(identificacion, self._clientes[identificacion])
+                    if len(encontrados) >= limite:
+                        return list(encontrados.values())
+            return list(encontrados.values())
+
+
+def _con_prefijo(lista: list[tuple[str, str]], prefijo: str, limite: int) -> Iterator[tuple[str, str]]:
+    """Recorre, en orden, hasta 'limite' entradas de una lista ordenada cuya clave empieza por 'prefijo'."""
+    posicion = bisect_left(lista, (prefijo,))
+    for entrada in lista[posicion:posicion + limite]:
+        if not entrada[0].startswith(prefijo):
+            return
+        yield entrada
+
+
+def _quitar(lista: list[tuple[str, str]], entrada: tuple[str, str]) -> None:
+    """Quita una entrada de una lista ordenada, si está."""
+    posicion = bisect_left(lista, entrada)
+    if posicion < len(lista) and lista[posicion] == entrada:
+        del lista[posicion]
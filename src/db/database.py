@@ -4,33 +4,94 @@
 
 import os
 import csv
-from src.db.models import Factura
+import json
+from datetime import date, datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+from src.db import agregados, clientes, segmentos, sqlite_store
+from src.db.bloqueo import BloqueoArchivo
+from src.db.models import Factura, Cliente, Producto, Productos
+from src.utils import dinero, metricas
 
 # Define el nombre del archivo que actuará como base de datos.
 DB_FILE = "facturas.csv"
+# Extensión del archivo auxiliar que guarda el último número de factura asignado.
+# Se ubica junto a DB_FILE (por ejemplo, "facturas.csv.seq").
+SEQ_SUFFIX = ".seq"
+# Archivo de la base de datos SQLite, usado cuando BACKEND es "sqlite".
+SQLITE_FILE = "facturas.db"
+# Archivo con los totales precalculados por cliente, día y mes del backend CSV.
+# Con el backend SQLite, esos totales se guardan en SQLITE_FILE.
+AGREGADOS_FILE = "facturas_agregados.db"
+# Directorio del libro segmentado, usado cuando BACKEND es "segmentado": un CSV por mes
+# y un manifiesto con el rango de números y fechas de cada uno (ver segmentos.py).
+# Sus totales precalculados se guardan en ese mismo directorio, en AGREGADOS_FILE.
+SEGMENTOS_DIR = "facturas"
+
+# Backends de almacenamiento disponibles y el que está activo.
+BACKENDS = ("csv", "sqlite", "segmentado")
+BACKEND = "csv"
+
+# Nombres de las columnas, en el orden en que se guardan las filas.
+COLUMNAS = list(sqlite_store.COLUMNAS)
+
+# Formato con el que se guarda la fecha de emisión.
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+# Si es True, cada escritura del CSV se fuerza a disco (fsync) antes de darse por terminada.
+# Es más lento, pero una factura guardada sobrevive a un corte de energía. Para no pagar
+# un fsync por factura, guarde en bloques con guardar_facturas o use GrupoCommit.
+SINCRONIZAR = False
+
+# Si es True, el backend CSV guarda los datos del cliente (nombre, dirección, teléfono) solo
+# cuando es nuevo o cambiaron; en las demás facturas deja esas columnas vacías y el cliente
+# queda referenciado por su identificación. Al leer, se completan con el registro de
+# clientes (ver clientes.py). Reduce el tamaño del CSV cuando los clientes se repiten, pero
+# quien lea el CSV directamente (por ejemplo reportes.py) verá esas columnas vacías.
+CLIENTES_POR_REFERENCIA = False
+
+# Bloqueos entre procesos, uno por archivo CSV.
+_bloqueos: dict[str, BloqueoArchivo] = {}
+
+
+def configurar_backend(nombre: str) -> None:
+    """
+    Selecciona el backend de almacenamiento usado por el resto de funciones del módulo.
+    
+    Args:
+        nombre (str): "csv" para el archivo plano, "sqlite" para la base de datos indexada
+            o "segmentado" para el libro dividido por mes.
+        
+    Raises:
+        ValueError: Si el backend no existe.
+    """
+    global BACKEND
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: '{nombre}'. Opciones: {', '.join(BACKENDS)}.")
+    BACKEND = nombre
 
 
 def inicializar_db():
     """
     Asegura que la base de datos (archivo CSV) exista.
     Si el archivo no existe, lo crea y escribe la fila de encabezado.
+    Con el backend SQLite, crea la tabla y sus índices; con el segmentado, el directorio y su manifiesto.
     """
+    if BACKEND == "sqlite":
+        sqlite_store.conectar(SQLITE_FILE)
+        return
+    if BACKEND == "segmentado":
+        segmentos.inicializar(SEGMENTOS_DIR)
+        return
+
     # Comprueba si el archivo de la base de datos ya existe en el disco.
     if not os.path.exists(DB_FILE):
         # Si no existe, lo abre en modo escritura ('w') para crearlo.
         with open(DB_FILE, mode="w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             # Escribe los nombres de las columnas en la primera fila.
-            writer.writerow([
-                "numero",
-                "fecha_emision",
-                "cliente_nombre",
-                "cliente_identificacion",
-                "cliente_direccion",
-                "cliente_telefono",
-                "productos",  # Los productos se guardarán como una cadena de texto.
-                "total"
-            ])
+            # Los productos se guardarán codificados como una lista JSON por fila.
+            writer.writerow(COLUMNAS)
 
 
 def guardar_factura(factura: Factura):
@@ -40,39 +101,813 @@ def guardar_factura(factura: Factura):
     Args:
         factura (Factura): El objeto de la factura que se va a guardar.
     """
-    # Abre el archivo en modo 'append' ('a') para añadir datos sin sobreescribir.
-    with open(DB_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        # Prepara una lista de cadenas con los datos de la factura para escribirla en una fila.
-        writer.writerow([
-            factura.numero,
-            factura.fecha_emision.strftime("%Y-%m-%d %H:%M:%S"),
-            factura.cliente.nombre,
-            factura.cliente.identificacion,
-            factura.cliente.direccion,
-            factura.cliente.telefono,
-            # Serializa la lista de productos en una sola cadena de texto.
-            "; ".join([f"{p.descripcion} x{p.cantidad} @ {p.precio_unitario}" for p in factura.productos]),
-            f"{factura.total:.2f}"
-        ])
+    guardar_facturas([factura])
+
+
+def guardar_facturas(facturas: list[Factura], sincronizar: Optional[bool] = None) -> None:
+    """
+    Guarda varias facturas con una sola escritura (o una sola transacción en SQLite).
+    Es la variante para lotes de guardar_factura: abre el archivo y actualiza
+    el contador de numeración una sola vez, sin importar cuántas facturas haya.
+    Usa los números que ya tienen las facturas; para numerarlas de forma segura
+    frente a otras instancias de la aplicación, use asignar_y_guardar.
+    
+    Args:
+        facturas (list[Factura]): Las facturas que se van a guardar, en orden.
+        sincronizar (Optional[bool]): Si se fuerza la escritura a disco. Por defecto, SINCRONIZAR.
+    """
+    if not facturas:
+        return
+
+    with metricas.etapa("db.guardado"):
+        if BACKEND == "sqlite":
+            sqlite_store.insertar_filas(SQLITE_FILE, [_fila_factura(f) for f in facturas])
+        else:
+            with _bloqueo_db():
+                _anexar_csv(facturas, SINCRONIZAR if sincronizar is None else sincronizar)
+    metricas.contar("db.facturas_guardadas", len(facturas))
+
+
+def asignar_y_guardar(
+    facturas: list[Factura],
+    sincronizar: Optional[bool] = None,
+    al_numerar: Optional[Callable[[list[Factura]], None]] = None,
+) -> list[int]:
+    """
+    Asigna a las facturas números consecutivos a partir del siguiente libre y las guarda,
+    todo como una sola operación atómica. Mientras dura, ninguna otra instancia de la
+    aplicación (ni otro hilo) puede leer el último número ni escribir, así que dos
+    instancias que comparten el archivo nunca entregan el mismo número.
+    
+    Args:
+        facturas (list[Factura]): Las facturas a guardar; su 'numero' se sobrescribe.
+        sincronizar (Optional[bool]): Si se fuerza la escritura a disco. Por defecto, SINCRONIZAR.
+        al_numerar (Optional[Callable]): Función que recibe las facturas ya numeradas, antes
+            de escribirlas; por ejemplo, para anotar los números en un diario (ver DiarioLote).
+            Si lanza una excepción, no se guarda nada.
+        
+    Returns:
+        list[int]: Los números asignados, en el mismo orden que las facturas.
+    """
+    if not facturas:
+        return []
+
+    def numerar(primero: int) -> None:
+        for i, factura in enumerate(facturas):
+            factura.numero = primero + i
+        if al_numerar:
+            al_numerar(facturas)
+
+    # Mide el tiempo total, incluida la espera por el bloqueo si otra instancia está escribiendo.
+    with metricas.etapa("db.numeracion_y_guardado"):
+        if BACKEND == "sqlite":
+            # SQLite serializa a los escritores con su propio bloqueo (ver insertar_numerando).
+            def construir_filas(primero: int) -> list[list]:
+                numerar(primero)
+                return [_fila_factura(f) for f in facturas]
+
+            sqlite_store.insertar_numerando(SQLITE_FILE, construir_filas)
+        else:
+            with _bloqueo_db():
+                # Una fila incompleta al final no debe contar al buscar el último número.
+                _reparar_final()
+                numerar(obtener_ultimo_numero() + 1)
+                _anexar_csv(facturas, SINCRONIZAR if sincronizar is None else sincronizar)
+    metricas.contar("db.facturas_guardadas", len(facturas))
+    return [f.numero for f in facturas]
 
 
 def obtener_ultimo_numero() -> int:
     """
-    Lee el archivo CSV para encontrar el número de factura más alto utilizado.
+    Devuelve el número de factura más alto utilizado.
+    Consulta el contador auxiliar (tiempo constante) y solo recorre el CSV
+    cuando el contador no existe o quedó desactualizado. Con el backend segmentado
+    usa el manifiesto y, si hace falta, relee solo el segmento activo.
     
     Returns:
         int: El último número de factura encontrado, o 0 si no hay ninguna.
     """
+    if BACKEND == "sqlite":
+        return sqlite_store.ultimo_numero(SQLITE_FILE)
+    if BACKEND == "segmentado":
+        return segmentos.ultimo_numero(SEGMENTOS_DIR)
+
     # Si el archivo no existe, no hay facturas, por lo que el último número es 0.
     if not os.path.exists(DB_FILE):
         return 0
+
+    # Intenta usar el contador persistido.
+    ultimo = _leer_secuencia()
+    if ultimo is None:
+        # El contador falta o no corresponde al CSV actual: se reconstruye con un único recorrido.
+        metricas.contar("db.escaneos_completos")
+        ultimo = _escanear_ultimo_numero()
+        _escribir_secuencia(ultimo)
+    return ultimo
+
+
+def buscar_factura(numero: int) -> Optional[dict]:
+    """
+    Busca una factura por su número.
+    
+    Args:
+        numero (int): El número de la factura.
+        
+    Returns:
+        Optional[dict]: La fila de la factura (clave: nombre de columna), o None si no existe.
+    """
+    if BACKEND == "sqlite":
+        filas = sqlite_store.consultar(SQLITE_FILE, "numero = ?", (numero,))
+    else:
+        filas = _filtrar_csv(lambda row: int(row[0]) == numero, numeros=(numero,))
+    return _normalizar_fila(filas[0]) if filas else None
+
+
+def buscar_facturas(numeros: Iterable[int]) -> dict[int, dict]:
+    """
+    Busca varias facturas por su número con un solo recorrido del CSV
+    (o una consulta por cada 500 números en SQLite, o solo los segmentos que los contienen).
+    
+    Args:
+        numeros (Iterable[int]): Los números a buscar.
+        
+    Returns:
+        dict[int, dict]: Número -> fila de la factura, solo para las que existen.
+    """
+    buscados = sorted(set(numeros))
+    if not buscados:
+        return {}
+    if BACKEND == "sqlite":
+        filas = []
+        # SQLite limita la cantidad de parámetros por consulta.
+        for i in range(0, len(buscados), 500):
+            parte = buscados[i:i + 500]
+            filas += sqlite_store.consultar(SQLITE_FILE, f"numero IN ({', '.join('?' * len(parte))})", tuple(parte))
+    else:
+        conjunto = set(buscados)
+        filas = _filtrar_csv(lambda row: int(row[0]) in conjunto, numeros=buscados)
+    return {fila["numero"]: fila for fila in map(_normalizar_fila, filas)}
+
+
+def buscar_por_cliente(identificacion: str) -> list[dict]:
+    """
+    Busca todas las facturas emitidas a un cliente.
+    
+    Args:
+        identificacion (str): La identificación del cliente.
+        
+    Returns:
+        list[dict]: Las filas de las facturas encontradas, ordenadas por número.
+    """
+    if BACKEND == "sqlite":
+        filas = sqlite_store.consultar(SQLITE_FILE, "cliente_identificacion = ?", (identificacion,))
+    else:
+        filas = _filtrar_csv(lambda row: row[3] == identificacion, cliente=identificacion)
+    return [_normalizar_fila(f) for f in filas]
+
+
+def buscar_por_fecha(desde: datetime, hasta: datetime) -> list[dict]:
+    """
+    Busca las facturas emitidas dentro de un rango de fechas (ambos extremos incluidos).
+    
+    Args:
+        desde (datetime): Inicio del rango.
+        hasta (datetime): Fin del rango.
+        
+    Returns:
+        list[dict]: Las filas de las facturas encontradas, ordenadas por número.
+    """
+    # El formato guardado ordena igual como texto que como fecha, así que se compara como texto.
+    inicio = desde.strftime(FORMATO_FECHA)
+    fin = hasta.strftime(FORMATO_FECHA)
+    if BACKEND == "sqlite":
+        filas = sqlite_store.consultar(SQLITE_FILE, "fecha_emision BETWEEN ? AND ?", (inicio, fin))
+    else:
+        filas = _filtrar_csv(lambda row: inicio <= row[1] <= fin, fechas=(inicio, fin))
+    return [_normalizar_fila(f) for f in filas]
+
+
+def migrar_csv_a_sqlite() -> int:
+    """
+    Copia las facturas del CSV (DB_FILE) a la base de datos SQLite (SQLITE_FILE).
+    Puede ejecutarse varias veces: las facturas ya migradas se omiten.
+    No cambia el backend activo; para usar la base migrada llame a configurar_backend("sqlite").
+    
+    Returns:
+        int: La cantidad de facturas copiadas.
+    """
+    if not os.path.exists(DB_FILE):
+        return 0
+    return sqlite_store.migrar_desde_csv(SQLITE_FILE, DB_FILE)
+
+
+def migrar_csv_a_segmentos() -> int:
+    """
+    Copia las facturas del CSV (DB_FILE) al libro segmentado (SEGMENTOS_DIR), en el mismo orden.
+    Puede ejecutarse varias veces: las facturas cuyo número ya está en el libro se omiten.
+    No cambia el backend activo; para usar el libro llame a configurar_backend("segmentado").
+    
+    Returns:
+        int: La cantidad de facturas copiadas.
+    """
+    if not os.path.exists(DB_FILE):
+        return 0
+    os.makedirs(SEGMENTOS_DIR, exist_ok=True)
+    copiadas = 0
+    with _bloqueo(segmentos.ruta_manifiesto(SEGMENTOS_DIR)):
+        existentes = {int(row[0]) for row in segmentos.recorrer(SEGMENTOS_DIR)}
+        with open(DB_FILE, mode="r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            # Salta la fila de encabezado.
+            next(reader, None)
+            filas = (row for row in reader if row and row[0] and int(row[0]) not in existentes)
+            while bloque := list(islice(filas, 10000)):
+                segmentos.anexar(SEGMENTOS_DIR, bloque)
+                copiadas += len(bloque)
+    return copiadas
+
+
+def compactar_segmentos() -> int:
+    """
+    Compacta en Parquet los segmentos cerrados del libro segmentado (ver segmentos.compactar).
+    Los totales precalculados no cambian, porque las facturas son las mismas.
+    
+    Returns:
+        int: La cantidad de segmentos compactados.
+        
+    Raises:
+        ValueError: Si el backend activo no es "segmentado".
+        ImportError: Si el paquete 'pyarrow' no está instalado.
+    """
+    if BACKEND != "segmentado":
+        raise ValueError("Solo el backend 'segmentado' tiene segmentos que compactar.")
+    with _bloqueo_db():
+        return segmentos.compactar(SEGMENTOS_DIR)
+
+
+def total_por_cliente(identificacion: str, desde_mes: str = "0000-00", hasta_mes: str = "9999-99") -> tuple[int, int]:
+    """
+    Consulta lo facturado a un cliente en un rango de meses usando los totales precalculados,
+    sin recorrer las facturas.
+    
+    Args:
+        identificacion (str): La identificación del cliente.
+        desde_mes (str): Primer mes del rango, en formato "AAAA-MM".
+        hasta_mes (str): Último mes del rango, en formato "AAAA-MM".
+        
+    Returns:
+        tuple[int, int]: Cantidad de facturas y total en centavos.
+    """
+    return agregados.total_cliente(_conexion_agregados(), identificacion, desde_mes, hasta_mes)
+
+
+def totales_por_dia(desde: Optional[date], hasta: Optional[date]) -> list[tuple[str, int, int]]:
+    """
+    Consulta la cantidad de facturas y lo facturado en cada día de un rango (ambos extremos incluidos).
+    Los días sin facturas no aparecen.
+    
+    Args:
+        desde (Optional[date]): Primer día del rango. Si es None, desde el principio.
+        hasta (Optional[date]): Último día del rango. Si es None, hasta el final.
+        
+    Returns:
+        list[tuple[str, int, int]]: (día "AAAA-MM-DD", facturas, total en centavos), en orden.
+    """
+    return agregados.por_periodo(
+        _conexion_agregados(),
+        "dia",
+        f"{desde:%Y-%m-%d}" if desde else "0000-00-00",
+        f"{hasta:%Y-%m-%d}" if hasta else "9999-99-99",
+    )
+
+
+def totales_por_mes(desde: Optional[date], hasta: Optional[date]) -> list[tuple[str, int, int]]:
+    """
+    Consulta la cantidad de facturas y lo facturado en cada mes de un rango (ambos extremos incluidos).
+    Solo cuentan el año y el mes de las fechas indicadas.
+    
+    Args:
+        desde (Optional[date]): Una fecha del primer mes del rango. Si es None, desde el principio.
+        hasta (Optional[date]): Una fecha del último mes del rango. Si es None, hasta el final.
+        
+    Returns:
+        list[tuple[str, int, int]]: (mes "AAAA-MM", facturas, total en centavos), en orden.
+    """
+    return agregados.por_periodo(
+        _conexion_agregados(),
+        "mes",
+        f"{desde:%Y-%m}" if desde else "0000-00",
+        f"{hasta:%Y-%m}" if hasta else "9999-99",
+    )
+
+
+def reconstruir_agregados() -> None:
+    """
+    Recalcula los totales precalculados por cliente, día y mes, y el registro de
+    clientes, con un recorrido completo de las facturas. Se usa automáticamente cuando el índice quedó
+    desactualizado (por ejemplo, si el CSV se editó a mano).
+    """
+    if BACKEND == "sqlite":
+        sqlite_store.reconstruir_agregados(SQLITE_FILE)
+        return
+
+    # El bloqueo impide que otra instancia agregue filas mientras se recorre el CSV.
+    with _bloqueo_db():
+        conexion = agregados.conectar(_ruta_agregados())
+        with conexion:
+            marca = _marca_csv()
+            agregados.vaciar(conexion)
+            clientes.vaciar(conexion)
+            filas = _recorrer_filas()
+            # Se procesa por bloques para que la memoria no dependa del tamaño del CSV.
+            while bloque := list(islice(filas, 10000)):
+                agregados.registrar(conexion, ((row[1], row[3], dinero.a_centavos(float(row[7]))) for row in bloque))
+                clientes.registrar(conexion, ((int(row[0]), row[3], row[2], row[4], row[5]) for row in bloque))
+            agregados.guardar_marca(conexion, marca)
+
+
+def cargar_clientes() -> list[Cliente]:
+    """
+    Devuelve todos los clientes registrados, cada uno una sola vez y con los datos
+    de su factura más reciente. Usa el registro de clientes, sin recorrer las facturas.
+    
+    Returns:
+        list[Cliente]: Los clientes registrados.
+    """
+    return list(clientes.todos(_conexion_agregados()))
+
+
+def buscar_cliente(identificacion: str) -> Optional[Cliente]:
+    """
+    Busca un cliente registrado por su identificación.
+    
+    Args:
+        identificacion (str): La identificación del cliente.
+        
+    Returns:
+        Optional[Cliente]: Los datos más recientes del cliente, o None si no facturó nunca.
+    """
+    return clientes.obtener(_conexion_agregados(), identificacion)
+
+
+def cargar_factura(numero: int) -> Optional[Factura]:
+    """
+    Reconstruye una factura guardada a partir de su número.
+    
+    Args:
+        numero (int): El número de la factura.
+        
+    Returns:
+        Optional[Factura]: La factura con su cliente y productos, o None si no existe.
+    """
+    fila = buscar_factura(numero)
+    return fila_a_factura(fila) if fila else None
+
+
+def cargar_facturas() -> Iterator[Factura]:
+    """
+    Recorre todas las facturas guardadas y las devuelve como objetos Factura.
+    Es un generador: lee una fila a la vez, sin cargar el archivo completo en memoria.
     
-    # Abre el archivo en modo lectura ('r').
+    Yields:
+        Factura: Cada factura guardada, en el orden en que se registró.
+    """
+    if BACKEND == "sqlite":
+        for valores in sqlite_store.recorrer(SQLITE_FILE):
+            yield fila_a_factura(_normalizar_fila(valores))
+        return
+
+    for row in _recorrer_filas():
+        yield fila_a_factura(_normalizar_fila(row))
+
+
+def leer_facturas_por_lotes(tamano_lote: int = 10000) -> Iterator[list[Factura]]:
+    """
+    Recorre las facturas guardadas en lotes de tamaño fijo.
+    Solo un lote está en memoria a la vez, por lo que sirve para procesar
+    archivos de cualquier tamaño.
+    
+    Args:
+        tamano_lote (int): Cantidad máxima de facturas por lote.
+        
+    Yields:
+        list[Factura]: Cada lote de facturas, en el orden en que se registraron.
+    """
+    facturas = cargar_facturas()
+    while True:
+        lote = list(islice(facturas, tamano_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def fila_a_factura(fila: dict) -> Factura:
+    """
+    Convierte una fila normalizada (ver buscar_factura) en un objeto Factura.
+    
+    Args:
+        fila (dict): La fila con los valores de la factura.
+        
+    Returns:
+        Factura: La factura reconstruida.
+    """
+    cliente = Cliente(
+        nombre=fila["cliente_nombre"],
+        identificacion=fila["cliente_identificacion"],
+        direccion=fila["cliente_direccion"],
+        telefono=fila["cliente_telefono"],
+    )
+    return Factura(
+        numero=fila["numero"],
+        cliente=cliente,
+        productos=Productos(decodificar_productos(fila["productos"])),
+        # El formato guardado es compatible con ISO 8601, que se interpreta sin strptime.
+        fecha_emision=datetime.fromisoformat(fila["fecha_emision"]),
+    )
+
+
+def codificar_productos(productos) -> str:
+    """
+    Codifica los productos de una factura como una lista JSON compacta.
+    A diferencia del antiguo formato "desc xN @ precio", admite cualquier
+    carácter en la descripción y se decodifica sin analizar texto libre.
+    
+    Args:
+        productos: Los productos de la factura.
+        
+    Returns:
+        str: La lista JSON de [descripcion, cantidad, precio_unitario].
+    """
+    return json.dumps(
+        [[p.descripcion, p.cantidad, p.precio_unitario] for p in productos],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def decodificar_productos(texto: str) -> list[Producto]:
+    """
+    Reconstruye la lista de productos guardada en la columna 'productos'.
+    Acepta tanto el formato JSON actual como el formato de texto de versiones anteriores.
+    
+    Args:
+        texto (str): El valor de la columna 'productos'.
+        
+    Returns:
+        list[Producto]: Los productos de la factura.
+    """
+    if texto.startswith("["):
+        try:
+            return [Producto(d, c, p) for d, c, p in json.loads(texto)]
+        except (ValueError, TypeError):
+            # Una descripción antigua que empieza con '[' no es JSON; se trata como texto.
+            pass
+    return _decodificar_productos_texto(texto)
+
+
+def _decodificar_productos_texto(texto: str) -> list[Producto]:
+    """
+    Interpreta el formato de texto anterior: "desc xN @ precio; desc xN @ precio".
+    Es un análisis de mejor esfuerzo, ya que ese formato no escapaba los separadores.
+    
+    Args:
+        texto (str): El valor de la columna 'productos' en formato de texto.
+        
+    Returns:
+        list[Producto]: Los productos que se pudieron interpretar.
+    """
+    productos = []
+    for parte in texto.split("; ") if texto else []:
+        # Se separa desde la derecha para tolerar " x" o " @ " dentro de la descripción.
+        resto, _, precio = parte.rpartition(" @ ")
+        descripcion, _, cantidad = resto.rpartition(" x")
+        productos.append(Producto(descripcion, int(cantidad), float(precio)))
+    return productos
+
+
+def _fila_factura(factura: Factura) -> list:
+    """
+    Prepara la lista de valores de una factura en el orden de COLUMNAS.
+    
+    Args:
+        factura (Factura): La factura a convertir.
+        
+    Returns:
+        list: Los valores de la fila.
+    """
+    return [
+        factura.numero,
+        factura.fecha_emision.strftime(FORMATO_FECHA),
+        factura.cliente.nombre,
+        factura.cliente.identificacion,
+        factura.cliente.direccion,
+        factura.cliente.telefono,
+        # Serializa los productos como una lista JSON de [descripcion, cantidad, precio_unitario].
+        codificar_productos(factura.productos),
+        f"{factura.total:.2f}"
+    ]
+
+
+def _normalizar_fila(valores) -> dict:
+    """
+    Convierte una fila (del CSV o de SQLite) en un diccionario con tipos homogéneos.
+    
+    Args:
+        valores: Los valores de la fila en el orden de COLUMNAS.
+        
+    Returns:
+        dict: La fila con 'numero' como int, 'total' como float y el resto como texto.
+    """
+    fila = dict(zip(COLUMNAS, valores))
+    fila["numero"] = int(fila["numero"])
+    fila["total"] = float(fila["total"])
+    # Una factura sin nombre de cliente lo referencia por su identificación (ver CLIENTES_POR_REFERENCIA).
+    if not fila["cliente_nombre"]:
+        _completar_cliente(fila)
+    return fila
+
+
+def _filtrar_csv(condicion, **poda) -> list[list[str]]:
+    """
+    Recorre el CSV y devuelve las filas que cumplen una condición.
+    Es la alternativa lineal del backend CSV a las consultas indexadas de SQLite.
+    
+    Args:
+        condicion: Función que recibe la fila (lista de cadenas) y devuelve un bool.
+        **poda: Números, fechas o cliente buscados, con los que el backend segmentado
+            descarta segmentos sin abrirlos (ver _recorrer_filas).
+        
+    Returns:
+        list[list[str]]: Las filas que cumplen la condición.
+    """
+    return [row for row in _recorrer_filas(**poda) if condicion(row)]
+
+
+def _recorrer_filas(
+    numeros: Optional[Iterable[int]] = None,
+    fechas: Optional[tuple[str, str]] = None,
+    cliente: Optional[str] = None,
+) -> Iterator[list[str]]:
+    """
+    Recorre las filas guardadas del backend CSV o segmentado, sin el encabezado.
+    En el CSV único se ignoran los filtros; en el libro segmentado solo se leen
+    los segmentos que pueden contener las facturas buscadas.
+    
+    Args:
+        numeros (Optional[Iterable[int]]): Números de factura buscados.
+        fechas (Optional[tuple[str, str]]): Rango de fechas buscado, en FORMATO_FECHA.
+        cliente (Optional[str]): Identificación del cliente buscado.
+        
+    Yields:
+        list[str]: Cada fila, en el orden de COLUMNAS.
+    """
+    if BACKEND == "segmentado":
+        yield from segmentos.recorrer(SEGMENTOS_DIR, numeros, fechas, cliente)
+        return
+    if not os.path.exists(DB_FILE):
+        return
+    with open(DB_FILE, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        # Salta la fila de encabezado.
+        next(reader, None)
+        for row in reader:
+            if row and row[0]:
+                yield row
+
+
+def _bloqueo_db() -> BloqueoArchivo:
+    """Devuelve el bloqueo entre procesos del almacenamiento actual (DB_FILE o el libro segmentado)."""
+    if BACKEND == "segmentado":
+        # El archivo de bloqueo se crea junto al manifiesto, así que el directorio debe existir.
+        os.makedirs(SEGMENTOS_DIR, exist_ok=True)
+        return _bloqueo(segmentos.ruta_manifiesto(SEGMENTOS_DIR))
+    return _bloqueo(DB_FILE)
+
+
+def _bloqueo(ruta: str) -> BloqueoArchivo:
+    """Devuelve el bloqueo entre procesos de un archivo, creado una sola vez por proceso."""
+    bloqueo = _bloqueos.get(ruta)
+    if bloqueo is None:
+        bloqueo = _bloqueos[ruta] = BloqueoArchivo(ruta)
+    return bloqueo
+
+
+def _anexar_csv(facturas: list[Factura], sincronizar: bool) -> None:
+    """
+    Añade las filas de las facturas al CSV (o al segmento activo) y actualiza el contador
+    y los totales precalculados. Debe llamarse con el bloqueo del CSV tomado.
+    
+    Args:
+        facturas (list[Factura]): Las facturas a guardar, ya numeradas.
+        sincronizar (bool): Si es True, fuerza los datos a disco antes de actualizar el contador.
+    """
+    _reparar_final()
+    # Consulta el último número antes de escribir, mientras el contador sigue siendo válido.
+    ultimo = obtener_ultimo_numero()
+    # Los totales precalculados solo se actualizan si estaban al día con el CSV;
+    # si no, se reconstruyen completos en la próxima consulta.
+    conexion = agregados.conectar(_ruta_agregados())
+    tamano_previo = _marca_csv()
+    agregados_al_dia = agregados.leer_marca(conexion) == tamano_previo
+    if CLIENTES_POR_REFERENCIA and not agregados_al_dia:
+        # Para referenciar clientes, el registro tiene que estar al día: se reconstruye ahora.
+        reconstruir_agregados()
+        agregados_al_dia = True
+
+    filas = [_fila_factura(factura) for factura in facturas]
+    # Solo se puede referenciar a los clientes si el registro está al día con el CSV.
+    if CLIENTES_POR_REFERENCIA and agregados_al_dia:
+        _referenciar_clientes(conexion, filas)
+
+    if BACKEND == "segmentado":
+        # El libro segmentado lleva el último número en su manifiesto, que se actualiza al escribir.
+        with metricas.etapa("db.escritura_csv"):
+            segmentos.anexar(SEGMENTOS_DIR, filas, sincronizar)
+    else:
+        # Abre el archivo en modo 'append' ('a') para añadir datos sin sobreescribir.
+        with open(DB_FILE, mode="a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            with metricas.etapa("db.escritura_csv"):
+                writer.writerows(filas)
+            if sincronizar:
+                with metricas.etapa("db.fsync"):
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        if metricas.ACTIVO:
+            metricas.contar("db.bytes_escritos", int(_marca_csv()) - int(tamano_previo))
+
+        # Actualiza el contador con el nuevo tamaño del CSV para mantenerlos consistentes.
+        _escribir_secuencia(max(ultimo, max(int(f.numero) for f in facturas)))
+
+    if agregados_al_dia:
+        with conexion:
+            agregados.registrar(
+                conexion,
+                ((f.fecha_emision.strftime(FORMATO_FECHA), f.cliente.identificacion, f.total_centavos) for f in facturas),
+            )
+            clientes.registrar(conexion, ((int(f[0]), f[3], f[2], f[4], f[5]) for f in filas))
+            agregados.guardar_marca(conexion, _marca_csv())
+
+
+def _referenciar_clientes(conexion, filas: list[list]) -> None:
+    """
+    Vacía el nombre, la dirección y el teléfono de las filas cuyo cliente ya está
+    registrado con esos mismos datos (ver CLIENTES_POR_REFERENCIA).
+    
+    Args:
+        conexion (sqlite3.Connection): Conexión con el registro de clientes, al día con el CSV.
+        filas (list[list]): Las filas a escribir, en el orden de COLUMNAS; se modifican.
+    """
+    # Datos vigentes de cada cliente, incluidos los que se escriben en este mismo bloque.
+    vigentes: dict[str, Optional[tuple[str, str, str]]] = {}
+    for fila in filas:
+        identificacion = fila[3]
+        if identificacion not in vigentes:
+            cliente = clientes.obtener(conexion, identificacion)
+            vigentes[identificacion] = (cliente.nombre, cliente.direccion, cliente.telefono) if cliente else None
+        datos = (fila[2], fila[4], fila[5])
+        if vigentes[identificacion] == datos:
+            fila[2] = fila[4] = fila[5] = ""
+        else:
+            vigentes[identificacion] = datos
+
+
+def _completar_cliente(fila: dict) -> None:
+    """
+    Completa los datos de una fila que referencia al cliente solo por su identificación,
+    con los datos que el cliente tenía al emitirse esa factura.
+    
+    Args:
+        fila (dict): La fila normalizada; se modifica.
+    """
+    cliente = clientes.obtener(_conexion_agregados(), fila["cliente_identificacion"], fila["numero"])
+    if cliente is not None:
+        fila["cliente_nombre"] = cliente.nombre
+        fila["cliente_direccion"] = cliente.direccion
+        fila["cliente_telefono"] = cliente.telefono
+
+
+def _reparar_final() -> None:
+    """
+    Descarta una fila incompleta al final del CSV, que solo puede quedar si la
+    aplicación se cerró a mitad de una escritura. Las filas completas siempre
+    terminan en salto de línea, así que basta con revisar el último byte.
+    En el libro segmentado solo puede quedar en el segmento activo.
+    """
+    ruta = segmentos.ruta_activa(SEGMENTOS_DIR) if BACKEND == "segmentado" else DB_FILE
+    if ruta is None or not os.path.exists(ruta):
+        return
+    with open(ruta, mode="rb+") as f:
+        fin = f.seek(0, os.SEEK_END)
+        if fin == 0:
+            return
+        f.seek(fin - 1)
+        if f.read(1) == b"\n":
+            return
+        # Retrocede por bloques hasta el último salto de línea y corta el archivo ahí.
+        posicion = fin
+        while posicion > 0:
+            inicio = max(0, posicion - 65536)
+            f.seek(inicio)
+            salto = f.read(posicion - inicio).rfind(b"\n")
+            if salto != -1:
+                f.truncate(inicio + salto + 1)
+                return
+            posicion = inicio
+
+
+def _conexion_agregados():
+    """
+    Devuelve la conexión con los totales precalculados del backend activo,
+    reconstruyéndolos antes si no corresponden al CSV actual.
+    
+    Returns:
+        sqlite3.Connection: La conexión con el esquema de agregados.
+    """
+    if BACKEND == "sqlite":
+        return sqlite_store.conectar(SQLITE_FILE)
+    conexion = agregados.conectar(_ruta_agregados())
+    if agregados.leer_marca(conexion) != _marca_csv():
+        reconstruir_agregados()
+    return conexion
+
+
+def _ruta_agregados() -> str:
+    """Devuelve el archivo de totales precalculados del backend CSV o segmentado."""
+    if BACKEND == "segmentado":
+        os.makedirs(SEGMENTOS_DIR, exist_ok=True)
+        return os.path.join(SEGMENTOS_DIR, AGREGADOS_FILE)
+    return AGREGADOS_FILE
+
+
+def _marca_csv() -> str:
+    """
+    Identifica el estado del CSV por su tamaño en bytes, igual que el contador auxiliar.
+    Como el CSV solo crece al agregar facturas, un tamaño distinto indica cambios externos.
+    En el libro segmentado, la marca la da el manifiesto (ver segmentos.marca).
+    """
+    if BACKEND == "segmentado":
+        return segmentos.marca(SEGMENTOS_DIR)
+    return str(os.path.getsize(DB_FILE)) if os.path.exists(DB_FILE) else "0"
+
+
+def _ruta_secuencia() -> str:
+    """Devuelve la ruta del archivo contador asociado a DB_FILE."""
+    return DB_FILE + SEQ_SUFFIX
+
+
+def _leer_secuencia() -> Optional[int]:
+    """
+    Lee el contador auxiliar y comprueba que siga siendo válido.
+    El contador guarda el tamaño en bytes del CSV en el momento de escribirse;
+    si el CSV cambió por fuera (edición manual, otra copia), se descarta.
+    
+    Returns:
+        Optional[int]: El último número guardado, o None si falta o está desactualizado.
+    """
+    try:
+        with open(_ruta_secuencia(), mode="r", encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("tamano_db") != os.path.getsize(DB_FILE):
+            return None
+        return int(datos["ultimo_numero"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # Un contador ilegible se trata igual que uno inexistente.
+        return None
+
+
+def _escribir_secuencia(ultimo: int) -> None:
+    """
+    Guarda el último número asignado junto con el tamaño actual del CSV.
+    Escribe primero en un archivo temporal y lo reemplaza de forma atómica
+    para que un cierre inesperado nunca deje un contador a medio escribir.
+    
+    Args:
+        ultimo (int): El número de factura más alto registrado en el CSV.
+    """
+    ruta = _ruta_secuencia()
+    temporal = ruta + ".tmp"
+    with open(temporal, mode="w", encoding="utf-8") as f:
+        json.dump({"ultimo_numero": ultimo, "tamano_db": os.path.getsize(DB_FILE)}, f)
+    os.replace(temporal, ruta)
+
+
+def _escanear_ultimo_numero() -> int:
+    """
+    Recorre el CSV una sola vez para encontrar el número de factura más alto.
+    Solo se usa para reconstruir el contador auxiliar.
+    
+    Returns:
+        int: El último número de factura encontrado, o 0 si no hay ninguna.
+    """
+    ultimo = 0
     with open(DB_FILE, mode="r", newline="", encoding="utf-8") as f:
-        # Usa DictReader para leer las filas como diccionarios (clave: nombre de columna).
-        reader = csv.DictReader(f)
-        # Crea una lista de todos los números de factura, convirtiéndolos a enteros.
-        numeros = [int(row["numero"]) for row in reader if row.get("numero")]
-        # Devuelve el número más alto de la lista, o 0 si la lista está vacía.
-        return max(numeros) if numeros else 0
\ No newline at end of file
+        reader = csv.reader(f)
+        # Salta la fila de encabezado.
+        next(reader, None)
+        # Compara fila por fila sin construir una lista con todos los números.
+        for row in reader:
+            if row and row[0]:
+                ultimo = max(ultimo, int(row[0]))
+    return ultimo
@@ -0,0 +1,143 @@
+# src/db/grupo_commit.py
+# Este módulo implementa el guardado agrupado ("group commit") de facturas.
+# Cuando varias facturas llegan casi al mismo tiempo (por ejemplo, desde varios
+# hilos), se acumulan y se guardan juntas con una sola escritura y un solo fsync,
+# en lugar de pagar una escritura forzada a disco por cada una.
+
+import time
+import threading
+from concurrent.futures import Future
+from src.db import database
+from src.db.models import Factura
+
+
+class GrupoCommit:
+    """
+    Acumula facturas y las guarda juntas cuando se reúnen 'max_facturas' o cuando
+    la más antigua lleva 'max_espera_ms' milisegundos esperando, lo que ocurra primero.
+    Cada escritura se fuerza a disco, así que una factura se considera guardada
+    (y su Future se completa) solo cuando ya es durable. Las escrituras las hace un
+    hilo propio: mientras se guarda un grupo, se siguen encolando facturas para el siguiente.
+
+    Uso:
+        with GrupoCommit() as grupo:
+            numero = grupo.agregar(factura).result()
+    """
+
+    def __init__(self, max_facturas: int = 100, max_espera_ms: float = 20.0, numerar: bool = True):
+        """
+        Args:
+            max_facturas (int): Cantidad de facturas que dispara una escritura inmediata.
+            max_espera_ms (float): Tiempo máximo que una factura espera a ser escrita.
+            numerar (bool): Si es True, los números se asignan al guardar (ver
+                database.asignar_y_guardar); si es False, se respetan los que ya tienen.
+        """
+        self.max_facturas = max_facturas
+        self.max_espera = max_espera_ms / 1000
+        self.numerar = numerar
+        self._pendientes: list[tuple[Factura, Future]] = []
+        # Momento en que llegó la factura pendiente más antigua.
+        self._desde = 0.0
+        # Protege las facturas pendientes; no se retiene durante la escritura.
+        self._condicion = threading.Condition()
+        # Serializa las escrituras para que los grupos se guarden en el orden en que se formaron.
+        self._escritura = threading.Lock()
+        self._cerrado = False
+        # Hilo que escribe cada grupo cuando se llena o cuando la factura más antigua esperó demasiado.
+        self._hilo = threading.Thread(target=self._vigilar, name="GrupoCommit", daemon=True)
+        self._hilo.start()
+
+    def agregar(self, factura: Factura) -> "Future[int]":
+        """
+        Encola una factura para guardarla en la próxima escritura del grupo.
+
+        Args:
+            factura (Factura): La factura a guardar.
+
+        Returns:
+            Future[int]: Se completa con el número de la factura cuando ya está en disco,
+            o con la excepción si la escritura falló.
+
+        Raises:
+            RuntimeError: Si el grupo ya fue cerrado.
+        """
+        futuro: Future = Future()
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El grupo de guardado ya está cerrado.")
+            if not self._pendientes:
+                self._desde = time.monotonic()
+            self._pendientes.append((factura, futuro))
+            if len(self._pendientes) == 1 or len(self._pendientes) >= self.max_facturas:
+                # Despierta al vigilante: para que empiece a contar el tiempo de espera,
+                # o para que escriba ya el grupo lleno. Quien encola no espera la escritura.
+                self._condicion.notify()
+        return futuro
+
+    def vaciar(self) -> None:
+        """Guarda de inmediato todas las facturas pendientes."""
+        self._escribir()
+
+    def cerrar(self) -> None:
+        """Detiene el hilo vigilante y guarda las facturas pendientes."""
+        with self._condicion:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._condicion.notify()
+        # El vigilante termina la escritura que tenga en curso; lo que quede se guarda aquí.
+        self._hilo.join()
+        self._escribir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def _vigilar(self) -> None:
+        """Escribe las facturas pendientes cuando se reúne un grupo o la más antigua alcanza el tiempo máximo de espera."""
+        while True:
+            with self._condicion:
+                while True:
+                    if self._cerrado:
+                        return
+                    if len(self._pendientes) >= self.max_facturas:
+                        break
+                    if not self._pendientes:
+                        self._condicion.wait()
+                        continue
+                    restante = self._desde + self.max_espera - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+            # Se escribe fuera de la condición, para que agregar() no quede esperando el fsync.
+            self._escribir()
+
+    def _escribir(self) -> None:
+        """
+        Guarda todas las facturas pendientes con una sola escritura forzada a disco.
+        Debe llamarse sin la condición tomada.
+        """
+        with self._escritura:
+            # Las facturas se retiran con la escritura ya tomada: así los grupos se guardan en orden.
+            with self._condicion:
+                lote, self._pendientes = self._pendientes, []
+            if lote:
+                self._guardar(lote)
+
+    def _guardar(self, lote: list[tuple[Factura, Future]]) -> None:
+        """Guarda un grupo de facturas y completa sus Future con el número o con el error."""
+        facturas = [factura for factura, _ in lote]
+        try:
+            if self.numerar:
+                database.asignar_y_guardar(facturas, sincronizar=True)
+            else:
+                database.guardar_facturas(facturas, sincronizar=True)
+        except Exception as e:
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for factura, futuro in lote:
+            futuro.set_result(factura.numero)
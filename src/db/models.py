@@ -2,11 +2,16 @@
 # Este módulo define las clases de datos (modelos) que representan las entidades
 # principales de la aplicación, como Cliente, Producto y Factura.
 
-from typing import List, Optional
+from collections.abc import MutableSequence
+from typing import Iterable, List, Optional
 from datetime import datetime
+from src.utils import dinero
 
 class Cliente:
     """Representa a un cliente con su información de contacto."""
+    # __slots__ evita el diccionario por instancia y reduce la memoria de cada objeto.
+    __slots__ = ("nombre", "identificacion", "direccion", "telefono")
+
     def __init__(self, nombre: str, identificacion: str, direccion: str, telefono: str):
         """
         Inicializa un objeto Cliente.
@@ -24,7 +29,13 @@ class Cliente:
 
 
 class Producto:
-    """Representa un item (producto o servicio) en una factura."""
+    """
+    Representa un item (producto o servicio) en una factura.
+    La cantidad y el precio unitario se pueden cambiar; el subtotal se recalcula con
+    cada cambio, y las colecciones Productos que contienen al producto actualizan su total.
+    """
+    __slots__ = ("descripcion", "_cantidad", "_precio_unitario", "_subtotal_centavos", "_colecciones")
+
     def __init__(self, descripcion: str, cantidad: int, precio_unitario: float):
         """
         Inicializa un objeto Producto.
@@ -35,14 +46,177 @@ class Producto:
             precio_unitario (float): Costo por unidad.
         """
         self.descripcion = descripcion
-        self.cantidad = cantidad
-        self.precio_unitario = precio_unitario
-        # El subtotal se calcula automáticamente al crear el producto.
-        self.subtotal = round(cantidad * precio_unitario, 2)
+        self._cantidad = cantidad
+        self._precio_unitario = precio_unitario
+        # El subtotal se calcula automáticamente al crear el producto,
+        # en centavos enteros para que las sumas de muchos productos sean exactas.
+        self._subtotal_centavos = dinero.subtotal_centavos(cantidad, precio_unitario)
+        # Colecciones Productos que contienen este producto (una vez por aparición), o None.
+        self._colecciones = None
+
+    @property
+    def cantidad(self):
+        """Número de unidades."""
+        return self._cantidad
+
+    @cantidad.setter
+    def cantidad(self, cantidad) -> None:
+        self._cantidad = cantidad
+        self._recalcular()
+
+    @property
+    def precio_unitario(self) -> float:
+        """Costo por unidad."""
+        return self._precio_unitario
+
+    @precio_unitario.setter
+    def precio_unitario(self, precio_unitario: float) -> None:
+        self._precio_unitario = precio_unitario
+        self._recalcular()
+
+    @property
+    def subtotal_centavos(self) -> int:
+        """Subtotal exacto del producto, en centavos."""
+        return self._subtotal_centavos
+
+    @property
+    def subtotal(self) -> float:
+        """Subtotal del producto (cantidad por precio unitario), redondeado al centavo."""
+        return dinero.a_unidades(self._subtotal_centavos)
+
+    def __reduce__(self):
+        # pickle y copy reconstruyen el producto con el constructor, sin las colecciones que lo contienen.
+        return (Producto, (self.descripcion, self._cantidad, self._precio_unitario))
+
+    def _recalcular(self) -> None:
+        """Recalcula el subtotal y traslada la diferencia al total de las colecciones que lo contienen."""
+        anterior = self._subtotal_centavos
+        self._subtotal_centavos = dinero.subtotal_centavos(self._cantidad, self._precio_unitario)
+        if self._colecciones:
+            for coleccion in self._colecciones:
+                coleccion._total += self._subtotal_centavos - anterior
+
+
+class Productos(MutableSequence):
+    """
+    Colección de los productos de una factura que mantiene la suma de los subtotales
+    al día con cada producto que se agrega, reemplaza o quita, y con cada cambio de
+    cantidad o precio de un producto que contiene, sin volver a sumarlos.
+    Se comporta como una lista de Producto y guarda los mismos objetos que recibe.
+    """
+    __slots__ = ("_productos", "_total")
+
+    def __init__(self, productos: Iterable[Producto] = ()):
+        """
+        Inicializa la colección.
+        
+        Args:
+            productos (Iterable[Producto]): Productos iniciales, en orden.
+        """
+        self._productos: list[Producto] = []
+        # Suma de los subtotales en centavos; se actualiza en cada cambio.
+        self._total = 0
+        self.extend(productos)
+
+    @property
+    def total_centavos(self) -> int:
+        """Suma exacta de los subtotales de todos los productos, en centavos."""
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._productos)
+
+    def __getitem__(self, indice):
+        return self._productos[indice]
+
+    def __iter__(self):
+        return iter(self._productos)
+
+    def __reduce__(self):
+        # Al reconstruirla (por ejemplo, en otro proceso) los productos vuelven a registrarse en la colección.
+        return (Productos, (self._productos,))
+
+    def descripcion(self, indice: int) -> str:
+        """Descripción del producto en una posición."""
+        return self._productos[indice].descripcion
+
+    def cantidad(self, indice: int) -> int:
+        """Cantidad del producto en una posición."""
+        return self._productos[indice].cantidad
+
+    def precio_unitario(self, indice: int) -> float:
+        """Precio unitario del producto en una posición."""
+        return self._productos[indice].precio_unitario
+
+    def subtotal_centavos(self, indice: int) -> int:
+        """Subtotal en centavos del producto en una posición, sin recalcularlo."""
+        return self._productos[indice].subtotal_centavos
+
+    def __setitem__(self, indice, producto) -> None:
+        if isinstance(indice, slice):
+            self._asignar_tramo(indice, list(producto))
+            return
+        self._soltar(self._productos[indice])
+        self._productos[indice] = producto
+        self._tomar(producto)
+
+    def __delitem__(self, indice) -> None:
+        if isinstance(indice, slice):
+            for producto in self._productos[indice]:
+                self._soltar(producto)
+        else:
+            self._soltar(self._productos[indice])
+        del self._productos[indice]
+
+    def insert(self, indice: int, producto: Producto) -> None:
+        """Inserta un producto en la posición indicada."""
+        self._productos.insert(indice, producto)
+        self._tomar(producto)
+
+    def append(self, producto: Producto) -> None:
+        """Agrega un producto al final y suma su subtotal al total."""
+        self._productos.append(producto)
+        self._tomar(producto)
+
+    def extend(self, productos: Iterable[Producto]) -> None:
+        """Agrega varios productos al final."""
+        for producto in productos:
+            self.append(producto)
+
+    def _asignar_tramo(self, tramo: slice, productos: list[Producto]) -> None:
+        """Reemplaza un tramo (productos[a:b] = ...), con las mismas reglas que una lista."""
+        inicio, fin, paso = tramo.indices(len(self))
+        if paso == 1:
+            # Un tramo simple puede cambiar de tamaño: se quita y se insertan los nuevos.
+            del self[inicio:max(inicio, fin)]
+            for desplazamiento, producto in enumerate(productos):
+                self.insert(inicio + desplazamiento, producto)
+            return
+        posiciones = range(inicio, fin, paso)
+        if len(posiciones) != len(productos):
+            raise ValueError(
+                f"attempt to assign sequence of size {len(productos)} to extended slice of size {len(posiciones)}"
+            )
+        for posicion, producto in zip(posiciones, productos):
+            self[posicion] = producto
+
+    def _tomar(self, producto: Producto) -> None:
+        """Suma un producto que entra a la colección y lo registra para seguir sus cambios."""
+        if producto._colecciones is None:
+            producto._colecciones = []
+        producto._colecciones.append(self)
+        self._total += producto.subtotal_centavos
+
+    def _soltar(self, producto: Producto) -> None:
+        """Resta un producto que sale de la colección y deja de seguir sus cambios."""
+        producto._colecciones.remove(self)
+        self._total -= producto.subtotal_centavos
 
 
 class Factura:
     """Representa una factura completa, asociando un cliente y una lista de productos."""
+    __slots__ = ("numero", "fecha_emision", "cliente", "_productos")
+
     def __init__(self, numero: int, cliente: Cliente, productos: List[Producto], fecha_emision: Optional[datetime] = None):
         """
         Inicializa un objeto Factura.
@@ -50,7 +224,12 @@ class Factura:
         Args:
             numero (int): Número identificador único de la factura.
             cliente (Cliente): El cliente al que se le emite la factura.
-            productos (List[Producto]): Lista de productos incluidos en la factura.
+            productos (List[Producto]): Lista de productos incluidos en la factura. Una lista o
+                tupla se guarda en una colección Productos con los mismos objetos Producto, que
+                lleva el total al día (también si luego cambia la cantidad o el precio de uno);
+                los productos que se agreguen o quiten después se agregan o quitan en
+                factura.productos. Otros iterables (por ejemplo, un generador para facturas
+                muy grandes) se conservan tal cual para recorrerlos una vez.
             fecha_emision (Optional[datetime]): Fecha de emisión. Si es None, se usa la fecha y hora actual.
         """
         self.numero = numero
@@ -59,6 +238,32 @@ class Factura:
         self.cliente = cliente
         self.productos = productos
 
+    @property
+    def productos(self):
+        """Los productos de la factura."""
+        return self._productos
+
+    @productos.setter
+    def productos(self, productos) -> None:
+        # Las listas y tuplas pasan a una colección Productos para que el total no se
+        # vuelva a sumar en cada consulta; un generador se conserva para recorrerlo una vez.
+        if isinstance(productos, (list, tuple)):
+            productos = Productos(productos)
+        self._productos = productos
+
+    @property
+    def total_centavos(self) -> int:
+        """
+        Calcula el monto total exacto de la factura, en centavos.
+        Con una colección Productos la suma ya está calculada y no se recorren los productos.
+        
+        Returns:
+            int: La suma de los subtotales de todos los productos, en centavos.
+        """
+        if isinstance(self._productos, Productos):
+            return self._productos.total_centavos
+        return sum(p.subtotal_centavos for p in self._productos)
+
     @property
     def total(self) -> float:
         """
@@ -68,4 +273,4 @@ class Factura:
         Returns:
             float: El total de la factura, redondeado a dos decimales.
         """
-        return round(sum(p.subtotal for p in self.productos), 2)
\ No newline at end of file
+        return dinero.a_unidades(self.total_centavos)
\ No newline at end of file
@@ -0,0 +1,169 @@
+# src/db/reportes.py
+# Este módulo carga las facturas guardadas en DataFrames de pandas para
+# generar reportes. Lee el almacenamiento por bloques, de modo que los
+# reportes sobre millones de filas no necesitan todo el archivo en memoria,
+# y puede guardar una copia en formato Parquet para acelerar las siguientes lecturas.
+
+import os
+from typing import Iterator, Optional
+import pandas as pd
+from src.db import database, segmentos, sqlite_store
+
+# Tipos de cada columna. Los datos del cliente se leen como texto para no perder
+# ceros a la izquierda en identificaciones o teléfonos.
+TIPOS = {
+    "numero": "int64",
+    "cliente_nombre": "string",
+    "cliente_identificacion": "string",
+    "cliente_direccion": "string",
+    "cliente_telefono": "string",
+    "productos": "string",
+    "total": "float64",
+}
+
+
+def _columnas(incluir_productos: bool) -> list[str]:
+    """Devuelve las columnas a leer; 'productos' es la más pesada y se omite por defecto."""
+    return [c for c in database.COLUMNAS if incluir_productos or c != "productos"]
+
+
+def iterar_dataframes(tamano_lote: int = 100_000, incluir_productos: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Recorre las facturas guardadas en bloques de DataFrame con columnas tipadas:
+    'fecha_emision' como fecha y hora, 'numero' como entero y 'total' como número.
+
+    Args:
+        tamano_lote (int): Cantidad máxima de filas por bloque.
+        incluir_productos (bool): Si es True, incluye la columna 'productos' (JSON).
+
+    Yields:
+        pd.DataFrame: Cada bloque de facturas.
+    """
+    columnas = _columnas(incluir_productos)
+    tipos = {c: t for c, t in TIPOS.items() if c in columnas}
+
+    if database.BACKEND == "sqlite":
+        bloques = pd.read_sql_query(
+            f"SELECT {', '.join(columnas)} FROM facturas ORDER BY numero",
+            sqlite_store.conectar(database.SQLITE_FILE),
+            chunksize=tamano_lote,
+        )
+    elif database.BACKEND == "segmentado":
+        bloques = _bloques_segmentos(columnas, tipos, tamano_lote)
+    else:
+        if not os.path.exists(database.DB_FILE):
+            return
+        bloques = _bloques_csv(database.DB_FILE, columnas, tipos, tamano_lote)
+
+    for bloque in bloques:
+        bloque = bloque.astype(tipos)
+        bloque["fecha_emision"] = pd.to_datetime(bloque["fecha_emision"], format=database.FORMATO_FECHA)
+        yield bloque[columnas]
+
+
+def _bloques_csv(ruta: str, columnas: list[str], tipos: dict, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    """Lee un CSV de facturas por bloques, con las columnas de texto como 'string'."""
+    # El lector en C de pandas interpreta cada bloque sin crear objetos por fila.
+    return pd.read_csv(
+        ruta,
+        usecols=columnas,
+        dtype={c: t for c, t in tipos.items() if t == "string"},
+        chunksize=tamano_lote,
+        encoding="utf-8",
+        keep_default_na=False,
+    )
+
+
+def _bloques_segmentos(columnas: list[str], tipos: dict, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    """
+    Lee los segmentos del libro segmentado, en orden, por bloques. De los segmentos
+    compactados en Parquet solo se leen las columnas pedidas.
+    """
+    for segmento in segmentos.leer(database.SEGMENTOS_DIR):
+        archivo = segmentos.ruta(database.SEGMENTOS_DIR, segmento)
+        if segmento.formato == "csv":
+            yield from _bloques_csv(archivo, columnas, tipos, tamano_lote)
+            continue
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(archivo).iter_batches(batch_size=tamano_lote, columns=columnas):
+            yield lote.to_pandas()
+
+
+def cargar_dataframe(incluir_productos: bool = False, ruta_parquet: Optional[str] = None) -> pd.DataFrame:
+    """
+    Carga todas las facturas en un único DataFrame con columnas tipadas.
+    Si se indica 'ruta_parquet', usa ese archivo como caché: lo lee cuando es más
+    reciente que el almacenamiento de facturas y, si no, lo regenera.
+    Escribir Parquet requiere el paquete 'pyarrow'.
+
+    Args:
+        incluir_productos (bool): Si es True, incluye la columna 'productos' (JSON).
+        ruta_parquet (Optional[str]): Ruta del archivo Parquet usado como caché.
+
+    Returns:
+        pd.DataFrame: Las facturas, una por fila.
+    """
+    columnas = _columnas(incluir_productos)
+    if ruta_parquet and _cache_vigente(ruta_parquet):
+        cache = pd.read_parquet(ruta_parquet)
+        # La caché solo sirve si tiene todas las columnas pedidas.
+        if set(columnas) <= set(cache.columns):
+            return cache[columnas]
+
+    bloques = list(iterar_dataframes(incluir_productos=incluir_productos))
+    if bloques:
+        df = pd.concat(bloques, ignore_index=True)
+    else:
+        # Sin facturas, devuelve un DataFrame vacío con las mismas columnas y tipos.
+        df = pd.DataFrame({c: pd.Series(dtype=TIPOS.get(c, "datetime64[ns]")) for c in columnas})
+    if ruta_parquet:
+        df.to_parquet(ruta_parquet, index=False)
+    return df
+
+
+def ventas_mensuales(tamano_lote: int = 100_000) -> pd.DataFrame:
+    """
+    Calcula la cantidad de facturas y el total facturado por mes.
+    Agrega bloque por bloque, así que la memoria usada no depende del tamaño del archivo.
+    Los totales se suman en centavos enteros para que el resultado sea exacto.
+
+    Args:
+        tamano_lote (int): Cantidad máxima de filas leídas por bloque.
+
+    Returns:
+        pd.DataFrame: Columnas 'mes' (AAAA-MM), 'facturas' y 'total', ordenadas por mes.
+    """
+    parciales = []
+    for bloque in iterar_dataframes(tamano_lote):
+        centavos = (bloque["total"] * 100).round().astype("int64")
+        mes = bloque["fecha_emision"].dt.strftime("%Y-%m")
+        parciales.append(
+            centavos.groupby(mes).agg(["size", "sum"]).rename(columns={"size": "facturas", "sum": "centavos"})
+        )
+    if not parciales:
+        return pd.DataFrame({"mes": [], "facturas": [], "total": []})
+
+    # Combina los resultados parciales de todos los bloques.
+    resumen = pd.concat(parciales).groupby(level=0).sum().sort_index()
+    return pd.DataFrame({
+        "mes": resumen.index,
+        "facturas": resumen["facturas"].to_numpy(),
+        "total": resumen["centavos"].to_numpy() / 100,
+    })
+
+
+def _cache_vigente(ruta_parquet: str) -> bool:
+    """Indica si la caché Parquet existe y es más reciente que el almacenamiento de facturas."""
+    if not os.path.exists(ruta_parquet):
+        return False
+    if database.BACKEND == "sqlite":
+        # En modo WAL las escrituras recientes viven en el archivo '-wal' hasta el siguiente checkpoint.
+        origenes = [database.SQLITE_FILE, database.SQLITE_FILE + "-wal"]
+    elif database.BACKEND == "segmentado":
+        # El manifiesto se reemplaza con cada factura guardada.
+        origenes = [segmentos.ruta_manifiesto(database.SEGMENTOS_DIR)]
+    else:
+        origenes = [database.DB_FILE]
+    modificado = max((os.path.getmtime(o) for o in origenes if os.path.exists(o)), default=0)
+    return os.path.getmtime(ruta_parquet) >= modificado
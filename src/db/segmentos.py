@@ -0,0 +1,497 @@
+# src/db/segmentos.py
+# Este módulo implementa el libro de facturas segmentado: en lugar de un único CSV
+# que crece sin límite, las facturas se reparten en segmentos dentro de un
+# directorio, uno por mes de emisión (y uno nuevo cada FILAS_POR_SEGMENTO facturas
+# si un mes es muy grande). Un manifiesto (MANIFIESTO_FILE) registra, para cada
+# segmento, la cantidad de facturas y el rango de números y de fechas que contiene,
+# de modo que buscar una factura o un rango de fechas solo abre los segmentos que
+# pueden tenerla.
+#
+# Solo el último segmento (el activo) recibe facturas nuevas; los anteriores quedan
+# cerrados y no vuelven a cambiar. Los cerrados pueden compactarse (ver compactar)
+# en un archivo Parquet comprimido y por columnas, que ocupa mucho menos que el CSV y
+# permite filtrar sin leer el resto de las columnas. Escribir Parquet requiere el
+# paquete 'pyarrow'. Así, guardar una factura y calcular el último número solo tocan
+# el segmento activo y el manifiesto, y un respaldo incremental solo copia lo que cambió.
+#
+# El manifiesto se reemplaza de forma atómica después de cada escritura y guarda el
+# tamaño en bytes del segmento activo: si el archivo no coincide (cierre inesperado,
+# edición manual), se vuelve a leer solo ese segmento para corregir sus datos. Si el
+# manifiesto falta o está dañado, se reconstruye leyendo los segmentos del directorio.
+
+import os
+import csv
+import json
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+from src.db.sqlite_store import COLUMNAS
+from src.utils import metricas
+
+# Archivo del manifiesto, dentro del directorio de segmentos.
+MANIFIESTO_FILE = "manifiesto.json"
+# Cantidad máxima de facturas por segmento; un mes con más facturas se divide en varios.
+FILAS_POR_SEGMENTO = 100_000
+# Compresión de los segmentos compactados en Parquet.
+COMPRESION = "zstd"
+# Formatos de segmento: el CSV admite agregar filas; el Parquet es de solo lectura.
+FORMATOS = ("csv", "parquet")
+
+
+class Segmento:
+    """
+    Un segmento del libro: su nombre ("AAAA-MM_NNN", mes de emisión y parte), su formato,
+    la cantidad de facturas y los rangos de números y fechas que contiene.
+    """
+    __slots__ = ("nombre", "formato", "filas", "numero_min", "numero_max", "fecha_min", "fecha_max", "tamano")
+
+    def __init__(self, nombre: str, formato: str = "csv"):
+        """
+        Args:
+            nombre (str): El nombre del segmento, sin extensión.
+            formato (str): "csv" o "parquet".
+        """
+        self.nombre = nombre
+        self.formato = formato
+        self.filas = 0
+        # Los rangos son None mientras el segmento no tiene facturas.
+        self.numero_min: Optional[int] = None
+        self.numero_max: Optional[int] = None
+        self.fecha_min: Optional[str] = None
+        self.fecha_max: Optional[str] = None
+        # Tamaño del archivo en bytes cuando se actualizó el manifiesto.
+        self.tamano = 0
+
+    @property
+    def mes(self) -> str:
+        """El mes de emisión ("AAAA-MM") con el que se abrió el segmento."""
+        return self.nombre[:7]
+
+    def registrar(self, filas: Iterable[list]) -> None:
+        """
+        Amplía los rangos del segmento con filas agregadas a él.
+
+        Args:
+            filas (Iterable[list]): Las filas, en el orden de COLUMNAS.
+        """
+        for fila in filas:
+            numero, fecha = int(fila[0]), fila[1]
+            if self.filas == 0:
+                self.numero_min = self.numero_max = numero
+                self.fecha_min = self.fecha_max = fecha
+            else:
+                self.numero_min = min(self.numero_min, numero)
+                self.numero_max = max(self.numero_max, numero)
+                self.fecha_min = min(self.fecha_min, fecha)
+                self.fecha_max = max(self.fecha_max, fecha)
+            self.filas += 1
+
+    def puede_contener(
+        self,
+        numeros: Optional[list[int]] = None,
+        fechas: Optional[tuple[str, str]] = None,
+    ) -> bool:
+        """
+        Indica, según los rangos del manifiesto, si el segmento puede tener alguna factura buscada.
+
+        Args:
+            numeros (Optional[list[int]]): Números buscados, ordenados de menor a mayor.
+            fechas (Optional[tuple[str, str]]): Rango de fechas buscado, ambos extremos incluidos.
+
+        Returns:
+            bool: False solo si es seguro que ninguna factura del segmento cumple.
+        """
+        if self.filas == 0:
+            return False
+        if numeros is not None:
+            # El primer número buscado que no es menor que el mínimo del segmento decide.
+            i = bisect_left(numeros, self.numero_min)
+            if i == len(numeros) or numeros[i] > self.numero_max:
+                return False
+        if fechas is not None and (fechas[1] < self.fecha_min or fechas[0] > self.fecha_max):
+            return False
+        return True
+
+    def a_dict(self) -> dict:
+        """Convierte el segmento en la entrada que se guarda en el manifiesto."""
+        return {
+            "nombre": self.nombre,
+            "formato": self.formato,
+            "filas": self.filas,
+            "numeros": [self.numero_min, self.numero_max],
+            "fechas": [self.fecha_min, self.fecha_max],
+            "tamano": self.tamano,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "Segmento":
+        """Reconstruye un segmento a partir de su entrada en el manifiesto."""
+        segmento = cls(datos["nombre"], datos["formato"])
+        segmento.filas = int(datos["filas"])
+        segmento.numero_min, segmento.numero_max = datos["numeros"]
+        segmento.fecha_min, segmento.fecha_max = datos["fechas"]
+        segmento.tamano = int(datos["tamano"])
+        return segmento
+
+    def copia(self) -> "Segmento":
+        """Devuelve una copia independiente, para modificarla sin alterar el manifiesto en memoria."""
+        return Segmento.desde_dict(self.a_dict())
+
+
+# Manifiestos ya leídos, por directorio: (firma del archivo, segmentos).
+_manifiestos: dict[str, tuple[Optional[tuple[int, int, int]], list[Segmento]]] = {}
+
+
+def inicializar(directorio: str) -> None:
+    """
+    Crea el directorio de segmentos y un manifiesto vacío si todavía no existen.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    if not os.path.exists(ruta_manifiesto(directorio)):
+        _guardar_manifiesto(directorio, leer(directorio))
+
+
+def ruta_manifiesto(directorio: str) -> str:
+    """Devuelve la ruta del manifiesto de un directorio de segmentos."""
+    return os.path.join(directorio, MANIFIESTO_FILE)
+
+
+def ruta(directorio: str, segmento: Segmento) -> str:
+    """Devuelve la ruta del archivo de un segmento."""
+    return os.path.join(directorio, f"{segmento.nombre}.{segmento.formato}")
+
+
+def ruta_activa(directorio: str) -> Optional[str]:
+    """
+    Devuelve la ruta del segmento activo, el único que recibe facturas nuevas.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+
+    Returns:
+        Optional[str]: La ruta del CSV activo, o None si todavía no hay segmentos.
+    """
+    segmentos = leer(directorio)
+    if not segmentos or segmentos[-1].formato != "csv":
+        return None
+    return ruta(directorio, segmentos[-1])
+
+
+def leer(directorio: str) -> list[Segmento]:
+    """
+    Devuelve los segmentos del libro, del más antiguo al activo. Lee el manifiesto
+    solo si cambió desde la última vez, y comprueba que el segmento activo
+    conserve el tamaño registrado; si no, vuelve a leer ese segmento.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+
+    Returns:
+        list[Segmento]: Los segmentos; la lista no debe modificarse.
+    """
+    firma = _firma(ruta_manifiesto(directorio))
+    en_memoria = _manifiestos.get(directorio)
+    if en_memoria is not None and en_memoria[0] == firma:
+        segmentos = en_memoria[1]
+    else:
+        segmentos = _cargar_manifiesto(directorio) if firma is not None else None
+        if segmentos is None:
+            # Sin manifiesto legible, los segmentos del directorio son la fuente de verdad.
+            segmentos = _reconstruir_manifiesto(directorio)
+        _manifiestos[directorio] = (firma, segmentos)
+
+    if segmentos and segmentos[-1].formato == "csv":
+        activo = segmentos[-1]
+        archivo = ruta(directorio, activo)
+        if (os.path.getsize(archivo) if os.path.exists(archivo) else 0) != activo.tamano:
+            # Las escrituras interrumpidas o externas solo pueden afectar al segmento activo.
+            metricas.contar("db.escaneos_segmento")
+            segmentos = segmentos[:-1] + [_escanear(directorio, activo.nombre, "csv")]
+            _manifiestos[directorio] = (firma, segmentos)
+    return segmentos
+
+
+def ultimo_numero(directorio: str) -> int:
+    """
+    Devuelve el número de factura más alto usando los rangos del manifiesto, sin leer los segmentos.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+
+    Returns:
+        int: El último número de factura, o 0 si no hay ninguna.
+    """
+    return max((s.numero_max for s in leer(directorio) if s.filas), default=0)
+
+
+def marca(directorio: str) -> str:
+    """
+    Identifica el estado del libro, como el tamaño del CSV en el backend "csv":
+    cambia con cada factura agregada, pero no al compactar segmentos cerrados.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+
+    Returns:
+        str: La marca del estado actual.
+    """
+    segmentos = leer(directorio)
+    if not segmentos:
+        return "0"
+    activo = segmentos[-1]
+    return f"{sum(s.filas for s in segmentos)}:{activo.nombre}:{activo.tamano}"
+
+
+def anexar(directorio: str, filas: list[list], sincronizar: bool = False) -> None:
+    """
+    Agrega filas al segmento activo y abre un segmento nuevo cuando empieza un mes
+    posterior o el activo llega a FILAS_POR_SEGMENTO facturas. Una fila de un mes
+    anterior (por ejemplo, una factura con fecha retroactiva) va al segmento activo,
+    cuyo rango de fechas se amplía. Debe llamarse con el bloqueo del libro tomado.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+        filas (list[list]): Las filas a escribir, en el orden de COLUMNAS.
+        sincronizar (bool): Si es True, fuerza los datos a disco antes de actualizar el manifiesto.
+    """
+    if not filas:
+        return
+    os.makedirs(directorio, exist_ok=True)
+    segmentos = list(leer(directorio))
+    if segmentos:
+        # El activo se modifica sobre una copia hasta guardar el manifiesto.
+        segmentos[-1] = segmentos[-1].copia()
+
+    # Reparte las filas en grupos consecutivos, uno por segmento.
+    grupos: list[tuple[Segmento, list[list]]] = []
+    pendientes = segmentos[-1].filas if segmentos else 0
+    for fila in filas:
+        mes = fila[1][:7]
+        actual = grupos[-1][0] if grupos else (segmentos[-1] if segmentos else None)
+        if actual is None or actual.formato != "csv" or mes > actual.mes or pendientes >= FILAS_POR_SEGMENTO:
+            actual = _nuevo_segmento([s for s, _ in grupos] or segmentos, mes)
+            pendientes = 0
+        if not grupos or grupos[-1][0] is not actual:
+            grupos.append((actual, []))
+        grupos[-1][1].append(fila)
+        pendientes += 1
+
+    for segmento, bloque in grupos:
+        archivo = ruta(directorio, segmento)
+        if segmento not in segmentos:
+            # El segmento nuevo se registra vacío antes de escribirle filas: si la escritura
+            # se interrumpe, el manifiesto ya lo conoce y solo hay que volver a leerlo.
+            with open(archivo, mode="w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(COLUMNAS)
+            segmento.tamano = os.path.getsize(archivo)
+            segmentos.append(segmento)
+            _guardar_manifiesto(directorio, segmentos)
+        with open(archivo, mode="a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(bloque)
+            if sincronizar:
+                with metricas.etapa("db.fsync"):
+                    f.flush()
+                    os.fsync(f.fileno())
+        segmento.registrar(bloque)
+        segmento.tamano = os.path.getsize(archivo)
+    _guardar_manifiesto(directorio, segmentos)
+
+
+def recorrer(
+    directorio: str,
+    numeros: Optional[Iterable[int]] = None,
+    fechas: Optional[tuple[str, str]] = None,
+    cliente: Optional[str] = None,
+) -> Iterator[list[str]]:
+    """
+    Recorre las filas de los segmentos que pueden contener las facturas buscadas,
+    en el orden en que se guardaron. Los segmentos descartados por el manifiesto no
+    se abren. Las filas de un segmento CSV se devuelven todas; las de un segmento
+    Parquet llegan ya filtradas. Quien llama debe aplicar su propia condición a cada fila.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+        numeros (Optional[Iterable[int]]): Si se indica, solo segmentos con alguno de estos números.
+        fechas (Optional[tuple[str, str]]): Si se indica, solo segmentos con fechas en este rango.
+        cliente (Optional[str]): Si se indica, filtra los segmentos Parquet por esta identificación.
+
+    Yields:
+        list[str]: Cada fila, con los valores como texto en el orden de COLUMNAS.
+    """
+    buscados = sorted(set(numeros)) if numeros is not None else None
+    for segmento in leer(directorio):
+        if not segmento.puede_contener(buscados, fechas):
+            continue
+        archivo = ruta(directorio, segmento)
+        if segmento.formato == "csv":
+            yield from _filas_csv(archivo)
+            continue
+        filtros = []
+        if buscados is not None:
+            # Solo los números que caen dentro del rango de este segmento.
+            inicio = bisect_left(buscados, segmento.numero_min)
+            fin = bisect_left(buscados, segmento.numero_max + 1)
+            filtros.append(("numero", "in", buscados[inicio:fin]))
+        if fechas is not None:
+            filtros += [("fecha_emision", ">=", fechas[0]), ("fecha_emision", "<=", fechas[1])]
+        if cliente is not None:
+            filtros.append(("cliente_identificacion", "==", cliente))
+        yield from _filas_parquet(archivo, filtros)
+
+
+def compactar(directorio: str) -> int:
+    """
+    Convierte los segmentos cerrados que siguen en CSV a Parquet comprimido y borra el CSV.
+    El segmento activo no se compacta, porque sigue recibiendo facturas.
+    Debe llamarse con el bloqueo del libro tomado.
+
+    Args:
+        directorio (str): El directorio del libro segmentado.
+
+    Returns:
+        int: La cantidad de segmentos compactados.
+
+    Raises:
+        ImportError: Si el paquete 'pyarrow' no está instalado.
+    """
+    segmentos = list(leer(directorio))
+    cerrados = [i for i, s in enumerate(segmentos[:-1]) if s.formato == "csv"]
+    if not cerrados:
+        return 0
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Compactar segmentos requiere el paquete 'pyarrow'.") from None
+
+    tipos = {"numero": pa.int64(), "total": pa.float64()}
+    for i in cerrados:
+        origen = ruta(directorio, segmentos[i])
+        columnas: list[list] = [[] for _ in COLUMNAS]
+        for fila in _filas_csv(origen):
+            for columna, valor in zip(columnas, fila):
+                columna.append(valor)
+        columnas[0] = [int(v) for v in columnas[0]]
+        columnas[7] = [float(v) for v in columnas[7]]
+        tabla = pa.table({c: pa.array(v, type=tipos.get(c, pa.string())) for c, v in zip(COLUMNAS, columnas)})
+
+        compactado = segmentos[i].copia()
+        compactado.formato = "parquet"
+        destino = ruta(directorio, compactado)
+        # Se escribe en un temporal y se reemplaza, para no dejar nunca un Parquet a medias.
+        pq.write_table(tabla, destino + ".tmp", compression=COMPRESION)
+        os.replace(destino + ".tmp", destino)
+        compactado.tamano = os.path.getsize(destino)
+        # El CSV se borra solo después de que el manifiesto apunta al Parquet.
+        segmentos[i] = compactado
+        _guardar_manifiesto(directorio, segmentos)
+        os.remove(origen)
+    return len(cerrados)
+
+
+def _nuevo_segmento(anteriores: list[Segmento], mes: str) -> Segmento:
+    """Crea (sin escribirlo) el segmento que sigue a los anteriores para el mes indicado."""
+    parte = 1
+    if anteriores and anteriores[-1].mes >= mes:
+        # Mismo mes (el activo se llenó) o fila retroactiva tras un segmento compactado:
+        # se sigue numerando dentro del mes del último segmento para mantener el orden.
+        mes = anteriores[-1].mes
+        parte = int(anteriores[-1].nombre[8:]) + 1
+    return Segmento(f"{mes}_{parte:03d}")
+
+
+def _filas_csv(archivo: str) -> Iterator[list[str]]:
+    """Recorre las filas de un segmento CSV, sin el encabezado ni las filas vacías."""
+    if not os.path.exists(archivo):
+        return
+    with open(archivo, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        # Salta la fila de encabezado.
+        next(reader, None)
+        for row in reader:
+            # Una fila incompleta al final (escritura interrumpida) se ignora hasta que se repare.
+            if row and row[0] and len(row) >= len(COLUMNAS):
+                yield row
+
+
+def _filas_parquet(archivo: str, filtros: list[tuple]) -> Iterator[list[str]]:
+    """
+    Recorre las filas de un segmento Parquet con los mismos textos que tendrían en el CSV.
+    Los filtros se evalúan por columnas dentro de pyarrow, sin crear objetos por fila.
+    """
+    import pyarrow.parquet as pq
+
+    if filtros:
+        lotes = pq.read_table(archivo, columns=list(COLUMNAS), filters=filtros).to_batches()
+    else:
+        lotes = pq.ParquetFile(archivo).iter_batches(batch_size=10000, columns=list(COLUMNAS))
+    for lote in lotes:
+        for valores in zip(*(lote.column(c).to_pylist() for c in COLUMNAS)):
+            fila = list(valores)
+            fila[0] = str(fila[0])
+            fila[7] = f"{fila[7]:.2f}"
+            yield fila
+
+
+def _escanear(directorio: str, nombre: str, formato: str) -> Segmento:
+    """Calcula los datos de un segmento leyendo su archivo completo."""
+    segmento = Segmento(nombre, formato)
+    archivo = ruta(directorio, segmento)
+    if formato == "csv":
+        segmento.registrar(_filas_csv(archivo))
+    else:
+        segmento.registrar(_filas_parquet(archivo, []))
+    segmento.tamano = os.path.getsize(archivo) if os.path.exists(archivo) else 0
+    return segmento
+
+
+def _reconstruir_manifiesto(directorio: str) -> list[Segmento]:
+    """
+    Reconstruye la lista de segmentos leyendo los archivos del directorio, en orden de nombre.
+    Si un segmento existe en CSV y en Parquet (compactación interrumpida), vale el Parquet.
+    """
+    formatos: dict[str, str] = {}
+    if os.path.isdir(directorio):
+        for archivo in os.listdir(directorio):
+            nombre, _, formato = archivo.rpartition(".")
+            if formato in FORMATOS and nombre[:7].count("-") == 1 and nombre[7:8] == "_":
+                if formatos.get(nombre) != "parquet":
+                    formatos[nombre] = formato
+    return [_escanear(directorio, nombre, formatos[nombre]) for nombre in sorted(formatos)]
+
+
+def _cargar_manifiesto(directorio: str) -> Optional[list[Segmento]]:
+    """Lee el manifiesto; devuelve None si está ilegible."""
+    try:
+        with open(ruta_manifiesto(directorio), mode="r", encoding="utf-8") as f:
+            return [Segmento.desde_dict(datos) for datos in json.load(f)["segmentos"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _guardar_manifiesto(directorio: str, segmentos: list[Segmento]) -> None:
+    """
+    Guarda el manifiesto escribiendo primero un archivo temporal y reemplazándolo
+    de forma atómica, para que un cierre inesperado nunca lo deje a medio escribir.
+    """
+    destino = ruta_manifiesto(directorio)
+    temporal = destino + ".tmp"
+    with open(temporal, mode="w", encoding="utf-8") as f:
+        json.dump({"segmentos": [s.a_dict() for s in segmentos]}, f, ensure_ascii=False)
+    os.replace(temporal, destino)
+    _manifiestos[directorio] = (_firma(destino), list(segmentos))
+
+
+def _firma(archivo: str) -> Optional[tuple[int, int, int]]:
+    """
+    Fecha de modificación, tamaño e inodo de un archivo, para saber si cambió; None si no existe.
+    Cada reemplazo atómico crea un archivo nuevo, así que el inodo cambia aunque
+    otra instancia reescriba el manifiesto con el mismo tamaño en el mismo instante.
+    """
+    try:
+        estado = os.stat(archivo)
+    except OSError:
+        return None
+    return (estado.st_mtime_ns, estado.st_size, estado.st_ino)
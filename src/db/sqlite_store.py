@@ -0,0 +1,260 @@
+# src/db/sqlite_store.py
+# Este módulo implementa el almacenamiento de facturas sobre SQLite.
+# Guarda las mismas columnas que el CSV, pero con índices por número,
+# identificación del cliente y fecha de emisión para consultas rápidas.
+
+import csv
+import sqlite3
+import threading
+from typing import Callable, Iterable, Iterator, Optional
+from src.db import agregados, clientes
+from src.utils import dinero
+
+# Conexiones abiertas, una por archivo de base de datos y por hilo, reutilizadas entre llamadas.
+# Cada hilo usa la suya: así una lectura o un commit de la interfaz no puede caer dentro de la
+# transacción que la cola de trabajos o GrupoCommit tienen abierta en otro hilo.
+_conexiones: dict[tuple[str, int], sqlite3.Connection] = {}
+# Protege los cambios en _conexiones, que se abren y cierran desde varios hilos.
+_candado = threading.Lock()
+
+# Columnas de la tabla, en el mismo orden que las filas del CSV.
+COLUMNAS = (
+    "numero",
+    "fecha_emision",
+    "cliente_nombre",
+    "cliente_identificacion",
+    "cliente_direccion",
+    "cliente_telefono",
+    "productos",
+    "total",
+)
+
+
+def conectar(ruta: str) -> sqlite3.Connection:
+    """
+    Devuelve una conexión a la base de datos indicada, creando el esquema si hace falta.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+
+    Returns:
+        sqlite3.Connection: La conexión reutilizable para ese archivo en el hilo actual.
+    """
+    clave = (ruta, threading.get_ident())
+    conexion = _conexiones.get(clave)
+    if conexion is None:
+        # Solo el hilo que la abrió la usa. Se desactiva la comprobación de hilo porque cerrar()
+        # cierra también las de otros hilos, y un hilo nuevo puede heredar el identificador de uno terminado.
+        conexion = sqlite3.connect(ruta, check_same_thread=False)
+        # WAL permite leer mientras otro proceso escribe y reduce el costo de cada commit.
+        conexion.execute("PRAGMA journal_mode=WAL")
+        _crear_esquema(conexion)
+        with _candado:
+            _conexiones[clave] = conexion
+        # Una base creada antes de existir los totales precalculados no tiene marca: se calculan una vez.
+        if agregados.leer_marca(conexion) is None:
+            reconstruir_agregados(ruta)
+    return conexion
+
+
+def cerrar(ruta: Optional[str] = None) -> None:
+    """
+    Cierra las conexiones de un archivo, en todos los hilos, o todas si no se indica ninguno.
+
+    Args:
+        ruta (Optional[str]): Ruta del archivo SQLite a cerrar.
+    """
+    with _candado:
+        claves = [clave for clave in _conexiones if ruta is None or clave[0] == ruta]
+        conexiones = [_conexiones.pop(clave) for clave in claves]
+    for conexion in conexiones:
+        conexion.close()
+
+
+def _crear_esquema(conexion: sqlite3.Connection) -> None:
+    """Crea la tabla de facturas y sus índices si todavía no existen."""
+    with conexion:
+        conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS facturas (
+                numero INTEGER PRIMARY KEY,
+                fecha_emision TEXT NOT NULL,
+                cliente_nombre TEXT NOT NULL,
+                cliente_identificacion TEXT NOT NULL,
+                cliente_direccion TEXT NOT NULL,
+                cliente_telefono TEXT NOT NULL,
+                productos TEXT NOT NULL,
+                total REAL NOT NULL
+            )
+            """
+        )
+        # 'numero' ya está indexado por ser la clave primaria.
+        conexion.execute(
+            "CREATE INDEX IF NOT EXISTS idx_facturas_cliente ON facturas (cliente_identificacion)"
+        )
+        conexion.execute(
+            "CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas (fecha_emision)"
+        )
+    # Los totales precalculados por cliente, día y mes viven en la misma base.
+    agregados.crear_esquema(conexion)
+
+
+def insertar_filas(ruta: str, filas: Iterable[list]) -> None:
+    """
+    Inserta varias filas de facturas dentro de una sola transacción,
+    que también actualiza los totales precalculados.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+        filas (Iterable[list]): Filas con los valores en el orden de COLUMNAS.
+    """
+    conexion = conectar(ruta)
+    with conexion:
+        _insertar(conexion, list(filas))
+
+
+def insertar_numerando(ruta: str, construir_filas: Callable[[int], list[list]]) -> int:
+    """
+    Asigna números consecutivos e inserta las filas en una sola transacción.
+    La transacción empieza con BEGIN IMMEDIATE, que toma el bloqueo de escritura
+    antes de leer el último número: otro proceso que intente numerar al mismo
+    tiempo espera a que esta transacción termine y nunca obtiene el mismo número.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+        construir_filas (Callable[[int], list[list]]): Recibe el primer número libre
+            y devuelve las filas a insertar, ya numeradas a partir de él.
+
+    Returns:
+        int: El primer número asignado.
+    """
+    conexion = conectar(ruta)
+    with conexion:
+        conexion.execute("BEGIN IMMEDIATE")
+        fila = conexion.execute("SELECT MAX(numero) FROM facturas").fetchone()
+        primero = (fila[0] or 0) + 1
+        _insertar(conexion, construir_filas(primero))
+    return primero
+
+
+def _insertar(conexion: sqlite3.Connection, filas: list[list]) -> None:
+    """Inserta filas y suma sus totales a los agregados, dentro de la transacción en curso."""
+    conexion.executemany(
+        f"INSERT INTO facturas ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+        filas,
+    )
+    # Si la inserción falla, la transacción se revierte y los totales no cambian.
+    agregados.registrar(
+        conexion,
+        ((fila[1], fila[3], dinero.a_centavos(float(fila[7]))) for fila in filas),
+    )
+    clientes.registrar(conexion, ((fila[0], fila[3], fila[2], fila[4], fila[5]) for fila in filas))
+
+
+def ultimo_numero(ruta: str) -> int:
+    """
+    Obtiene el número de factura más alto usando el índice de la clave primaria.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+
+    Returns:
+        int: El último número de factura, o 0 si no hay ninguna.
+    """
+    fila = conectar(ruta).execute("SELECT MAX(numero) FROM facturas").fetchone()
+    return fila[0] or 0
+
+
+def consultar(ruta: str, condicion: str, parametros: tuple) -> list[tuple]:
+    """
+    Ejecuta una consulta de facturas filtrada por una condición sobre columnas indexadas.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+        condicion (str): Cláusula WHERE (sin la palabra clave), con marcadores '?'.
+        parametros (tuple): Valores para los marcadores de la condición.
+
+    Returns:
+        list[tuple]: Las filas encontradas, ordenadas por número de factura.
+    """
+    cursor = conectar(ruta).execute(
+        f"SELECT {', '.join(COLUMNAS)} FROM facturas WHERE {condicion} ORDER BY numero",
+        parametros,
+    )
+    return cursor.fetchall()
+
+
+def recorrer(ruta: str) -> Iterator[tuple]:
+    """
+    Recorre todas las facturas ordenadas por número, sin cargarlas todas en memoria.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+
+    Yields:
+        tuple: Cada fila con los valores en el orden de COLUMNAS.
+    """
+    yield from conectar(ruta).execute(f"SELECT {', '.join(COLUMNAS)} FROM facturas ORDER BY numero")
+
+
+def migrar_desde_csv(ruta: str, ruta_csv: str) -> int:
+    """
+    Copia todas las facturas de un CSV existente a la base de datos SQLite.
+    Las facturas cuyo número ya existe en SQLite se omiten, por lo que
+    la migración puede repetirse sin duplicar datos.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite de destino.
+        ruta_csv (str): Ruta del CSV de origen.
+
+    Returns:
+        int: La cantidad de facturas insertadas.
+    """
+    conexion = conectar(ruta)
+    antes = conexion.total_changes
+    with open(ruta_csv, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        # Salta la fila de encabezado.
+        next(reader, None)
+        with conexion:
+            conexion.executemany(
+                f"INSERT OR IGNORE INTO facturas ({', '.join(COLUMNAS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNAS))})",
+                (row for row in reader if row and row[0]),
+            )
+    insertadas = conexion.total_changes - antes
+    # Las filas omitidas no se distinguen de las insertadas, así que los totales se recalculan.
+    reconstruir_agregados(ruta)
+    return insertadas
+
+
+def reconstruir_agregados(ruta: str) -> None:
+    """
+    Recalcula desde cero los totales precalculados y el registro de clientes a partir de la tabla de facturas.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite.
+    """
+    conexion = conectar(ruta)
+    with conexion:
+        agregados.vaciar(conexion)
+        # Los totales se guardan con dos decimales, así que total * 100 redondeado es exacto.
+        agregados.registrar(
+            conexion,
+            conexion.execute(
+                "SELECT fecha_emision, cliente_identificacion, CAST(ROUND(total * 100) AS INTEGER) FROM facturas"
+            ),
+        )
+        clientes.vaciar(conexion)
+        clientes.registrar(
+            conexion,
+            conexion.execute(
+                """
+                SELECT numero, cliente_identificacion, cliente_nombre, cliente_direccion, cliente_telefono
+                FROM facturas ORDER BY numero
+                """
+            ),
+        )
+        # En SQLite los totales se actualizan en la misma transacción que las facturas,
+        # así que la marca solo indica que ya fueron calculados.
+        agregados.guardar_marca(conexion, "sqlite")
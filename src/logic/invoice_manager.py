@@ -3,10 +3,22 @@
 # Separa las reglas de negocio (validación, numeración) de la interfaz de usuario y del acceso a datos.
 
 import os
-from typing import Optional
-from datetime import datetime
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+from datetime import date, datetime
 from src.db import database
+from src.db.catalogo import Catalogo
+from src.db.clientes import IndiceClientes
 from src.db.models import Factura, Cliente, Producto
+from src.logic.lote import DiarioLote, Registro, ReporteValidacion, ResultadoLote
+from src.utils import dinero, metricas, validators
+
+# Los módulos de PDF cargan ReportLab, que es costoso de importar; se importan
+# recién cuando hay que generar un PDF, para que guardar o consultar facturas
+# desde un script no pague ese costo.
+if TYPE_CHECKING:
+    from src.pdf.render_paralelo import RenderizadorParalelo
 
 
 class InvoiceManager:
@@ -22,6 +34,10 @@ class InvoiceManager:
         """
         # Llama a la función para crear el archivo CSV si no existe.
         database.inicializar_db()
+        # Índice de clientes para autocompletar; se carga con la primera búsqueda.
+        self._clientes: Optional[IndiceClientes] = None
+        # Catálogo de productos; se abre con la primera consulta.
+        self._catalogo: Optional[Catalogo] = None
 
     def obtener_siguiente_numero(self) -> int:
         """
@@ -46,14 +62,10 @@ class InvoiceManager:
         Raises:
             ValueError: Si un campo obligatorio está vacío.
         """
-        if not cliente.nombre.strip():
-            raise ValueError("El nombre del cliente es obligatorio.")
-        if not cliente.identificacion.strip():
-            raise ValueError("La identificación del cliente es obligatoria.")
-        if not cliente.direccion.strip():
-            raise ValueError("La dirección del cliente es obligatoria.")
-        if not cliente.telefono.strip():
-            raise ValueError("El teléfono del cliente es obligatorio.")
+        # Las reglas son las mismas que aplica validar_lote a columnas enteras.
+        for campo, mensaje in validators.CAMPOS_CLIENTE:
+            if not validators.validar_no_vacio(getattr(cliente, campo)):
+                raise ValueError(mensaje)
 
     def validar_productos(self, productos: list[Producto]) -> None:
         """
@@ -66,14 +78,106 @@ class InvoiceManager:
             ValueError: Si la lista está vacía o si algún producto tiene datos inválidos.
         """
         if not productos:
-            raise ValueError("Debe agregar al menos un producto a la factura.")
+            raise ValueError(validators.MENSAJE_SIN_PRODUCTOS)
         for p in productos:
-            if not p.descripcion.strip():
-                raise ValueError("La descripción del producto no puede estar vacía.")
-            if p.cantidad <= 0:
-                raise ValueError(f"La cantidad del producto '{p.descripcion}' debe ser mayor que cero.")
-            if p.precio_unitario <= 0:
-                raise ValueError(f"El precio unitario del producto '{p.descripcion}' debe ser mayor que cero.")
+            if not validators.validar_no_vacio(p.descripcion):
+                raise ValueError(validators.MENSAJE_DESCRIPCION)
+            if not validators.validar_positivo(p.cantidad):
+                raise ValueError(validators.MENSAJE_CANTIDAD.format(descripcion=p.descripcion))
+            if not validators.validar_positivo(p.precio_unitario):
+                raise ValueError(validators.MENSAJE_PRECIO.format(descripcion=p.descripcion))
+
+    def validar_lote(self, filas, primera_fila: int = 0, referencia_anterior: Optional[str] = None) -> ReporteValidacion:
+        """
+        Valida un lote completo por columnas, sin crear un objeto por fila ni
+        detenerse en el primer error. Aplica las mismas reglas que validar_cliente
+        y validar_productos (y las conversiones de leer_registros_csv) con máscaras
+        de NumPy/pandas, e informa el primer error de cada fila.
+        
+        Args:
+            filas: DataFrame (o diccionario de columnas) con un producto por fila y las
+                columnas del CSV de lotes: referencia, cliente_nombre, cliente_identificacion,
+                cliente_direccion, cliente_telefono, descripcion, cantidad y precio_unitario.
+                Cantidades y precios pueden ser texto o números. Las filas consecutivas con
+                la misma referencia forman una factura, cuyo cliente es el de su primera fila.
+            primera_fila (int): Número de la primera fila en el lote completo, para validar por bloques.
+            referencia_anterior (Optional[str]): Referencia de la última fila del bloque anterior;
+                si coincide con la primera de este bloque, la factura continúa.
+            
+        Returns:
+            ReporteValidacion: Las filas con errores y las facturas que no se podrían guardar.
+        """
+        import numpy as np
+
+        v = validators
+        reporte = ReporteValidacion()
+        with metricas.etapa("lote.validacion_columnas"):
+            referencias = np.asarray(filas["referencia"], dtype=object)
+            n = len(referencias)
+            reporte.filas = n
+            if n == 0:
+                return reporte
+            # Primera fila de cada factura: donde cambia la referencia.
+            inicios = np.empty(n, dtype=bool)
+            inicios[0] = referencias[0] != referencia_anterior
+            inicios[1:] = referencias[1:] != referencias[:-1]
+            reporte.facturas = int(inicios.sum())
+
+            # Reglas en el orden en que las revisan los validadores escalares: (filas que la incumplen, mensaje).
+            reglas = [
+                (inicios & ~v.validar_no_vacio_np(filas[f"cliente_{campo}"]), mensaje)
+                for campo, mensaje in v.CAMPOS_CLIENTE
+            ]
+            reglas.append((~v.validar_no_vacio_np(filas["descripcion"]), v.MENSAJE_DESCRIPCION))
+            reglas.append((~v.validar_entero_np(filas["cantidad"]), v.MENSAJE_CANTIDAD_ENTERA))
+            cantidades, _ = v.convertir_numeros_np(filas["cantidad"])
+            reglas.append((~v.validar_positivo_np(cantidades), v.MENSAJE_CANTIDAD))
+            precios, numericos = v.convertir_numeros_np(filas["precio_unitario"])
+            reglas.append((~numericos, v.MENSAJE_PRECIO_NUMERO))
+            reglas.append((~v.validar_positivo_np(precios), v.MENSAJE_PRECIO))
+
+            # Se aplican de la última a la primera: en cada fila queda el mensaje de la primera que falla.
+            mensajes = np.full(n, None, dtype=object)
+            con_errores = np.zeros(n, dtype=bool)
+            for invalidas, mensaje in reversed(reglas):
+                mensajes[invalidas] = mensaje
+                con_errores |= invalidas
+            # Solo las filas inválidas (normalmente pocas) se recorren en Python, para armar el mensaje.
+            posiciones = np.flatnonzero(con_errores)
+            descripciones = np.asarray(filas["descripcion"], dtype=object)[posiciones] if len(posiciones) else []
+            for posicion, descripcion in zip(posiciones, descripciones):
+                mensaje = mensajes[posicion].format(descripcion=descripcion)
+                reporte.errores.append((primera_fila + int(posicion), mensaje))
+                reporte.referencias_invalidas.add(referencias[posicion])
+        metricas.contar("lote.filas_validadas", n)
+        return reporte
+
+    def validar_archivo(self, ruta: str, tamano_bloque: int = 100_000) -> ReporteValidacion:
+        """
+        Valida un archivo CSV de lotes (ver leer_registros_csv) por columnas y por
+        bloques, sin guardar nada. Sirve para revisar archivos grandes antes de procesarlos.
+        
+        Args:
+            ruta (str): Ruta del archivo CSV.
+            tamano_bloque (int): Filas leídas y validadas a la vez; limita la memoria usada.
+            
+        Returns:
+            ReporteValidacion: El reporte de todo el archivo.
+            
+        Raises:
+            ValueError: Si el archivo no es CSV.
+        """
+        if os.path.splitext(ruta)[1].lower() != ".csv":
+            raise ValueError("La validación por columnas requiere un archivo CSV.")
+        import pandas as pd
+
+        reporte = ReporteValidacion()
+        referencia_anterior = None
+        # Todo se lee como texto, igual que csv.DictReader: las conversiones son parte de la validación.
+        for bloque in pd.read_csv(ruta, dtype=str, keep_default_na=False, chunksize=tamano_bloque, encoding="utf-8"):
+            reporte.unir(self.validar_lote(bloque, reporte.filas, referencia_anterior))
+            referencia_anterior = bloque["referencia"].iat[-1]
+        return reporte
 
     def crear_factura(
         self,
@@ -96,12 +200,14 @@ class InvoiceManager:
             Factura: El objeto de factura recién creado y validado.
         """
         # Ejecuta las validaciones antes de crear el objeto.
-        self.validar_cliente(cliente)
-        self.validar_productos(productos)
+        with metricas.etapa("validacion"):
+            self.validar_cliente(cliente)
+            self.validar_productos(productos)
 
         # Si no se pasa un número de factura, se obtiene el siguiente disponible.
         if numero is None:
-            numero = self.obtener_siguiente_numero()
+            with metricas.etapa("numeracion"):
+                numero = self.obtener_siguiente_numero()
 
         # Crea y devuelve el objeto Factura final.
         return Factura(
@@ -109,4 +215,358 @@ class InvoiceManager:
             cliente=cliente,
             productos=productos,
             fecha_emision=fecha_emision,
-        )
\ No newline at end of file
+        )
+
+    def emitir_factura(self, factura: Factura) -> int:
+        """
+        Guarda una factura asignándole el siguiente número libre en el mismo paso.
+        A diferencia de usar obtener_siguiente_numero y luego guardar, es seguro
+        aunque varias instancias de la aplicación compartan el archivo de facturas.
+        
+        Args:
+            factura (Factura): La factura a guardar; su número se reemplaza por el asignado.
+            
+        Returns:
+            int: El número asignado a la factura.
+        """
+        database.asignar_y_guardar([factura])
+        self._registrar_clientes([factura])
+        return factura.numero
+
+    def buscar_clientes(self, prefijo: str, limite: int = 20) -> list[Cliente]:
+        """
+        Busca clientes ya facturados cuya identificación o nombre empiecen por un prefijo,
+        para autocompletar los datos del cliente. La primera búsqueda carga el registro
+        de clientes en memoria; las siguientes no acceden al disco.
+        
+        Args:
+            prefijo (str): El texto escrito; no distingue mayúsculas ni tildes.
+            limite (int): Cantidad máxima de resultados.
+            
+        Returns:
+            list[Cliente]: Los clientes encontrados, con sus datos más recientes.
+        """
+        return self.indice_clientes().buscar(prefijo, limite)
+
+    def indice_clientes(self) -> IndiceClientes:
+        """
+        Devuelve el índice de clientes en memoria, cargándolo la primera vez.
+        Se mantiene al día con las facturas que guarda este gestor.
+        
+        Returns:
+            IndiceClientes: El índice de clientes.
+        """
+        if self._clientes is None:
+            self._clientes = IndiceClientes(database.cargar_clientes())
+        return self._clientes
+
+    def catalogo(self) -> Catalogo:
+        """
+        Devuelve el catálogo de productos, abriéndolo la primera vez.
+        
+        Returns:
+            Catalogo: El catálogo de productos.
+        """
+        if self._catalogo is None:
+            self._catalogo = Catalogo()
+        return self._catalogo
+
+    def producto_de_catalogo(self, sku: str, cantidad: int = 1) -> Producto:
+        """
+        Crea un producto con la descripción y el precio que tiene en el catálogo.
+        
+        Args:
+            sku (str): El código del producto.
+            cantidad (int): Número de unidades.
+            
+        Returns:
+            Producto: El producto listo para agregar a una factura.
+            
+        Raises:
+            ValueError: Si el código no está en el catálogo.
+        """
+        item = self.catalogo().obtener(sku)
+        if item is None:
+            raise ValueError(f"El código '{sku}' no está en el catálogo.")
+        return item.producto(cantidad)
+
+    def _registrar_clientes(self, facturas: list[Factura]) -> None:
+        """Actualiza el índice de clientes, si ya se cargó, con los clientes de facturas guardadas."""
+        if self._clientes is not None:
+            for factura in facturas:
+                self._clientes.agregar(factura.cliente)
+
+    def total_cliente(
+        self,
+        identificacion: str,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+    ) -> float:
+        """
+        Calcula lo facturado a un cliente, en total o dentro de un rango de meses.
+        Usa los totales precalculados, así que no recorre las facturas guardadas.
+        
+        Args:
+            identificacion (str): La identificación del cliente.
+            desde (Optional[date]): Una fecha del primer mes a incluir. Si es None, desde el principio.
+            hasta (Optional[date]): Una fecha del último mes a incluir. Si es None, hasta el final.
+            
+        Returns:
+            float: El total facturado al cliente.
+        """
+        _, centavos = database.total_por_cliente(
+            identificacion,
+            f"{desde:%Y-%m}" if desde else "0000-00",
+            f"{hasta:%Y-%m}" if hasta else "9999-99",
+        )
+        return dinero.a_unidades(centavos)
+
+    def ingresos_por_dia(self, desde: Optional[date] = None, hasta: Optional[date] = None) -> list[tuple[str, int, float]]:
+        """
+        Obtiene la cantidad de facturas y lo facturado en cada día de un rango.
+        
+        Args:
+            desde (Optional[date]): Primer día del rango. Si es None, desde el principio.
+            hasta (Optional[date]): Último día del rango (incluido). Si es None, hasta el final.
+            
+        Returns:
+            list[tuple[str, int, float]]: (día "AAAA-MM-DD", facturas, total) de los días con ventas.
+        """
+        return [(dia, n, dinero.a_unidades(c)) for dia, n, c in database.totales_por_dia(desde, hasta)]
+
+    def ingresos_por_mes(self, desde: Optional[date] = None, hasta: Optional[date] = None) -> list[tuple[str, int, float]]:
+        """
+        Obtiene la cantidad de facturas y lo facturado en cada mes de un rango.
+        
+        Args:
+            desde (Optional[date]): Una fecha del primer mes del rango. Si es None, desde el principio.
+            hasta (Optional[date]): Una fecha del último mes del rango (incluido). Si es None, hasta el final.
+            
+        Returns:
+            list[tuple[str, int, float]]: (mes "AAAA-MM", facturas, total) de los meses con ventas.
+        """
+        return [(mes, n, dinero.a_unidades(c)) for mes, n, c in database.totales_por_mes(desde, hasta)]
+
+    def procesar_lote(
+        self,
+        registros: Iterable[Registro],
+        renderizar: bool = True,
+        tamano_bloque: int = 1000,
+        al_avanzar: Optional[Callable[[ResultadoLote], None]] = None,
+        trabajadores: int = 1,
+        salida=None,
+        diario: Optional[DiarioLote] = None,
+    ) -> ResultadoLote:
+        """
+        Genera facturas en lote a partir de una secuencia de registros.
+        Los registros se procesan por bloques: cada bloque se valida, recibe un rango
+        contiguo de números, se guarda con una sola escritura y, opcionalmente, se
+        exporta a PDF. Un registro inválido o un PDF fallido se anotan en el
+        resultado sin detener el resto del lote.
+        
+        Args:
+            registros (Iterable[Registro]): Tuplas (cliente, productos, fecha_emision),
+                o excepciones para los registros que no se pudieron leer.
+            renderizar (bool): Si es True, genera el PDF de cada factura guardada.
+            tamano_bloque (int): Cantidad de registros por bloque; limita la memoria usada.
+            al_avanzar (Optional[Callable]): Función que recibe el resultado parcial tras cada bloque.
+            trabajadores (int): Procesos usados para generar los PDFs; con 1 se generan en este proceso.
+            salida: Escritor con un método agregar(factura), como EscritorZip o EscritorPdfCombinado,
+                que reúne todos los PDFs en un solo archivo. Si es None, se genera un archivo por factura.
+            diario (Optional[DiarioLote]): Diario para reanudar el lote. Los registros que
+                ya se guardaron en una ejecución anterior conservan su número y su fecha,
+                y sus PDFs ya generados no se vuelven a generar.
+            
+        Returns:
+            ResultadoLote: Los números asignados, los errores por registro y el rendimiento.
+        """
+        resultado = ResultadoLote()
+        inicio = time.perf_counter()
+        bloque: list[tuple[int, Registro]] = []
+        if diario:
+            self._conciliar_diario(diario)
+        # Con varios trabajadores, el mismo pool de procesos se reutiliza en todos los bloques.
+        renderizador = None
+        if renderizar and trabajadores > 1 and salida is None:
+            from src.pdf.render_paralelo import RenderizadorParalelo
+            renderizador = RenderizadorParalelo(trabajadores)
+
+        try:
+            for indice, registro in enumerate(registros):
+                bloque.append((indice, registro))
+                if len(bloque) >= tamano_bloque:
+                    self._procesar_bloque(bloque, renderizar, resultado, renderizador, salida, diario)
+                    bloque = []
+                    resultado.segundos = time.perf_counter() - inicio
+                    if al_avanzar:
+                        al_avanzar(resultado)
+
+            # Procesa los registros que quedaron en el último bloque incompleto.
+            if bloque:
+                self._procesar_bloque(bloque, renderizar, resultado, renderizador, salida, diario)
+        finally:
+            if renderizador:
+                renderizador.cerrar()
+        resultado.segundos = time.perf_counter() - inicio
+        if al_avanzar:
+            al_avanzar(resultado)
+        return resultado
+
+    def _conciliar_diario(self, diario: DiarioLote) -> None:
+        """
+        Resuelve los registros que la ejecución anterior numeró pero no confirmó como
+        guardados: si su factura está en el archivo de facturas (mismo número, fecha y
+        cliente), se dan por guardados; si no, se descartan y se numeran de nuevo.
+        
+        Args:
+            diario (DiarioLote): El diario del lote.
+        """
+        pendientes = diario.pendientes()
+        if not pendientes:
+            return
+        filas = database.buscar_facturas(numero for numero, _, _ in pendientes.values())
+        guardados, descartados = [], []
+        for indice, (numero, fecha, identificacion) in pendientes.items():
+            fila = filas.get(numero)
+            if fila and fila["fecha_emision"] == fecha and fila["cliente_identificacion"] == identificacion:
+                guardados.append(indice)
+            else:
+                descartados.append(indice)
+        diario.anotar_guardados(guardados)
+        diario.anotar_descartados(descartados)
+
+    def _procesar_bloque(
+        self,
+        bloque: list[tuple[int, Registro]],
+        renderizar: bool,
+        resultado: ResultadoLote,
+        renderizador: Optional["RenderizadorParalelo"] = None,
+        salida=None,
+        diario: Optional[DiarioLote] = None,
+    ) -> None:
+        """
+        Valida, numera, guarda y exporta un bloque de registros de procesar_lote.
+        
+        Args:
+            bloque (list[tuple[int, Registro]]): Pares (índice en la entrada, registro).
+            renderizar (bool): Si es True, genera el PDF de cada factura guardada.
+            resultado (ResultadoLote): El resultado que se va completando.
+            renderizador (Optional[RenderizadorParalelo]): Pool para generar los PDFs en paralelo.
+            salida: Escritor que reúne los PDFs en un solo archivo (ver procesar_lote).
+            diario (Optional[DiarioLote]): Diario para reanudar el lote (ver procesar_lote).
+        """
+        resultado.registros += len(bloque)
+
+        # 1. Valida cada registro; los inválidos no consumen número de factura.
+        # Los ya guardados en una ejecución anterior se reconstruyen con su número y su fecha.
+        facturas: list[tuple[int, Factura]] = []
+        nuevas: list[tuple[int, Factura]] = []
+        with metricas.etapa("lote.validacion"):
+            for indice, registro in bloque:
+                if isinstance(registro, Exception):
+                    resultado.errores.append((indice, str(registro)))
+                    continue
+                cliente, productos, fecha_emision = registro
+                try:
+                    self.validar_cliente(cliente)
+                    self.validar_productos(productos)
+                except ValueError as e:
+                    resultado.errores.append((indice, str(e)))
+                    continue
+                if diario and indice in diario.guardados:
+                    facturas.append((indice, Factura(diario.numero(indice), cliente, productos, diario.fecha(indice))))
+                    resultado.reanudados += 1
+                    continue
+                # El número definitivo se asigna al guardar.
+                factura = Factura(numero=0, cliente=cliente, productos=productos, fecha_emision=fecha_emision)
+                if diario:
+                    # La fecha se guarda con precisión de segundos; se recorta para que la
+                    # factura reconstruida al reanudar sea idéntica (y su PDF, reutilizable).
+                    factura.fecha_emision = factura.fecha_emision.replace(microsecond=0)
+                facturas.append((indice, factura))
+                nuevas.append((indice, factura))
+        metricas.contar("lote.registros", len(bloque))
+        metricas.contar("lote.invalidos", len(bloque) - len(facturas))
+        if not facturas:
+            return
+
+        # 2 y 3. Asigna un rango contiguo de números y guarda todo el bloque con una sola
+        # escritura, en una operación atómica frente a otras instancias de la aplicación.
+        # Con diario, los números se anotan antes de escribir las facturas y la escritura
+        # se confirma después: un corte entre ambos pasos se resuelve al reanudar.
+        if nuevas:
+            indices = [indice for indice, _ in nuevas]
+            al_numerar = (lambda numeradas: diario.anotar_numerados(indices, numeradas)) if diario else None
+            try:
+                with metricas.etapa("lote.guardado"):
+                    database.asignar_y_guardar([f for _, f in nuevas], al_numerar=al_numerar)
+            except (OSError, sqlite3.Error) as e:
+                # Un fallo de almacenamiento (disco, o la base SQLite bloqueada por otra
+                # instancia) solo invalida este bloque; el lote continúa con el siguiente.
+                resultado.errores.extend((indice, f"No se pudo guardar la factura: {e}") for indice in indices)
+                fallidos = set(indices)
+                facturas = [(i, f) for i, f in facturas if i not in fallidos]
+            else:
+                if diario:
+                    diario.anotar_guardados(indices)
+                self._registrar_clientes([f for _, f in nuevas])
+        resultado.numeros.extend(f.numero for _, f in facturas)
+
+        # 4. Genera los PDFs; un fallo aquí no deshace la factura ya guardada.
+        # Los PDFs anotados en el diario se omiten, salvo con un escritor combinado,
+        # que vuelve a crear el archivo de salida completo.
+        if not renderizar:
+            return
+        if diario and salida is None:
+            facturas = [(i, f) for i, f in facturas if i not in diario.renderizados]
+        with metricas.etapa("lote.renderizado"):
+            generados = self._renderizar_bloque(facturas, resultado, renderizador, salida)
+        if diario:
+            diario.anotar_renderizados(generados)
+
+    def _renderizar_bloque(
+        self,
+        facturas: list[tuple[int, Factura]],
+        resultado: ResultadoLote,
+        renderizador: Optional["RenderizadorParalelo"],
+        salida,
+    ) -> list[int]:
+        """
+        Genera los PDFs de las facturas ya guardadas de un bloque (ver _procesar_bloque).
+        
+        Args:
+            facturas (list[tuple[int, Factura]]): Pares (índice en la entrada, factura guardada).
+            resultado (ResultadoLote): El resultado que se va completando.
+            renderizador (Optional[RenderizadorParalelo]): Pool para generar los PDFs en paralelo.
+            salida: Escritor que reúne los PDFs en un solo archivo (ver procesar_lote).
+            
+        Returns:
+            list[int]: Los índices de los registros cuyo PDF se generó.
+        """
+        generados = []
+        if renderizador:
+            # Los resultados llegan en orden de finalización; se asocian por número de factura.
+            indices = {f.numero: indice for indice, f in facturas}
+            for factura, _, error in renderizador.renderizar([f for _, f in facturas]):
+                if error is None:
+                    resultado.pdfs += 1
+                    generados.append(indices[factura.numero])
+                else:
+                    resultado.errores.append(
+                        (indices[factura.numero], f"Factura {factura.numero} guardada, pero falló el PDF: {error}")
+                    )
+            return generados
+        # Sin escritor combinado, cada factura se exporta a su propio archivo.
+        if salida is not None:
+            exportar = salida.agregar
+        else:
+            from src.pdf.pdf_generator import generar_pdf
+            exportar = generar_pdf
+        for indice, factura in facturas:
+            try:
+                exportar(factura)
+                resultado.pdfs += 1
+                generados.append(indice)
+            except Exception as e:
+                resultado.errores.append((indice, f"Factura {factura.numero} guardada, pero falló el PDF: {e}"))
+        return generados
@@ -0,0 +1,361 @@
+# src/logic/lote.py
+# Este módulo contiene las piezas de la facturación por lotes:
+# la lectura de los archivos de entrada (JSON lines o CSV), el
+# resumen de resultados que devuelve InvoiceManager.procesar_lote,
+# el reporte de InvoiceManager.validar_lote y el diario que permite
+# reanudar un lote interrumpido.
+
+import os
+import csv
+import json
+import hashlib
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from src.db.models import Cliente, Factura, Producto, Productos
+
+# Un registro de entrada ya interpretado: el cliente y sus productos, con la fecha
+# de emisión opcional; o la excepción que impidió interpretarlo.
+Registro = Union[tuple[Cliente, Sequence[Producto], Optional[datetime]], Exception]
+
+# Formato de las fechas anotadas en el diario; el mismo con que se guardan las facturas.
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+
+class ResultadoLote:
+    """Resume el resultado de un lote: facturas generadas, fallos por registro y rendimiento."""
+    def __init__(self):
+        """Inicializa un resultado vacío."""
+        # Cantidad de registros leídos de la entrada (válidos o no).
+        self.registros = 0
+        # Números de las facturas guardadas, en el orden de la entrada.
+        self.numeros: list[int] = []
+        # Cantidad de PDFs generados correctamente.
+        self.pdfs = 0
+        # Lista de (índice del registro en la entrada, mensaje de error).
+        self.errores: list[tuple[int, str]] = []
+        # Duración total del lote, en segundos.
+        self.segundos = 0.0
+        # Registros que ya estaban completos en una ejecución anterior (ver DiarioLote).
+        self.reanudados = 0
+
+    @property
+    def facturas_por_segundo(self) -> float:
+        """
+        Calcula el rendimiento del lote.
+
+        Returns:
+            float: Facturas guardadas por segundo, o 0 si el lote no tomó tiempo.
+        """
+        return len(self.numeros) / self.segundos if self.segundos else 0.0
+
+    def resumen(self) -> str:
+        """
+        Genera un texto breve con los totales del lote.
+
+        Returns:
+            str: El resumen legible del resultado.
+        """
+        rango = f" (No. {self.numeros[0]} a {self.numeros[-1]})" if self.numeros else ""
+        reanudados = f", {self.reanudados} ya procesados antes" if self.reanudados else ""
+        return (
+            f"{self.registros} registros, {len(self.numeros)} facturas guardadas{rango}, "
+            f"{self.pdfs} PDFs, {len(self.errores)} errores{reanudados} en {self.segundos:.2f} s "
+            f"({self.facturas_por_segundo:.1f} facturas/s)"
+        )
+
+
+class ReporteValidacion:
+    """
+    Resultado de validar un lote por columnas (ver InvoiceManager.validar_lote):
+    el primer error de cada fila, sin detenerse en la primera fila inválida.
+    """
+    def __init__(self):
+        """Inicializa un reporte vacío."""
+        # Cantidad de filas (productos) revisadas.
+        self.filas = 0
+        # Cantidad de facturas revisadas (grupos de filas consecutivas con la misma referencia).
+        self.facturas = 0
+        # Lista de (número de fila, desde 0, mensaje de error), en orden de fila.
+        self.errores: list[tuple[int, str]] = []
+        # Referencias de las facturas con alguna fila inválida; no se podrían guardar.
+        self.referencias_invalidas: set[str] = set()
+
+    @property
+    def valido(self) -> bool:
+        """True si ninguna fila tiene errores."""
+        return not self.errores
+
+    def unir(self, otro: "ReporteValidacion") -> None:
+        """
+        Agrega a este reporte el de un bloque posterior del mismo lote.
+
+        Args:
+            otro (ReporteValidacion): El reporte del bloque siguiente.
+        """
+        self.filas += otro.filas
+        self.facturas += otro.facturas
+        self.errores.extend(otro.errores)
+        self.referencias_invalidas.update(otro.referencias_invalidas)
+
+    def resumen(self) -> str:
+        """
+        Genera un texto breve con los totales de la validación.
+
+        Returns:
+            str: El resumen legible del reporte.
+        """
+        return (
+            f"{self.filas} filas, {self.facturas} facturas, {len(self.errores)} filas con errores, "
+            f"{len(self.referencias_invalidas)} facturas inválidas"
+        )
+
+
+class DiarioLote:
+    """
+    Diario de un lote en un archivo JSON lines, para reanudarlo si se interrumpe.
+    Anota, por índice de registro de la entrada, el número y la fecha asignados
+    (antes de escribir la factura), las facturas guardadas y los PDFs generados.
+    Al volver a ejecutar el mismo lote con el mismo diario, los registros ya
+    guardados conservan su número y su fecha, y los pasos completos no se repiten.
+
+    Cada anotación se fuerza a disco antes de continuar. Una última línea
+    incompleta (por un corte a mitad de la escritura) se ignora al leer.
+    """
+
+    def __init__(self, ruta: str, entrada: Optional[str] = None):
+        """
+        Abre el diario, leyendo lo anotado en ejecuciones anteriores.
+
+        Args:
+            ruta (str): Ruta del diario; se crea si no existe.
+            entrada (Optional[str]): Archivo de entrada del lote. Si se indica, se anota
+                su huella y se rechaza un diario creado para otro contenido.
+
+        Raises:
+            ValueError: Si el diario corresponde a otro archivo de entrada.
+        """
+        self.ruta = ruta
+        # Índice del registro -> (número, fecha de emisión, identificación del cliente).
+        self.numerados: dict[int, tuple[int, str, str]] = {}
+        self.guardados: set[int] = set()
+        self.renderizados: set[int] = set()
+        huella = _huella_archivo(entrada) if entrada else None
+        huella_anotada = self._leer()
+        if huella and huella_anotada and huella != huella_anotada:
+            raise ValueError(f"El diario '{ruta}' corresponde a otro archivo de entrada.")
+        self._archivo = open(ruta, mode="a", encoding="utf-8")
+        if huella and not huella_anotada:
+            self._anotar({"tipo": "lote", "entrada": huella})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def pendientes(self) -> dict[int, tuple[int, str, str]]:
+        """
+        Devuelve los registros que recibieron número pero cuya escritura no se confirmó:
+        la ejecución anterior se interrumpió mientras se guardaban.
+
+        Returns:
+            dict[int, tuple[int, str, str]]: Índice -> (número, fecha, identificación del cliente).
+        """
+        return {i: datos for i, datos in self.numerados.items() if i not in self.guardados}
+
+    def fecha(self, indice: int) -> datetime:
+        """Devuelve la fecha de emisión anotada para un registro numerado."""
+        return datetime.strptime(self.numerados[indice][1], FORMATO_FECHA)
+
+    def numero(self, indice: int) -> int:
+        """Devuelve el número anotado para un registro numerado."""
+        return self.numerados[indice][0]
+
+    def anotar_numerados(self, indices: Iterable[int], facturas: Iterable[Factura]) -> None:
+        """
+        Anota el número y la fecha asignados a cada registro, antes de guardar sus facturas.
+
+        Args:
+            indices (Iterable[int]): Los índices de los registros en la entrada.
+            facturas (Iterable[Factura]): Sus facturas ya numeradas, en el mismo orden.
+        """
+        filas = [
+            [i, f.numero, f.fecha_emision.strftime(FORMATO_FECHA), f.cliente.identificacion]
+            for i, f in zip(indices, facturas)
+        ]
+        self._anotar({"tipo": "numerados", "facturas": filas})
+        for i, numero, fecha, identificacion in filas:
+            self.numerados[i] = (numero, fecha, identificacion)
+
+    def anotar_guardados(self, indices: Iterable[int]) -> None:
+        """Anota que las facturas de estos registros quedaron guardadas."""
+        indices = list(indices)
+        if indices:
+            self._anotar({"tipo": "guardados", "indices": indices})
+            self.guardados.update(indices)
+
+    def anotar_descartados(self, indices: Iterable[int]) -> None:
+        """Anota que estos registros no llegaron a guardarse y deben numerarse de nuevo."""
+        indices = list(indices)
+        if indices:
+            self._anotar({"tipo": "descartados", "indices": indices})
+            for i in indices:
+                self.numerados.pop(i, None)
+
+    def anotar_renderizados(self, indices: Iterable[int]) -> None:
+        """Anota que los PDFs de estos registros se generaron."""
+        indices = list(indices)
+        if indices:
+            self._anotar({"tipo": "renderizados", "indices": indices})
+            self.renderizados.update(indices)
+
+    def cerrar(self) -> None:
+        """Cierra el archivo del diario."""
+        self._archivo.close()
+
+    def _anotar(self, entrada: dict) -> None:
+        """Agrega una línea al diario y la fuerza a disco."""
+        self._archivo.write(json.dumps(entrada, separators=(",", ":")) + "\n")
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def _leer(self) -> Optional[str]:
+        """
+        Reconstruye el estado a partir de las líneas del diario.
+
+        Returns:
+            Optional[str]: La huella de la entrada anotada, si la hay.
+        """
+        huella = None
+        if not os.path.exists(self.ruta):
+            return huella
+        # Bytes del diario ocupados por líneas completas.
+        validos = 0
+        with open(self.ruta, mode="rb+") as f:
+            for linea in f:
+                try:
+                    if not linea.endswith(b"\n"):
+                        raise ValueError("línea incompleta")
+                    entrada = json.loads(linea)
+                except ValueError:
+                    # Solo la última línea puede estar incompleta (un corte a mitad de la
+                    # escritura); se recorta para que las nuevas anotaciones empiecen limpias.
+                    f.truncate(validos)
+                    break
+                validos += len(linea)
+                tipo = entrada.get("tipo")
+                if tipo == "lote":
+                    huella = entrada["entrada"]
+                elif tipo == "numerados":
+                    for i, numero, fecha, identificacion in entrada["facturas"]:
+                        self.numerados[i] = (numero, fecha, identificacion)
+                elif tipo == "guardados":
+                    self.guardados.update(entrada["indices"])
+                elif tipo == "descartados":
+                    for i in entrada["indices"]:
+                        self.numerados.pop(i, None)
+                elif tipo == "renderizados":
+                    self.renderizados.update(entrada["indices"])
+        return huella
+
+
+def _huella_archivo(ruta: str) -> str:
+    """Calcula el SHA-256 del contenido de un archivo, leyéndolo por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, mode="rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def leer_registros(ruta: str) -> Iterator[Registro]:
+    """
+    Lee un archivo de entrada eligiendo el formato según su extensión.
+    Los archivos '.csv' se leen con leer_registros_csv; el resto como JSON lines.
+
+    Args:
+        ruta (str): Ruta del archivo de entrada.
+
+    Yields:
+        Registro: Cada registro interpretado, o la excepción que lo invalidó.
+    """
+    if os.path.splitext(ruta)[1].lower() == ".csv":
+        return leer_registros_csv(ruta)
+    return leer_registros_jsonl(ruta)
+
+
+def leer_registros_jsonl(ruta: str) -> Iterator[Registro]:
+    """
+    Lee un archivo JSON lines con una factura por línea, con la forma:
+    {"cliente": {"nombre", "identificacion", "direccion", "telefono"},
+     "productos": [{"descripcion", "cantidad", "precio_unitario"}, ...],
+     "fecha_emision": "AAAA-MM-DD HH:MM:SS" (opcional)}
+
+    Args:
+        ruta (str): Ruta del archivo de entrada.
+
+    Yields:
+        Registro: Cada registro interpretado, o la excepción que lo invalidó.
+    """
+    with open(ruta, mode="r", encoding="utf-8") as f:
+        for linea in f:
+            # Las líneas en blanco no cuentan como registros.
+            if not linea.strip():
+                continue
+            try:
+                datos = json.loads(linea)
+                cliente = Cliente(**datos["cliente"])
+                # Productos lleva el total al día a medida que se agregan las líneas.
+                productos = Productos(
+                    Producto(p["descripcion"], int(p["cantidad"]), float(p["precio_unitario"]))
+                    for p in datos["productos"]
+                )
+                fecha = datos.get("fecha_emision")
+                fecha_emision = datetime.fromisoformat(fecha) if fecha else None
+            except (ValueError, KeyError, TypeError) as e:
+                # El registro se entrega como error para que el lote continúe con los siguientes.
+                yield ValueError(f"Registro inválido: {e!r}")
+                continue
+            yield cliente, productos, fecha_emision
+
+
+def leer_registros_csv(ruta: str) -> Iterator[Registro]:
+    """
+    Lee un archivo CSV con un producto por fila y las columnas:
+    referencia, cliente_nombre, cliente_identificacion, cliente_direccion,
+    cliente_telefono, descripcion, cantidad, precio_unitario.
+    Las filas consecutivas con la misma 'referencia' forman una sola factura.
+
+    Args:
+        ruta (str): Ruta del archivo de entrada.
+
+    Yields:
+        Registro: Cada registro interpretado, o la excepción que lo invalidó.
+    """
+    with open(ruta, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        referencia = None
+        cliente = None
+        productos = Productos()
+        error = None
+        for row in reader:
+            if row["referencia"] != referencia:
+                # Empieza una nueva factura: entrega la anterior, si la hay.
+                if referencia is not None:
+                    yield error or (cliente, productos, None)
+                referencia = row["referencia"]
+                cliente = Cliente(
+                    nombre=row["cliente_nombre"],
+                    identificacion=row["cliente_identificacion"],
+                    direccion=row["cliente_direccion"],
+                    telefono=row["cliente_telefono"],
+                )
+                productos = Productos()
+                error = None
+            try:
+                productos.append(Producto(row["descripcion"], int(row["cantidad"]), float(row["precio_unitario"])))
+            except (ValueError, TypeError) as e:
+                # Un producto inválido invalida toda la factura, pero no el resto del archivo.
+                error = ValueError(f"Referencia '{referencia}': producto inválido: {e}")
+        if referencia is not None:
+            yield error or (cliente, productos, None)
@@ -0,0 +1,242 @@
+# src/pdf/cache_render.py
+# Este módulo implementa una caché de PDFs ya generados.
+# Cada PDF del directorio de salida se registra con una huella (hash) del
+# contenido de su factura y de la versión de la plantilla; si se pide de nuevo
+# el PDF de una factura que no cambió, se devuelve el archivo existente sin
+# volver a dibujarlo. El tamaño total se limita descartando los PDFs usados
+# hace más tiempo (LRU); se pueden volver a generar desde las facturas guardadas.
+#
+# Este módulo no depende de ReportLab: solo lleva el registro de los archivos.
+
+import os
+import json
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Optional
+from src.db.models import Factura
+
+# Nombre del índice de la caché dentro del directorio de salida.
+NOMBRE_INDICE = ".cache_render.json"
+# Tamaño máximo por defecto de los PDFs registrados (1 GiB).
+MAX_BYTES = 1024 ** 3
+# Cantidad de cambios tras la cual el índice se guarda en disco.
+GUARDAR_CADA = 100
+
+
+def admite_cache(factura: Factura) -> bool:
+    """
+    Indica si la factura puede pasar por la caché. Calcular la huella recorre los
+    productos antes de dibujarlos, así que solo se admite una colección que se pueda
+    recorrer más de una vez (una lista o Productos); un generador se agotaría y el
+    PDF saldría sin productos.
+
+    Args:
+        factura (Factura): La factura a generar.
+
+    Returns:
+        bool: True si se puede calcular su huella sin consumir los productos.
+    """
+    return isinstance(factura.productos, Sequence)
+
+
+def huella_factura(factura: Factura, version: str) -> str:
+    """
+    Calcula una huella estable del contenido de una factura: dos facturas con los
+    mismos datos (y la misma versión de plantilla) producen siempre la misma huella.
+    Los productos se agregan a la huella uno a uno, sin copiarlos a una lista.
+
+    Args:
+        factura (Factura): La factura a identificar; sus productos deben admitir
+            varios recorridos (ver admite_cache).
+        version (str): Versión de la plantilla y los recursos con que se dibuja.
+
+    Returns:
+        str: La huella en hexadecimal (SHA-256).
+
+    Raises:
+        ValueError: Si los productos solo pueden recorrerse una vez.
+    """
+    if not admite_cache(factura):
+        raise ValueError("La huella requiere productos que puedan recorrerse más de una vez.")
+    datos = [
+        version,
+        factura.numero,
+        factura.fecha_emision.isoformat(),
+        factura.cliente.nombre,
+        factura.cliente.identificacion,
+        factura.cliente.direccion,
+        factura.cliente.telefono,
+    ]
+    huella = hashlib.sha256(_json(datos))
+    for p in factura.productos:
+        # Cada producto es una lista JSON completa, así que los límites entre productos no son ambiguos.
+        huella.update(_json([p.descripcion, p.cantidad, p.precio_unitario]))
+    return huella.hexdigest()
+
+
+def _json(datos) -> bytes:
+    """Codifica datos como JSON compacto en UTF-8, para la huella."""
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CacheRender:
+    """
+    Registro de los PDFs de un directorio, con su huella y su tamaño, en orden de uso.
+    Cuenta aciertos, fallos y archivos descartados para medir su efectividad.
+    """
+
+    def __init__(self, directorio: str, max_bytes: Optional[int] = MAX_BYTES):
+        """
+        Args:
+            directorio (str): El directorio de los PDFs; ahí se guarda también el índice.
+            max_bytes (Optional[int]): Tamaño total máximo de los PDFs registrados.
+                Si es None, no se descarta ningún archivo.
+        """
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        # Nombre de archivo -> (huella, tamaño); el primero es el usado hace más tiempo.
+        self._entradas: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._bytes = 0
+        self._cambios = 0
+        self._candado = threading.RLock()
+        self._cargar()
+
+    @property
+    def ruta_indice(self) -> str:
+        """Ruta del archivo donde se guarda el índice."""
+        return os.path.join(self.directorio, NOMBRE_INDICE)
+
+    def buscar(self, ruta: str, huella: str) -> bool:
+        """
+        Indica si el archivo 'ruta' ya contiene el PDF con la huella indicada.
+        El archivo debe existir y conservar el tamaño registrado; si se borró
+        o se modificó por fuera, cuenta como fallo.
+
+        Args:
+            ruta (str): La ruta del PDF dentro del directorio de la caché.
+            huella (str): La huella de la factura (ver huella_factura).
+
+        Returns:
+            bool: True si se puede reutilizar el archivo existente.
+        """
+        nombre = os.path.basename(ruta)
+        with self._candado:
+            entrada = self._entradas.get(nombre)
+            if entrada is not None and entrada[0] == huella and _tamano(ruta) == entrada[1]:
+                self._entradas.move_to_end(nombre)
+                self.aciertos += 1
+                self._registrar_cambio()
+                return True
+            self.fallos += 1
+            return False
+
+    def registrar(self, ruta: str, huella: str) -> None:
+        """
+        Registra un PDF recién generado y descarta los más antiguos si se supera el tamaño máximo.
+
+        Args:
+            ruta (str): La ruta del PDF generado, dentro del directorio de la caché.
+            huella (str): La huella de la factura que contiene.
+        """
+        tamano = _tamano(ruta)
+        if tamano is None:
+            return
+        nombre = os.path.basename(ruta)
+        with self._candado:
+            anterior = self._entradas.pop(nombre, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[nombre] = (huella, tamano)
+            self._bytes += tamano
+            # Descarta los PDFs usados hace más tiempo, pero nunca el recién generado.
+            while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entradas) > 1:
+                viejo, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self._bytes -= tamano_viejo
+                try:
+                    os.remove(os.path.join(self.directorio, viejo))
+                except OSError:
+                    pass
+                self.desalojos += 1
+            self._registrar_cambio()
+
+    def guardar(self) -> None:
+        """Guarda el índice en disco de forma atómica (archivo temporal y reemplazo)."""
+        with self._candado:
+            if not os.path.isdir(self.directorio):
+                return
+            temporal = self.ruta_indice + ".tmp"
+            with open(temporal, mode="w", encoding="utf-8") as f:
+                json.dump({"entradas": [[n, h, t] for n, (h, t) in self._entradas.items()]}, f)
+            os.replace(temporal, self.ruta_indice)
+            self._cambios = 0
+
+    def estadisticas(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: aciertos, fallos, desalojos, tasa de aciertos, archivos y bytes registrados.
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "archivos": len(self._entradas),
+            "bytes": self._bytes,
+        }
+
+    def _cargar(self) -> None:
+        """Lee el índice guardado; uno ilegible se trata como una caché vacía."""
+        try:
+            with open(self.ruta_indice, mode="r", encoding="utf-8") as f:
+                entradas = json.load(f)["entradas"]
+            for nombre, huella, tamano in entradas:
+                self._entradas[nombre] = (huella, int(tamano))
+                self._bytes += int(tamano)
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _registrar_cambio(self) -> None:
+        """Cuenta un cambio del índice y lo guarda cada GUARDAR_CADA cambios. Requiere el candado."""
+        self._cambios += 1
+        if self._cambios >= GUARDAR_CADA:
+            self.guardar()
+
+
+def _tamano(ruta: str) -> Optional[int]:
+    """Devuelve el tamaño de un archivo, o None si no existe."""
+    try:
+        return os.path.getsize(ruta)
+    except OSError:
+        return None
+
+
+# Cachés abiertas, una por directorio de salida.
+_caches: dict[str, CacheRender] = {}
+
+
+def cache_de(directorio: str) -> CacheRender:
+    """
+    Devuelve la caché del directorio indicado, creándola la primera vez.
+    El índice se guarda también al terminar el proceso.
+
+    Args:
+        directorio (str): El directorio de los PDFs.
+
+    Returns:
+        CacheRender: La caché compartida de ese directorio.
+    """
+    cache = _caches.get(directorio)
+    if cache is None:
+        cache = _caches[directorio] = CacheRender(directorio)
+        atexit.register(cache.guardar)
+    return cache
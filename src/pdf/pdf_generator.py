@@ -3,10 +3,17 @@
 # Utiliza la librería ReportLab para dibujar el contenido del documento.
 
 import os
+import io
+import hashlib
+import zipfile
+from typing import BinaryIO, Iterable, Optional
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
 from reportlab.lib.units import mm
 from src.db.models import Factura
+from src.pdf import cache_render
+from src.utils import dinero, metricas
 
 # --- Definición de rutas ---
 # BASE_DIR apunta a la carpeta 'src'
@@ -16,42 +23,409 @@ ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 # OUTPUT_DIR es la ruta donde se guardarán los PDFs generados.
 OUTPUT_DIR = os.path.join(BASE_DIR, "..", "output")
 
+# Versión de la plantilla. Forma parte de la huella de la caché de PDFs (ver cache_render):
+# al cambiar cómo se dibuja una factura, se incrementa para que los PDFs viejos se regeneren.
+VERSION_PLANTILLA = 2
 
-def generar_pdf(factura: Factura) -> str:
+# --- Medidas de la tabla de productos ---
+# Separación vertical entre filas.
+ALTO_FILA = 20
+# Por debajo de esta altura no se dibujan filas; queda espacio para el subtotal y el pie de página.
+MARGEN_INFERIOR = 70
+
+
+class ContextoRender:
+    """
+    Recursos que se comparten entre todos los PDFs generados: el logo ya leído y
+    decodificado, y la plantilla del encabezado de la empresa. Evita volver a leer
+    y decodificar la imagen en cada factura; si el archivo del logo cambia en el
+    disco, se vuelve a cargar automáticamente.
+    """
+    # Nombre con el que se registra el encabezado dentro de cada PDF.
+    NOMBRE_ENCABEZADO = "EncabezadoEmpresa"
+
+    def __init__(self, ruta_logo: Optional[str] = None):
+        """
+        Inicializa el contexto. El logo se carga la primera vez que se necesita.
+        
+        Args:
+            ruta_logo (Optional[str]): Ruta de la imagen del logo. Por defecto, 'assets/logo.jpg'.
+        """
+        self.ruta_logo = ruta_logo or os.path.join(ASSETS_DIR, "logo.jpg")
+        # Imagen del logo lista para insertar en un PDF, y la firma del archivo del que salió.
+        self._logo = None
+        self._firma_logo = None
+        # Hash del contenido del logo, para la versión de los recursos, y la firma con que se calculó.
+        self._huella_logo = None
+        self._firma_huella = None
+
+    def version(self) -> str:
+        """
+        Identifica la plantilla y los recursos con que se dibujan las facturas.
+        Cambia si cambia VERSION_PLANTILLA o el contenido del logo.
+        
+        Returns:
+            str: La versión, por ejemplo "1:3fa2c0d19b7e4a21".
+        """
+        try:
+            estado = os.stat(self.ruta_logo)
+        except OSError:
+            return f"{VERSION_PLANTILLA}:sin-logo"
+        firma = (estado.st_mtime_ns, estado.st_size)
+        if firma != self._firma_huella:
+            # El contenido, y no la fecha, identifica al logo: copiarlo no invalida la caché.
+            with open(self.ruta_logo, mode="rb") as f:
+                self._huella_logo = hashlib.sha256(f.read()).hexdigest()[:16]
+            self._firma_huella = firma
+        return f"{VERSION_PLANTILLA}:{self._huella_logo}"
+
+    def logo(self) -> Optional[ImageReader]:
+        """
+        Devuelve el logo ya leído, recargándolo solo si el archivo cambió.
+        
+        Returns:
+            Optional[ImageReader]: La imagen del logo, o None si el archivo no existe.
+        """
+        try:
+            estado = os.stat(self.ruta_logo)
+        except OSError:
+            self._logo = self._firma_logo = None
+            return None
+        # La fecha de modificación y el tamaño identifican la versión del archivo.
+        firma = (estado.st_mtime_ns, estado.st_size)
+        if firma != self._firma_logo:
+            # Se leen los bytes para no dejar el archivo abierto mientras viva el contexto.
+            with open(self.ruta_logo, mode="rb") as f:
+                self._logo = ImageReader(io.BytesIO(f.read()))
+            self._firma_logo = firma
+        return self._logo
+
+    def dibujar_encabezado(self, c: canvas.Canvas) -> None:
+        """
+        Dibuja el logo y los datos de la empresa en la página actual.
+        La primera vez en cada documento se guardan como una plantilla (Form XObject)
+        que las páginas siguientes reutilizan sin volver a dibujarla.
+        
+        Args:
+            c (canvas.Canvas): El lienzo del PDF que se está generando.
+        """
+        if not c.hasForm(self.NOMBRE_ENCABEZADO):
+            c.beginForm(self.NOMBRE_ENCABEZADO)
+            self._dibujar_encabezado_empresa(c)
+            c.endForm()
+        c.doForm(self.NOMBRE_ENCABEZADO)
+
+    def _dibujar_encabezado_empresa(self, c: canvas.Canvas) -> None:
+        """Dibuja el contenido fijo del encabezado: el logo y los datos de la empresa."""
+        width, height = A4  # Obtiene el ancho y alto de una página A4.
+
+        # --- Dibuja el Logo de la Empresa ---
+        logo = self.logo()
+        if logo is not None:
+            # Dibuja la imagen en la esquina superior izquierda.
+            # Las coordenadas (0,0) en ReportLab están en la esquina inferior izquierda.
+            self._dibujar_logo(c, logo, 30, height - 100, 80, 80)
+
+        # --- Dibuja el Encabezado con los datos de la Empresa ---
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(120, height - 50, "Mi Empresa S.A.")
+        c.setFont("Helvetica", 10)
+        c.drawString(120, height - 65, "NIT: 123456789-0")
+        c.drawString(120, height - 80, "Dirección: Calle Falsa 123")
+        c.drawString(120, height - 95, "Teléfono: 555-1234")
+
+    @staticmethod
+    def _dibujar_logo(c: canvas.Canvas, logo: ImageReader, x: float, y: float, ancho: float, alto: float) -> None:
+        """
+        Dibuja el logo con canvas.drawImage. El mismo ImageReader conserva los píxeles
+        ya decodificados entre documentos, y ReportLab registra la imagen una sola vez
+        por documento porque la nombra según su contenido.
+        """
+        c.drawImage(logo, x, y, width=ancho, height=alto, mask="auto")
+
+
+# Contexto usado cuando no se indica uno; se comparte entre todas las llamadas del proceso.
+_contexto_predeterminado = ContextoRender()
+
+
+def generar_pdf(factura: Factura, contexto: Optional[ContextoRender] = None, usar_cache: bool = True) -> str:
     """
     Genera un archivo PDF para una factura dada.
+    Si el archivo ya existe y fue generado con los mismos datos y la misma
+    plantilla, se devuelve sin volver a dibujarlo (ver cache_render). Una factura
+    cuyos productos son un generador no pasa por la caché: se dibuja siempre,
+    recorriendo los productos una sola vez.
     
     Args:
         factura (Factura): El objeto de factura con todos los datos a imprimir.
+        contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+            Si es None, se usa el contexto predeterminado del módulo.
+        usar_cache (bool): Si es False, siempre vuelve a generar el archivo.
         
     Returns:
         str: La ruta del archivo PDF generado.
     """
+    contexto = contexto or _contexto_predeterminado
+    # Define el nombre del archivo PDF usando el número de la factura.
+    filename = ruta_pdf(factura)
+    usar_cache = usar_cache and cache_render.admite_cache(factura)
+
+    if usar_cache:
+        cache = cache_render.cache_de(OUTPUT_DIR)
+        huella = huella_pdf(factura, contexto)
+        if cache.buscar(filename, huella):
+            metricas.contar("pdf.cache_aciertos")
+            return filename
+
     # Asegura que el directorio de salida exista; si no, lo crea.
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    # Define el nombre del archivo PDF usando el número de la factura.
-    filename = os.path.join(OUTPUT_DIR, f"factura_{factura.numero}.pdf")
+    # Dibuja el PDF directamente sobre el archivo abierto en modo binario.
+    with open(filename, mode="wb") as f:
+        escribir_pdf(factura, f, contexto)
+
+    if metricas.ACTIVO:
+        metricas.observar("pdf.tamano_bytes", os.path.getsize(filename))
+    if usar_cache:
+        cache.registrar(filename, huella)
+    # Devuelve la ruta completa del archivo generado.
+    return filename
+
+
+def huella_pdf(factura: Factura, contexto: Optional[ContextoRender] = None) -> str:
+    """
+    Calcula la huella con que la caché identifica el PDF de una factura:
+    cambia si cambian los datos de la factura, la plantilla o el logo.
     
-    # Crea un objeto Canvas, que es el "lienzo" sobre el que se dibuja el PDF.
-    c = canvas.Canvas(filename, pagesize=A4)
-    width, height = A4  # Obtiene el ancho y alto de una página A4.
+    Args:
+        factura (Factura): La factura.
+        contexto (Optional[ContextoRender]): Recursos con que se dibuja.
+        
+    Returns:
+        str: La huella (ver cache_render.huella_factura).
+    """
+    return cache_render.huella_factura(factura, (contexto or _contexto_predeterminado).version())
 
-    # --- Dibuja el Logo de la Empresa ---
-    logo_path = os.path.join(ASSETS_DIR, "logo.jpg")
-    if os.path.exists(logo_path):
-        # Dibuja la imagen en la esquina superior izquierda.
-        # Las coordenadas (0,0) en ReportLab están en la esquina inferior izquierda.
-        c.drawImage(logo_path, 30, height - 100, width=80, height=80, mask="auto")
 
-    # --- Dibuja el Encabezado con los datos de la Empresa ---
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(120, height - 50, "Mi Empresa S.A.")
-    c.setFont("Helvetica", 10)
-    c.drawString(120, height - 65, "NIT: 123456789-0")
-    c.drawString(120, height - 80, "Dirección: Calle Falsa 123")
-    c.drawString(120, height - 95, "Teléfono: 555-1234")
+def ruta_pdf(factura: Factura) -> str:
+    """
+    Devuelve la ruta del archivo en que generar_pdf guarda una factura.
+    
+    Args:
+        factura (Factura): La factura.
+        
+    Returns:
+        str: La ruta 'output/factura_{numero}.pdf'.
+    """
+    return os.path.join(OUTPUT_DIR, f"factura_{factura.numero}.pdf")
+
+
+def escribir_pdf(factura: Factura, destino: BinaryIO, contexto: Optional[ContextoRender] = None) -> None:
+    """
+    Genera el PDF de una factura y lo escribe en un flujo binario abierto por quien llama
+    (un archivo, un io.BytesIO, la respuesta de un servidor...). El flujo no se cierra.
+    
+    Args:
+        factura (Factura): El objeto de factura con todos los datos a imprimir.
+        destino (BinaryIO): El flujo donde se escriben los bytes del PDF.
+        contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+    """
+    with metricas.etapa("pdf.renderizado"):
+        # Crea un objeto Canvas, que es el "lienzo" sobre el que se dibuja el PDF.
+        c = canvas.Canvas(destino, pagesize=A4)
+        # Dibuja todas las páginas de la factura.
+        _dibujar_factura(c, factura, contexto or _contexto_predeterminado)
+        # Escribe el documento terminado en el flujo.
+        c.save()
+    metricas.contar("pdf.generados")
+
+
+def generar_pdf_bytes(factura: Factura, contexto: Optional[ContextoRender] = None) -> bytes:
+    """
+    Genera el PDF de una factura en memoria, sin escribir ningún archivo.
+    Útil para enviarlo por HTTP o adjuntarlo a un correo.
+    
+    Args:
+        factura (Factura): El objeto de factura con todos los datos a imprimir.
+        contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+        
+    Returns:
+        bytes: El contenido del PDF.
+    """
+    buffer = io.BytesIO()
+    escribir_pdf(factura, buffer, contexto)
+    datos = buffer.getvalue()
+    metricas.observar("pdf.tamano_bytes", len(datos))
+    return datos
+
+
+class EscritorPdfCombinado:
+    """
+    Escribe varias facturas en un único PDF, cada una a partir de una página nueva
+    y con un marcador (bookmark) con su número para navegar el documento.
+    ReportLab conserva las páginas en memoria hasta cerrar el archivo; para
+    lotes muy grandes conviene EscritorZip, que libera cada factura al escribirla.
+    """
+    def __init__(self, ruta: str, contexto: Optional[ContextoRender] = None):
+        """
+        Inicializa el documento combinado.
+        
+        Args:
+            ruta (str): Ruta del PDF que se va a crear.
+            contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+        """
+        self.ruta = ruta
+        self.contexto = contexto or _contexto_predeterminado
+        # Número de factura -> página (empezando en 1) donde comienza dentro del PDF.
+        self.indice: dict[int, int] = {}
+        self._canvas = canvas.Canvas(ruta, pagesize=A4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def agregar(self, factura: Factura) -> int:
+        """
+        Dibuja una factura a continuación de las anteriores.
+        
+        Args:
+            factura (Factura): La factura a agregar.
+            
+        Returns:
+            int: La página donde comienza la factura.
+        """
+        c = self._canvas
+        pagina = c.getPageNumber()
+        # La clave se forma con la página, que no se repite aunque se repita el número de factura.
+        clave = f"factura_{pagina}"
+        # El marcador apunta a la primera página de la factura y aparece en el índice del visor.
+        c.bookmarkPage(clave)
+        c.addOutlineEntry(f"Factura {factura.numero}", clave, level=0)
+        with metricas.etapa("pdf.renderizado"):
+            _dibujar_factura(c, factura, self.contexto)
+        metricas.contar("pdf.generados")
+        self.indice[factura.numero] = pagina
+        return pagina
+
+    def cerrar(self) -> None:
+        """Guarda el PDF en el disco."""
+        self._canvas.save()
+
+
+class EscritorZip:
+    """
+    Escribe los PDFs de varias facturas dentro de un único archivo ZIP.
+    Cada factura se genera en memoria, se agrega al ZIP y se descarta, de modo que
+    la memoria usada no depende de la cantidad de facturas.
+    """
+    def __init__(self, ruta: str, contexto: Optional[ContextoRender] = None):
+        """
+        Inicializa el archivo ZIP.
+        
+        Args:
+            ruta (str): Ruta del ZIP que se va a crear.
+            contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+        """
+        self.ruta = ruta
+        self.contexto = contexto or _contexto_predeterminado
+        # Número de factura -> (posición del PDF dentro del ZIP, tamaño en bytes).
+        self.indice: dict[int, tuple[int, int]] = {}
+        # Los PDFs ya vienen comprimidos, así que se guardan sin volver a comprimir.
+        # Así, además, cada PDF puede extraerse leyendo directamente su rango de bytes.
+        self._zip = zipfile.ZipFile(ruta, mode="w", compression=zipfile.ZIP_STORED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def agregar(self, factura: Factura) -> tuple[int, int]:
+        """
+        Genera el PDF de una factura y lo agrega al ZIP como 'factura_{numero}.pdf'.
+        
+        Args:
+            factura (Factura): La factura a agregar.
+            
+        Returns:
+            tuple[int, int]: La posición del PDF dentro del ZIP y su tamaño en bytes.
+        """
+        datos = generar_pdf_bytes(factura, self.contexto)
+
+        self._zip.writestr(f"factura_{factura.numero}.pdf", datos)
+        # Tras escribir, el archivo queda justo al final de los datos del PDF.
+        posicion = (self._zip.fp.tell() - len(datos), len(datos))
+        self.indice[factura.numero] = posicion
+        return posicion
+
+    def cerrar(self) -> None:
+        """Escribe el directorio central y cierra el ZIP."""
+        self._zip.close()
+
+
+def generar_pdf_combinado(facturas: Iterable[Factura], ruta: str, contexto: Optional[ContextoRender] = None) -> dict[int, int]:
+    """
+    Genera un único PDF con todas las facturas, con un marcador por número de factura.
+    
+    Args:
+        facturas (Iterable[Factura]): Las facturas a incluir, en orden.
+        ruta (str): Ruta del PDF que se va a crear.
+        contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+        
+    Returns:
+        dict[int, int]: Número de factura -> página donde comienza.
+    """
+    with EscritorPdfCombinado(ruta, contexto) as escritor:
+        for factura in facturas:
+            escritor.agregar(factura)
+    return escritor.indice
+
+
+def generar_zip(facturas: Iterable[Factura], ruta: str, contexto: Optional[ContextoRender] = None) -> dict[int, tuple[int, int]]:
+    """
+    Genera un ZIP con el PDF de cada factura, escribiéndolos uno a la vez.
+    
+    Args:
+        facturas (Iterable[Factura]): Las facturas a incluir, en orden.
+        ruta (str): Ruta del ZIP que se va a crear.
+        contexto (Optional[ContextoRender]): Recursos compartidos (logo, encabezado).
+        
+    Returns:
+        dict[int, tuple[int, int]]: Número de factura -> (posición del PDF dentro del ZIP, tamaño).
+    """
+    with EscritorZip(ruta, contexto) as escritor:
+        for factura in facturas:
+            escritor.agregar(factura)
+    return escritor.indice
+
+
+def _dibujar_factura(c: canvas.Canvas, factura: Factura, contexto: ContextoRender) -> int:
+    """
+    Dibuja una factura completa en el lienzo, empezando en la página actual.
+    Los productos se dibujan a medida que se recorren, sin copiarlos a una lista,
+    y la tabla continúa en páginas nuevas cuando no cabe: cada página repite el
+    encabezado de la tabla, lleva el subtotal acumulado a la siguiente y se numera
+    como "Página N de M".
+    
+    Args:
+        c (canvas.Canvas): El lienzo del PDF.
+        factura (Factura): La factura a dibujar.
+        contexto (ContextoRender): Recursos compartidos (logo, encabezado).
+        
+    Returns:
+        int: La cantidad de páginas que ocupó la factura.
+    """
+    width, height = A4  # Obtiene el ancho y alto de una página A4.
+    # Plantilla con el total de páginas; se define al final, cuando ya se conoce.
+    # Se nombra por la página donde empieza la factura, única dentro del documento aunque
+    # se repita el número (por ejemplo, vistas previas con número 0 en un PDF combinado).
+    forma_total = f"TotalPaginas{c.getPageNumber()}"
+
+    # --- Dibuja el Logo y el Encabezado con los datos de la Empresa ---
+    contexto.dibujar_encabezado(c)
 
     # --- Dibuja los Datos del Cliente y de la Factura ---
     c.setFont("Helvetica-Bold", 12)
@@ -66,30 +440,108 @@ def generar_pdf(factura: Factura) -> str:
     # --- Dibuja la Tabla de Productos ---
     # Posición vertical inicial para la tabla.
     y = height - 230
-    c.setFont("Helvetica-Bold", 10)
-    # Encabezados de la tabla
-    c.drawString(30, y, "Descripción")
-    c.drawString(250, y, "Cantidad")
-    c.drawString(320, y, "Precio")
-    c.drawString(400, y, "Subtotal")
+    _dibujar_encabezado_tabla(c, y)
 
-    c.setFont("Helvetica", 10)
+    pagina = 1
+    # Suma de los subtotales dibujados hasta ahora, en centavos; se traslada entre páginas.
+    acumulado = 0
     # Itera sobre cada producto en la factura para dibujarlo en una fila.
     for p in factura.productos:
-        y -= 20  # Mueve la posición vertical hacia abajo para la siguiente fila.
+        if y - ALTO_FILA < MARGEN_INFERIOR:
+            # La fila no cabe: cierra la página con el subtotal y continúa en una nueva.
+            y = _nueva_pagina(c, factura, contexto, pagina, forma_total, y, acumulado)
+            pagina += 1
+
+        y -= ALTO_FILA  # Mueve la posición vertical hacia abajo para la siguiente fila.
         c.drawString(30, y, p.descripcion)
         c.drawString(250, y, str(p.cantidad))
         c.drawString(320, y, f"${p.precio_unitario:.2f}")
         c.drawString(400, y, f"${p.subtotal:.2f}")
+        acumulado += p.subtotal_centavos
 
     # --- Dibuja el Total de la Factura ---
+    # El total se calcula igual que Factura.total, pero sin volver a recorrer los productos.
+    if y - 40 < MARGEN_INFERIOR:
+        # Aunque solo pase el total, la página nueva también arranca con el subtotal anterior.
+        y = _nueva_pagina(c, factura, contexto, pagina, forma_total, y, acumulado)
+        pagina += 1
     y -= 40  # Añade un espacio antes del total.
     c.setFont("Helvetica-Bold", 12)
     c.drawString(320, y, "TOTAL:")
-    c.drawString(400, y, f"${factura.total:.2f}")
+    c.drawString(400, y, f"${dinero.a_unidades(acumulado):.2f}")
+    _dibujar_pie_pagina(c, pagina, forma_total)
+    c.showPage()
 
-    # Guarda el archivo PDF en el disco.
-    c.save()
+    # Ahora que se conoce, define el total de páginas que muestran todos los pies de página.
+    c.beginForm(forma_total)
+    c.setFont("Helvetica", 9)
+    c.drawString(width / 2 + 2, 30, str(pagina))
+    c.endForm()
+    return pagina
+
+
+def _nueva_pagina(
+    c: canvas.Canvas,
+    factura: Factura,
+    contexto: ContextoRender,
+    pagina: int,
+    forma_total: str,
+    y: float,
+    acumulado: int,
+) -> float:
+    """
+    Cierra la página actual con el subtotal a trasladar y prepara la siguiente página
+    de la misma factura, que empieza con el subtotal anterior.
     
-    # Devuelve la ruta completa del archivo generado.
-    return filename
\ No newline at end of file
+    Args:
+        c (canvas.Canvas): El lienzo del PDF.
+        factura (Factura): La factura que se está dibujando.
+        contexto (ContextoRender): Recursos compartidos (logo, encabezado).
+        pagina (int): El número de la página que se cierra.
+        forma_total (str): Nombre de la plantilla con el total de páginas.
+        y (float): La posición vertical de la última fila dibujada en la página que se cierra.
+        acumulado (int): La suma de los subtotales dibujados hasta ahora, en centavos.
+        
+    Returns:
+        float: La posición vertical de la línea del subtotal anterior en la nueva página.
+    """
+    width, height = A4
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(250, y - ALTO_FILA, "Subtotal a trasladar:")
+    c.drawString(400, y - ALTO_FILA, f"${dinero.a_unidades(acumulado):.2f}")
+    _dibujar_pie_pagina(c, pagina, forma_total)
+    c.showPage()
+
+    # Repite el encabezado de la empresa y la referencia a la factura.
+    contexto.dibujar_encabezado(c)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(30, height - 130, f"Factura No: {factura.numero} (continuación)")
+    y = height - 160
+    _dibujar_encabezado_tabla(c, y)
+
+    # Trae el subtotal de las páginas anteriores antes de seguir con la tabla.
+    y -= ALTO_FILA
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(250, y, "Subtotal anterior:")
+    c.drawString(400, y, f"${dinero.a_unidades(acumulado):.2f}")
+    c.setFont("Helvetica", 10)
+    return y
+
+
+def _dibujar_encabezado_tabla(c: canvas.Canvas, y: float) -> None:
+    """Dibuja los títulos de las columnas de la tabla de productos y deja la fuente normal."""
+    c.setFont("Helvetica-Bold", 10)
+    # Encabezados de la tabla
+    c.drawString(30, y, "Descripción")
+    c.drawString(250, y, "Cantidad")
+    c.drawString(320, y, "Precio")
+    c.drawString(400, y, "Subtotal")
+    c.setFont("Helvetica", 10)
+
+
+def _dibujar_pie_pagina(c: canvas.Canvas, pagina: int, forma_total: str) -> None:
+    """Dibuja "Página N de M" al pie; M proviene de la plantilla definida al terminar la factura."""
+    width, _ = A4
+    c.setFont("Helvetica", 9)
+    c.drawRightString(width / 2, 30, f"Página {pagina} de")
+    c.doForm(forma_total)
@@ -0,0 +1,126 @@
+# src/pdf/render_paralelo.py
+# Este módulo reparte la generación de PDFs entre varios procesos.
+# ReportLab trabaja en Python puro y ocupa un solo núcleo, así que para
+# lotes grandes se usa un pool de procesos con un límite de trabajos en curso.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator, Optional
+from src.db.models import Factura
+from src.pdf import cache_render, pdf_generator
+from src.pdf.pdf_generator import huella_pdf, ruta_pdf
+
+# Cantidad de trabajos en curso por proceso cuando no se indica un límite.
+PENDIENTES_POR_TRABAJADOR = 4
+
+
+class RenderizadorParalelo:
+    """
+    Pool de procesos reutilizable para generar PDFs de facturas en paralelo.
+    Se usa como administrador de contexto para cerrar los procesos al terminar.
+    """
+    def __init__(self, trabajadores: Optional[int] = None, max_pendientes: Optional[int] = None):
+        """
+        Inicializa el pool de procesos.
+
+        Args:
+            trabajadores (Optional[int]): Cantidad de procesos. Si es None, uno por núcleo.
+            max_pendientes (Optional[int]): Máximo de facturas enviadas y sin terminar.
+                Mantiene acotada la memoria en lotes muy grandes.
+        """
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.max_pendientes = max_pendientes or self.trabajadores * PENDIENTES_POR_TRABAJADOR
+        self._executor = ProcessPoolExecutor(max_workers=self.trabajadores)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Espera a que terminen los trabajos pendientes y cierra los procesos."""
+        self._executor.shutdown(wait=True)
+
+    def renderizar(self, facturas: Iterable[Factura]) -> Iterator[tuple[Factura, Optional[str], Optional[Exception]]]:
+        """
+        Genera los PDFs de las facturas y entrega cada resultado apenas está listo.
+        Las facturas se leen del iterable a medida que se liberan lugares,
+        por lo que nunca hay más de 'max_pendientes' en memoria a la vez.
+        Los nombres de archivo son los mismos que los de generar_pdf
+        (factura_{numero}.pdf), sin importar qué proceso los genere.
+        La caché de PDFs la consulta y actualiza solo este proceso: las facturas
+        que no cambiaron se entregan de inmediato, sin enviarlas a los trabajadores.
+
+        Args:
+            facturas (Iterable[Factura]): Las facturas a exportar.
+
+        Yields:
+            tuple[Factura, Optional[str], Optional[Exception]]: La factura, la ruta del PDF
+            (o None si falló) y el error (o None si tuvo éxito), en orden de finalización.
+        """
+        pendientes = {}
+        iterador = iter(facturas)
+        agotado = False
+        # El directorio se lee en cada llamada: quien usa el módulo puede cambiar pdf_generator.OUTPUT_DIR.
+        directorio = pdf_generator.OUTPUT_DIR
+        cache = cache_render.cache_de(directorio)
+
+        while True:
+            # Envía facturas hasta llenar el límite de trabajos en curso.
+            while not agotado and len(pendientes) < self.max_pendientes:
+                factura = next(iterador, None)
+                if factura is None:
+                    agotado = True
+                    break
+                # Un generador de productos no admite la caché (ver cache_render.admite_cache).
+                huella = huella_pdf(factura) if cache_render.admite_cache(factura) else None
+                if huella is not None and cache.buscar(ruta_pdf(factura), huella):
+                    yield factura, ruta_pdf(factura), None
+                    continue
+                futuro = self._executor.submit(_generar_en, directorio, factura)
+                pendientes[futuro] = (factura, huella)
+            if not pendientes:
+                return
+
+            # Espera a que termine al menos uno y entrega los resultados disponibles.
+            listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                factura, huella = pendientes.pop(futuro)
+                error = futuro.exception()
+                if error is None:
+                    if huella is not None:
+                        cache.registrar(futuro.result(), huella)
+                    yield factura, futuro.result(), None
+                else:
+                    yield factura, None, error
+
+
+def _generar_en(directorio: str, factura: Factura) -> str:
+    """
+    Genera el PDF de una factura en un proceso trabajador, sin caché, dentro del directorio
+    indicado. El trabajador puede haber importado el módulo con otro OUTPUT_DIR (por ejemplo,
+    si los procesos se crean con 'spawn'), así que se fija el del proceso principal.
+    """
+    pdf_generator.OUTPUT_DIR = directorio
+    return pdf_generator.generar_pdf(factura, None, False)
+
+
+def generar_pdfs(
+    facturas: Iterable[Factura],
+    trabajadores: Optional[int] = None,
+    max_pendientes: Optional[int] = None,
+) -> Iterator[tuple[Factura, Optional[str], Optional[Exception]]]:
+    """
+    Atajo para generar los PDFs de un conjunto de facturas con un pool temporal.
+
+    Args:
+        facturas (Iterable[Factura]): Las facturas a exportar.
+        trabajadores (Optional[int]): Cantidad de procesos. Si es None, uno por núcleo.
+        max_pendientes (Optional[int]): Máximo de facturas enviadas y sin terminar.
+
+    Yields:
+        tuple[Factura, Optional[str], Optional[Exception]]: Ver RenderizadorParalelo.renderizar.
+    """
+    with RenderizadorParalelo(trabajadores, max_pendientes) as renderizador:
+        yield from renderizador.renderizar(facturas)
@@ -0,0 +1,52 @@
+# src/ui/completador.py
+# Define un autocompletado para campos de texto que consulta un índice propio
+# (por ejemplo, el de clientes) en lugar de filtrar un modelo con todas las
+# opciones. QCompleter recorre su modelo completo con cada tecla; con cientos
+# de miles de entradas eso se nota. Aquí el modelo solo contiene las pocas
+# sugerencias que devuelve el índice para el texto escrito.
+
+from typing import Callable
+from PyQt6.QtCore import QStringListModel, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QCompleter, QLineEdit
+
+
+class CompletadorIndice(QCompleter):
+    """
+    Autocompletado de un QLineEdit alimentado por una función de búsqueda.
+    Al elegir una sugerencia emite 'elegido' con el valor asociado a ella.
+    """
+    # Valor asociado a la sugerencia elegida (por ejemplo, un Cliente).
+    elegido = pyqtSignal(object)
+
+    def __init__(self, campo: QLineEdit, buscar: Callable[[str], list[tuple[str, object]]]):
+        """
+        Args:
+            campo (QLineEdit): El campo al que se agrega el autocompletado.
+            buscar: Función que recibe el texto escrito y devuelve pares
+                (texto de la sugerencia, valor asociado), ya ordenados y limitados.
+        """
+        super().__init__(campo)
+        self.buscar = buscar
+        self._modelo = QStringListModel(self)
+        # Texto de la sugerencia -> valor, para las sugerencias mostradas.
+        self._valores: dict[str, object] = {}
+        self.setModel(self._modelo)
+        # El modelo ya viene filtrado por el índice; QCompleter no debe volver a filtrarlo.
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        campo.setCompleter(self)
+        campo.textEdited.connect(self.actualizar)
+        self.activated.connect(self._elegir)
+
+    def actualizar(self, texto: str):
+        """Slot que recalcula las sugerencias cada vez que el usuario modifica el texto."""
+        sugerencias = self.buscar(texto) if texto.strip() else []
+        self._valores = dict(sugerencias)
+        self._modelo.setStringList([etiqueta for etiqueta, _ in sugerencias])
+
+    def _elegir(self, etiqueta: str):
+        """Slot que emite el valor de la sugerencia elegida."""
+        valor = self._valores.get(etiqueta)
+        if valor is not None:
+            # El campo escribe el texto de la sugerencia después de esta señal; se emite
+            # en la siguiente vuelta del bucle de eventos para que quien la reciba pueda reemplazarlo.
+            QTimer.singleShot(0, lambda: self.elegido.emit(valor))
@@ -5,15 +5,18 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QFormLayout,
-    QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
-    QHBoxLayout, QMessageBox
+    QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QDialog, QFileDialog
 )
 from PyQt6.QtCore import Qt
 
 from src.db.models import Cliente, Producto
 from src.logic.invoice_manager import InvoiceManager
-from src.db.database import guardar_factura
-from src.pdf.pdf_generator import generar_pdf
+from src.ui.completador import CompletadorIndice
+from src.ui.modelo_productos import ModeloProductos, leer_productos_csv
+from src.ui.product_dialog import ProductDialog
+from src.ui.tabla_productos import TablaProductos
+from src.ui.trabajos import ColaTrabajos
+from src.utils import dinero
 
 
 class MainWindow(QMainWindow):
@@ -29,8 +32,11 @@ class MainWindow(QMainWindow):
 
         # Inicializa el gestor de lógica de negocio para manejar las facturas.
         self.manager = InvoiceManager()
-        # Obtiene el número para la primera factura al iniciar.
-        self.numero_factura = self.manager.obtener_siguiente_numero()
+        # El número de la próxima factura se calcula en segundo plano (puede requerir
+        # recorrer el archivo de facturas); mientras tanto es None.
+        self.numero_factura = None
+        # Cola de trabajos en segundo plano: guardar y generar PDFs no congela la ventana.
+        self.trabajos = ColaTrabajos(self)
 
         # --- Configuración de la Interfaz ---
         # Widget contenedor principal y layout vertical.
@@ -50,17 +56,41 @@ class MainWindow(QMainWindow):
         form_layout.addRow("Teléfono:", self.telefono_input)
         layout.addLayout(form_layout)
 
+        # Autocompletado de clientes ya facturados, por nombre o por identificación.
+        # El índice de clientes se carga en segundo plano; hasta entonces no hay sugerencias.
+        self.clientes = None
+        for campo, etiqueta in (
+            (self.nombre_input, lambda c: f"{c.nombre} ({c.identificacion})"),
+            (self.identificacion_input, lambda c: f"{c.identificacion} - {c.nombre}"),
+        ):
+            completador = CompletadorIndice(campo, lambda texto, etiqueta=etiqueta: self.sugerir_clientes(texto, etiqueta))
+            completador.elegido.connect(self.usar_cliente)
+
         # --- Tabla para los Productos/Servicios ---
-        self.tabla = QTableWidget(0, 3)
-        self.tabla.setHorizontalHeaderLabels(["Descripción", "Cantidad", "Precio Unitario"])
-        layout.addWidget(QLabel("Productos/Servicios:"))
+        # El modelo guarda los valores ya convertidos y mantiene el total al día.
+        # El catálogo de productos se abre en segundo plano y se le asigna al cargarse.
+        self.catalogo = None
+        self.modelo = ModeloProductos(parent=self)
+        self.tabla = TablaProductos(self.modelo)
+        # Las líneas pegadas desde una planilla se agregan igual que las importadas de un CSV.
+        self.tabla.pegados.connect(self.productos_leidos)
+        layout.addWidget(QLabel("Productos/Servicios (Ctrl+V pega líneas de una planilla):"))
         layout.addWidget(self.tabla)
+        self.total_label = QLabel()
+        self.total_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.modelo.total_cambiado.connect(self.mostrar_total)
+        self.mostrar_total(0)
+        layout.addWidget(self.total_label)
 
         # --- Botones de Acción para la Tabla ---
         botones_layout = QHBoxLayout()
         self.agregar_btn = QPushButton("Agregar Producto")
+        self.importar_btn = QPushButton("Importar Productos...")
+        self.quitar_btn = QPushButton("Quitar Seleccionados")
         self.calcular_btn = QPushButton("Calcular Total")
         botones_layout.addWidget(self.agregar_btn)
+        botones_layout.addWidget(self.importar_btn)
+        botones_layout.addWidget(self.quitar_btn)
         botones_layout.addWidget(self.calcular_btn)
         layout.addLayout(botones_layout)
 
@@ -71,39 +101,92 @@ class MainWindow(QMainWindow):
         contenedor.setLayout(layout)
         self.setCentralWidget(contenedor)
 
+        # --- Barra de Estado ---
+        # Muestra el número de la próxima factura y las exportaciones en curso.
+        self.estado_label = QLabel()
+        self.statusBar().addPermanentWidget(self.estado_label)
+        self.trabajos.pendientes_cambiaron.connect(self.actualizar_estado)
+        self.trabajos.encolar(
+            lambda informar: self.manager.obtener_siguiente_numero(),
+            al_terminar=self.numero_obtenido,
+            al_fallar=lambda error: self.statusBar().showMessage(f"No se pudo leer la numeración: {error}"),
+        )
+        self.trabajos.encolar(
+            lambda informar: self.manager.indice_clientes(),
+            al_terminar=self.clientes_cargados,
+            al_fallar=lambda error: self.statusBar().showMessage(f"No se pudo leer el registro de clientes: {error}"),
+        )
+        self.trabajos.encolar(
+            lambda informar: self.manager.catalogo(),
+            al_terminar=self.catalogo_cargado,
+            al_fallar=lambda error: self.statusBar().showMessage(f"No se pudo abrir el catálogo de productos: {error}"),
+        )
+
         # --- Conexión de Señales y Slots (Eventos) ---
         self.agregar_btn.clicked.connect(self.agregar_producto)
+        self.importar_btn.clicked.connect(self.importar_productos)
+        self.quitar_btn.clicked.connect(self.tabla.quitar_seleccion)
         self.calcular_btn.clicked.connect(self.calcular_total)
         self.exportar_btn.clicked.connect(self.exportar_pdf)
 
     def agregar_producto(self):
-        """Slot para el botón 'Agregar Producto'. Añade una fila en blanco a la tabla."""
-        fila = self.tabla.rowCount()
-        self.tabla.insertRow(fila)
-        # Rellena la nueva fila con celdas vacías.
-        for col in range(3):
-            self.tabla.setItem(fila, col, QTableWidgetItem(""))
+        """
+        Slot para el botón 'Agregar Producto'. Abre el diálogo de producto, que
+        lo completa desde el catálogo si se indica su código, y lo añade a la tabla.
+        """
+        dialogo = ProductDialog(self, self.catalogo)
+        if dialogo.exec() == QDialog.DialogCode.Accepted:
+            self.modelo.agregar_producto(dialogo.get_producto(), dialogo.get_sku())
+
+    def importar_productos(self):
+        """
+        Slot para 'Importar Productos...'. Lee en segundo plano los productos de un
+        CSV (descripción, cantidad y precio, o código y cantidad del catálogo).
+        """
+        ruta, _ = QFileDialog.getOpenFileName(self, "Importar productos", "", "CSV (*.csv *.txt);;Todos (*)")
+        if not ruta:
+            return
+        self.trabajos.encolar(
+            lambda informar: leer_productos_csv(ruta, self.catalogo),
+            al_terminar=self.productos_leidos,
+            al_fallar=lambda error: QMessageBox.warning(self, "Error", f"No se pudo importar el archivo:\n{error}"),
+        )
+
+    def productos_leidos(self, resultado):
+        """
+        Slot que agrega a la tabla los productos pegados o importados, todos de una
+        vez, e informa las líneas que no se pudieron interpretar.
+
+        Args:
+            resultado: (productos, códigos, errores), ver modelo_productos.interpretar_productos.
+        """
+        productos, skus, errores = resultado
+        self.modelo.agregar_productos(productos, skus)
+        self.statusBar().showMessage(f"{len(productos)} productos agregados.", 10000)
+        if errores:
+            # Solo las primeras líneas, para que el mensaje quepa en pantalla.
+            detalle = "\n".join(f"Línea {linea}: {mensaje}" for linea, mensaje in errores[:10])
+            if len(errores) > 10:
+                detalle += f"\n... y {len(errores) - 10} más."
+            QMessageBox.warning(self, "Líneas no agregadas", f"{len(errores)} líneas no se pudieron agregar:\n\n{detalle}")
 
     def calcular_total(self):
-        """Slot para 'Calcular Total'. Lee la tabla, calcula el total y lo muestra."""
-        try:
-            # Obtiene la lista de productos desde la tabla de la UI.
-            productos = self.obtener_productos()
-            # Calcula el total sumando los subtotales de los productos.
-            total = sum(p.subtotal for p in productos)
-            QMessageBox.information(self, "Total", f"Total calculado: ${total:.2f}")
-        except Exception as e:
-            # Muestra un diálogo de advertencia si ocurre un error.
-            QMessageBox.warning(self, "Error", str(e))
+        """Slot para 'Calcular Total'. Muestra el total, que el modelo de la tabla mantiene al día."""
+        total = dinero.a_unidades(self.modelo.total_centavos)
+        QMessageBox.information(self, "Total", f"Total calculado: ${total:.2f}")
+
+    def mostrar_total(self, total_centavos: int):
+        """Slot que muestra el total de la factura cada vez que cambia un producto."""
+        self.total_label.setText(f"Total: ${dinero.a_unidades(total_centavos):.2f}")
 
     def exportar_pdf(self):
         """
         Slot para 'Exportar a PDF'. Orquesta todo el proceso:
         1. Recoge datos de la UI.
-        2. Crea la factura usando el InvoiceManager.
-        3. Guarda la factura en la base de datos (CSV).
-        4. Genera el archivo PDF.
-        5. Incrementa el número de factura para la siguiente.
+        2. Valida y crea la factura usando el InvoiceManager.
+        3. Encola el guardado y la generación del PDF en segundo plano.
+        Se pueden exportar varias facturas seguidas; se procesan en orden
+        y el resultado de cada una se informa al terminar (ver exportacion_terminada).
         """
         try:
             # 1. Recoge los datos del cliente desde los campos de texto.
@@ -117,56 +200,110 @@ class MainWindow(QMainWindow):
             productos = self.obtener_productos()
 
             # 2. Usa el manager para validar y crear el objeto Factura.
+            # El número definitivo se asigna al guardarla.
             factura = self.manager.crear_factura(
                 cliente=cliente,
                 productos=productos,
-                numero=self.numero_factura
+                numero=0
             )
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"No se pudo generar la factura:\n{e}")
+            return
 
-            # 3. Guarda la factura en el archivo CSV.
-            guardar_factura(factura)
-            # 4. Genera el archivo PDF.
-            archivo = generar_pdf(factura)
+        # 3. Guarda y genera el PDF en segundo plano.
+        self.trabajos.encolar(
+            lambda informar: self._guardar_y_renderizar(factura, informar),
+            al_terminar=self.exportacion_terminada,
+            al_fallar=lambda error: QMessageBox.warning(
+                self, "Error", f"No se pudo generar la factura:\n{error}"
+            ),
+            al_avanzar=self.statusBar().showMessage,
+        )
 
-            QMessageBox.information(self, "Éxito", f"Factura generada: {archivo}")
+    def _guardar_y_renderizar(self, factura, informar) -> tuple[int, str]:
+        """
+        Guarda la factura y genera su PDF. Se ejecuta en el hilo de la cola de trabajos,
+        por lo que no debe tocar widgets: informa su avance con 'informar'.
 
-            # 5. Prepara el número para la siguiente factura.
-            self.numero_factura += 1
+        Returns:
+            tuple[int, str]: El número asignado y la ruta del PDF generado.
+        """
+        # Guarda la factura en el archivo CSV. El número se confirma al guardar,
+        # por si otra instancia de la aplicación emitió facturas mientras tanto.
+        informar("Guardando factura...")
+        numero = self.manager.emitir_factura(factura)
+        informar(f"Generando PDF de la factura No. {numero}...")
+        # ReportLab se carga con el primer PDF y no al abrir la ventana.
+        from src.pdf.pdf_generator import generar_pdf
+        return numero, generar_pdf(factura)
 
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo generar la factura:\n{e}")
+    def exportacion_terminada(self, resultado: tuple[int, str]):
+        """Slot que recibe el resultado de una exportación en segundo plano."""
+        numero, archivo = resultado
+        self.statusBar().showMessage(f"Factura generada: {archivo}", 10000)
+        # Prepara el número para la siguiente factura.
+        self.numero_obtenido(numero + 1)
+
+    def numero_obtenido(self, numero: int):
+        """Slot que recibe el número de la próxima factura calculado en segundo plano."""
+        self.numero_factura = numero
+        self.actualizar_estado(self.trabajos.pendientes())
+
+    def clientes_cargados(self, indice):
+        """Slot que recibe el índice de clientes cargado en segundo plano."""
+        self.clientes = indice
+
+    def catalogo_cargado(self, catalogo):
+        """Slot que recibe el catálogo de productos abierto en segundo plano."""
+        self.catalogo = catalogo
+        self.modelo.catalogo = catalogo
+
+    def sugerir_clientes(self, texto: str, etiqueta) -> list[tuple[str, object]]:
+        """
+        Busca los clientes que empiezan por el texto escrito, para el autocompletado.
+
+        Args:
+            texto (str): El texto del campo.
+            etiqueta: Función que arma el texto de la sugerencia a partir del cliente.
+
+        Returns:
+            list[tuple[str, object]]: Pares (texto de la sugerencia, cliente).
+        """
+        if self.clientes is None:
+            return []
+        return [(etiqueta(c), c) for c in self.clientes.buscar(texto)]
+
+    def usar_cliente(self, cliente: Cliente):
+        """Slot que completa el formulario con los datos de un cliente elegido."""
+        self.nombre_input.setText(cliente.nombre)
+        self.identificacion_input.setText(cliente.identificacion)
+        self.direccion_input.setText(cliente.direccion)
+        self.telefono_input.setText(cliente.telefono)
+
+    def actualizar_estado(self, pendientes: int):
+        """Actualiza la barra de estado con la próxima factura y las exportaciones en curso."""
+        partes = []
+        if self.numero_factura is not None:
+            partes.append(f"Próxima factura: No. {self.numero_factura}")
+        if pendientes:
+            partes.append(f"En proceso: {pendientes}")
+        self.estado_label.setText("   ".join(partes))
+
+    def closeEvent(self, event):
+        """Al cerrar la ventana, espera a que terminen las exportaciones encoladas."""
+        self.trabajos.esperar()
+        super().closeEvent(event)
 
     def obtener_productos(self) -> list[Producto]:
         """
-        Lee los datos de la tabla de productos de la UI y los convierte
-        en una lista de objetos Producto.
+        Devuelve los productos de la tabla. El modelo ya guarda los valores
+        convertidos (las celdas no aceptan cantidades ni precios inválidos),
+        así que no hay que volver a leer ni interpretar el texto de cada fila.
         
         Returns:
-            list[Producto]: La lista de productos leídos de la tabla.
-            
-        Raises:
-            ValueError: Si la cantidad o el precio no son números válidos.
+            list[Producto]: La lista de productos de la tabla.
         """
-        productos = []
-        for fila in range(self.tabla.rowCount()):
-            item_desc = self.tabla.item(fila, 0)
-            item_cant = self.tabla.item(fila, 1)
-            item_precio = self.tabla.item(fila, 2)
-
-            # Obtiene el texto de cada celda, con un valor por defecto si está vacía.
-            descripcion = item_desc.text().strip() if item_desc else ""
-            cantidad_str = item_cant.text().strip() if item_cant else "0"
-            precio_str = item_precio.text().strip() if item_precio else "0"
-
-            try:
-                # Convierte cantidad y precio a tipos numéricos.
-                cantidad = int(cantidad_str)
-                precio = float(precio_str)
-            except ValueError:
-                raise ValueError(f"En la fila {fila + 1}, la cantidad y el precio deben ser números válidos.")
-
-            productos.append(Producto(descripcion, cantidad, precio))
-        return productos
+        return self.modelo.productos()
 
 
 # Este bloque permite ejecutar la ventana como un script independiente para pruebas.
@@ -0,0 +1,318 @@
+# src/ui/modelo_productos.py
+# Define el modelo de datos de la tabla de productos de la ventana principal.
+# Los valores se guardan ya convertidos (cantidades enteras, precios numéricos)
+# en una colección Productos, que mantiene el total al día con cada cambio: al
+# editar una celda solo se recalcula el subtotal de esa fila, y el total de la
+# factura no requiere volver a leer ni convertir el texto de toda la tabla.
+#
+# La columna 'Código' se completa con el catálogo: al escribir el código de un
+# producto, la descripción y el precio se toman del catálogo.
+#
+# Los productos también se pueden pegar desde una planilla o importar desde un
+# CSV (ver interpretar_productos); se agregan todos de una vez, con una sola
+# notificación a la vista, aunque sean decenas de miles de filas.
+
+import csv
+import re
+from typing import Iterable, Optional
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from src.db.catalogo import Catalogo, normalizar_sku
+from src.db.models import Producto, Productos
+from src.utils import dinero
+from src.utils.texto import normalizar
+
+# Títulos de las columnas, en orden.
+COLUMNAS = ("Código", "Descripción", "Cantidad", "Precio Unitario", "Subtotal")
+COL_CODIGO, COL_DESCRIPCION, COL_CANTIDAD, COL_PRECIO, COL_SUBTOTAL = range(len(COLUMNAS))
+# Títulos que identifican una primera línea de encabezado al pegar o importar.
+ENCABEZADOS = {"codigo", "sku", "descripcion", "cantidad", "precio", "precio unitario", "precio_unitario"}
+# Precios como "1,234": la coma puede ser decimal (1.234) o separador de miles (1234).
+PRECIO_AMBIGUO = re.compile(r"[+-]?[1-9]\d{0,2},\d{3}")
+
+
+class ModeloProductos(QAbstractTableModel):
+    """
+    Modelo de la tabla de productos de una factura. Cada fila es un producto con
+    su código de catálogo (opcional); el subtotal se calcula y no es editable.
+    """
+    # Total de la factura en centavos, emitido cada vez que cambia.
+    total_cambiado = pyqtSignal(int)
+
+    def __init__(self, catalogo: Optional[Catalogo] = None, parent=None):
+        """
+        Args:
+            catalogo (Optional[Catalogo]): Catálogo para completar los productos por código.
+                Se puede asignar más tarde, cuando termine de cargarse.
+            parent (QObject, optional): El objeto padre del modelo.
+        """
+        super().__init__(parent)
+        self.catalogo = catalogo
+        self._productos = Productos()
+        # Código de catálogo de cada fila; "" si el producto se escribió a mano.
+        self._skus: list[str] = []
+
+    # --- Interfaz de QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._productos)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNAS)
+
+    def headerData(self, seccion, orientacion, rol=Qt.ItemDataRole.DisplayRole):
+        if orientacion == Qt.Orientation.Horizontal and rol == Qt.ItemDataRole.DisplayRole:
+            return COLUMNAS[seccion]
+        return super().headerData(seccion, orientacion, rol)
+
+    def flags(self, indice):
+        banderas = super().flags(indice)
+        if indice.column() != COL_SUBTOTAL:
+            banderas |= Qt.ItemFlag.ItemIsEditable
+        return banderas
+
+    def data(self, indice, rol=Qt.ItemDataRole.DisplayRole):
+        if not indice.isValid():
+            return None
+        fila, columna = indice.row(), indice.column()
+        if rol == Qt.ItemDataRole.TextAlignmentRole:
+            if columna >= COL_CANTIDAD:
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+            return None
+        if rol not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        # Cada celda se lee directamente de su columna, sin crear un Producto por fila:
+        # la vista pide los datos de las filas visibles cada vez que se desplaza.
+        if columna == COL_CODIGO:
+            return self._skus[fila]
+        if columna == COL_DESCRIPCION:
+            return self._productos.descripcion(fila)
+        if columna == COL_CANTIDAD:
+            return self._productos.cantidad(fila)
+        if columna == COL_PRECIO:
+            precio = self._productos.precio_unitario(fila)
+            # Al editar se muestra el número sin formato.
+            return precio if rol == Qt.ItemDataRole.EditRole else dinero.formato_precio(precio)
+        return f"{dinero.a_unidades(self._productos.subtotal_centavos(fila)):.2f}"
+
+    def setData(self, indice, valor, rol=Qt.ItemDataRole.EditRole) -> bool:
+        """
+        Cambia una celda. El texto se convierte al tipo de la columna; si no es
+        válido (por ejemplo, una cantidad que no es un número entero), la celda
+        conserva su valor y se devuelve False.
+        """
+        if not indice.isValid() or rol != Qt.ItemDataRole.EditRole:
+            return False
+        fila, columna = indice.row(), indice.column()
+        descripcion = self._productos.descripcion(fila)
+        cantidad = self._productos.cantidad(fila)
+        precio = self._productos.precio_unitario(fila)
+        try:
+            if columna == COL_CODIGO:
+                sku = normalizar_sku(str(valor))
+                item = self.catalogo.obtener(sku) if sku and self.catalogo is not None else None
+                self._skus[fila] = sku
+                if item is not None:
+                    # El catálogo completa la descripción y el precio; la cantidad se conserva.
+                    descripcion, precio = item.descripcion, item.precio_unitario
+                    cantidad = cantidad or 1
+            elif columna == COL_DESCRIPCION:
+                descripcion = str(valor).strip()
+            elif columna == COL_CANTIDAD:
+                cantidad = _entero(str(valor))
+            elif columna == COL_PRECIO:
+                precio = interpretar_precio(str(valor))
+            else:
+                return False
+        except ValueError:
+            return False
+        self._reemplazar(fila, Producto(descripcion, cantidad, precio))
+        return True
+
+    # --- Operaciones de la factura ---
+
+    @property
+    def total_centavos(self) -> int:
+        """Total de la factura en centavos, mantenido al día con cada cambio."""
+        return self._productos.total_centavos
+
+    def agregar_producto(self, producto: Producto, sku: str = "") -> int:
+        """
+        Agrega un producto al final de la tabla.
+
+        Args:
+            producto (Producto): El producto a agregar.
+            sku (str): Su código de catálogo, si lo tiene.
+
+        Returns:
+            int: El número de la fila agregada.
+        """
+        return self.agregar_productos([producto], [sku])
+
+    def agregar_productos(self, productos: list[Producto], skus: Optional[list[str]] = None) -> int:
+        """
+        Agrega varios productos al final de la tabla con una sola notificación a la vista.
+
+        Args:
+            productos (list[Producto]): Los productos a agregar, en orden.
+            skus (Optional[list[str]]): El código de catálogo de cada producto ("" si no tiene).
+
+        Returns:
+            int: El número de la primera fila agregada.
+        """
+        fila = len(self._productos)
+        if not productos:
+            return fila
+        self.beginInsertRows(QModelIndex(), fila, fila + len(productos) - 1)
+        self._productos.extend(productos)
+        self._skus.extend(normalizar_sku(sku) for sku in skus or [""] * len(productos))
+        self.endInsertRows()
+        self.total_cambiado.emit(self.total_centavos)
+        return fila
+
+    def agregar_fila(self) -> int:
+        """Agrega una fila en blanco para completarla en la tabla. Devuelve su número."""
+        return self.agregar_producto(Producto("", 0, 0.0))
+
+    def quitar_fila(self, fila: int) -> None:
+        """Quita un producto de la tabla."""
+        self.quitar_filas([fila])
+
+    def quitar_filas(self, filas: Iterable[int]) -> None:
+        """
+        Quita varios productos de la tabla. Las filas consecutivas se quitan por
+        tramos, con una notificación a la vista por tramo.
+
+        Args:
+            filas (Iterable[int]): Los números de fila a quitar, en cualquier orden.
+        """
+        filas = sorted(set(filas), reverse=True)
+        if not filas:
+            return
+        # Se recorre de abajo hacia arriba para que los números de las filas pendientes no cambien.
+        fin = inicio = filas[0]
+        for fila in filas[1:] + [None]:
+            if fila is not None and fila == inicio - 1:
+                inicio = fila
+                continue
+            self.beginRemoveRows(QModelIndex(), inicio, fin)
+            del self._productos[inicio:fin + 1]
+            del self._skus[inicio:fin + 1]
+            self.endRemoveRows()
+            if fila is not None:
+                fin = inicio = fila
+        self.total_cambiado.emit(self.total_centavos)
+
+    def productos(self) -> Productos:
+        """Devuelve una copia de los productos de la tabla, ya convertidos, en orden."""
+        # Objetos nuevos: cambiar un producto de la factura no debe cambiar la tabla.
+        return Productos(Producto(p.descripcion, p.cantidad, p.precio_unitario) for p in self._productos)
+
+    def _reemplazar(self, fila: int, producto: Producto) -> None:
+        """Reemplaza el producto de una fila y avisa a la vista y a quien siga el total."""
+        self._productos[fila] = producto
+        self.dataChanged.emit(self.index(fila, 0), self.index(fila, len(COLUMNAS) - 1))
+        self.total_cambiado.emit(self.total_centavos)
+
+
+def interpretar_productos(
+    lineas: Iterable[str], catalogo: Optional[Catalogo] = None
+) -> tuple[list[Producto], list[str], list[tuple[int, str]]]:
+    """
+    Interpreta productos escritos uno por línea, como los que se copian de una
+    planilla (separados por tabuladores) o los de un CSV (separados por ';' o ',').
+    Según la cantidad de campos, cada línea es:
+        codigo, cantidad                        (descripción y precio del catálogo)
+        descripcion, cantidad, precio
+        codigo, descripcion, cantidad, precio
+    Una primera línea de encabezado se ignora, igual que las líneas vacías.
+    Los precios aceptan coma decimal ("12,50") si el separador no es la coma; los que
+    también podrían leerse con separador de miles ("1,234") se marcan como inválidos.
+
+    Args:
+        lineas (Iterable[str]): Las líneas de texto.
+        catalogo (Optional[Catalogo]): Catálogo para las líneas con solo código y cantidad.
+
+    Returns:
+        tuple: (productos, códigos, errores), con los productos válidos y el código
+        de cada uno, y una lista de (número de línea, mensaje) con las líneas inválidas.
+    """
+    productos: list[Producto] = []
+    skus: list[str] = []
+    errores: list[tuple[int, str]] = []
+    lineas = iter(lineas)
+    primera = next(lineas, "")
+    separador = "\t" if "\t" in primera else ";" if ";" in primera else ","
+    for numero, campos in enumerate(csv.reader(_con_primera(primera, lineas), delimiter=separador), start=1):
+        campos = [campo.strip() for campo in campos]
+        if not any(campos):
+            continue
+        if numero == 1 and ENCABEZADOS.intersection(normalizar(campo) for campo in campos):
+            continue
+        try:
+            if len(campos) == 2:
+                sku, cantidad = campos[0], _entero(campos[1])
+                item = catalogo.obtener(sku) if catalogo is not None else None
+                if item is None:
+                    raise ValueError(f"el código '{sku}' no está en el catálogo")
+                producto = item.producto(cantidad)
+            elif len(campos) == 3:
+                sku = ""
+                producto = Producto(campos[0], _entero(campos[1]), interpretar_precio(campos[2]))
+            elif len(campos) == 4:
+                sku = campos[0]
+                producto = Producto(campos[1], _entero(campos[2]), interpretar_precio(campos[3]))
+            else:
+                raise ValueError(f"se esperaban 2, 3 o 4 campos y hay {len(campos)}")
+        except ValueError as e:
+            errores.append((numero, str(e)))
+            continue
+        productos.append(producto)
+        skus.append(sku)
+    return productos, skus, errores
+
+
+def leer_productos_csv(ruta: str, catalogo: Optional[Catalogo] = None):
+    """
+    Lee los productos de un archivo CSV (ver interpretar_productos).
+
+    Args:
+        ruta (str): Ruta del archivo.
+        catalogo (Optional[Catalogo]): Catálogo para las líneas con solo código y cantidad.
+
+    Returns:
+        tuple: (productos, códigos, errores), como interpretar_productos.
+    """
+    # 'utf-8-sig' descarta la marca BOM que agregan algunas planillas al exportar.
+    with open(ruta, mode="r", newline="", encoding="utf-8-sig") as f:
+        return interpretar_productos(f, catalogo)
+
+
+def _con_primera(primera: str, lineas: Iterable[str]) -> Iterable[str]:
+    """Vuelve a anteponer la primera línea, ya leída para detectar el separador."""
+    yield primera
+    yield from lineas
+
+
+def _entero(texto: str) -> int:
+    """Convierte una cantidad; el error indica el valor inválido."""
+    try:
+        return int(texto.strip())
+    except ValueError:
+        raise ValueError(f"la cantidad '{texto}' no es un número entero")
+
+
+def interpretar_precio(texto: str) -> float:
+    """
+    Convierte un precio escrito con punto o con coma decimal ("12.50" o "12,50").
+    La coma se toma como decimal solo si es el único separador; un precio como
+    "1,234", que también podría leerse como mil doscientos treinta y cuatro, se rechaza.
+    """
+    limpio = texto.strip()
+    if limpio.count(",") == 1 and "." not in limpio:
+        if PRECIO_AMBIGUO.fullmatch(limpio):
+            raise ValueError(f"el precio '{texto}' es ambiguo: escríbalo sin separador de miles o con punto decimal")
+        limpio = limpio.replace(",", ".")
+    try:
+        return float(limpio)
+    except ValueError:
+        raise ValueError(f"el precio '{texto}' no es un número válido")
@@ -1,8 +1,15 @@
 # src/ui/product_dialog.py
 # Define un cuadro de diálogo modal para agregar un nuevo producto a la factura.
+# Si hay un catálogo de productos, al escribir o elegir un código se completan
+# la descripción y el precio unitario.
 
+from typing import Optional
 from PyQt6.QtWidgets import QDialog, QFormLayout, QLineEdit, QPushButton, QVBoxLayout, QMessageBox
+from src.db.catalogo import Catalogo, ItemCatalogo
 from src.db.models import Producto
+from src.ui.completador import CompletadorIndice
+from src.ui.modelo_productos import interpretar_precio
+from src.utils import dinero
 
 
 class ProductDialog(QDialog):
@@ -10,24 +17,28 @@ class ProductDialog(QDialog):
     Un cuadro de diálogo que permite al usuario ingresar los detalles de un
     producto (descripción, cantidad, precio) y lo devuelve como un objeto Producto.
     """
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, catalogo: Optional[Catalogo] = None):
         """
         Inicializa el diálogo, creando los campos de entrada y los botones.
         
         Args:
             parent (QWidget, optional): El widget padre de este diálogo. Defaults to None.
+            catalogo (Catalogo, optional): Catálogo para buscar productos por código. Defaults to None.
         """
         super().__init__(parent)
         self.setWindowTitle("Agregar Producto")
-        self.setFixedSize(300, 200)
+        self.setFixedSize(340, 230)
+        self.catalogo = catalogo
 
         # --- Campos de Entrada ---
+        self.sku = QLineEdit()
         self.descripcion = QLineEdit()
         self.cantidad = QLineEdit()
         self.precio_unitario = QLineEdit()
 
         # --- Layout del Formulario ---
         form = QFormLayout()
+        form.addRow("Código:", self.sku)
         form.addRow("Descripción:", self.descripcion)
         form.addRow("Cantidad:", self.cantidad)
         form.addRow("Precio unitario:", self.precio_unitario)
@@ -42,6 +53,19 @@ class ProductDialog(QDialog):
         layout.addLayout(form)
         layout.addWidget(btn_guardar)
         self.setLayout(layout)
+
+        # --- Búsqueda en el Catálogo ---
+        if catalogo is not None:
+            # Sugiere productos por el comienzo del código o de la descripción.
+            completador = CompletadorIndice(
+                self.sku,
+                lambda texto: [
+                    (f"{p.sku} - {p.descripcion} (${dinero.formato_precio(p.precio_unitario)})", p) for p in catalogo.buscar(texto)
+                ],
+            )
+            completador.elegido.connect(self.usar_item)
+            # Un código escrito completo (sin elegir sugerencia) también se busca.
+            self.sku.editingFinished.connect(self.buscar_sku)
         
         # Atributo para almacenar el producto creado.
         self.producto = None
@@ -54,7 +78,8 @@ class ProductDialog(QDialog):
         try:
             # Intenta convertir los campos de texto a los tipos de datos correctos.
             cantidad = int(self.cantidad.text())
-            precio = float(self.precio_unitario.text())
+            # El precio se interpreta igual que en la tabla: admite coma decimal y rechaza "1,234".
+            precio = interpretar_precio(self.precio_unitario.text())
             
             # Valida que la descripción no esté vacía.
             if not self.descripcion.text().strip():
@@ -71,6 +96,27 @@ class ProductDialog(QDialog):
             # Si ocurre un error de conversión o validación, muestra un mensaje de advertencia.
             QMessageBox.warning(self, "Error de Validación", f"Por favor, ingrese valores válidos.\n\n{e}")
 
+    def buscar_sku(self):
+        """Slot que completa el producto con el código escrito, si está en el catálogo."""
+        item = self.catalogo.obtener(self.sku.text()) if self.sku.text().strip() else None
+        if item is not None:
+            self.usar_item(item)
+
+    def usar_item(self, item: ItemCatalogo):
+        """Slot que completa los campos con un producto del catálogo."""
+        self.catalogo.usar(item)
+        self.sku.setText(item.sku)
+        self.descripcion.setText(item.descripcion)
+        # Sin recortar a dos decimales: el catálogo admite precios menores que un centavo.
+        self.precio_unitario.setText(dinero.formato_precio(item.precio_unitario))
+        # Lo habitual es una unidad; si ya se escribió una cantidad, se respeta.
+        if not self.cantidad.text().strip():
+            self.cantidad.setText("1")
+
+    def get_sku(self) -> str:
+        """Devuelve el código de catálogo escrito, o "" si el producto se ingresó a mano."""
+        return self.sku.text().strip()
+
     def get_producto(self) -> Producto | None:
         """
         Método de conveniencia para obtener el producto creado después de que el diálogo se cierra.
@@ -0,0 +1,52 @@
+# src/ui/tabla_productos.py
+# Define la vista de la tabla de productos de la ventana principal, sobre
+# ModeloProductos. Además de editar celdas, permite pegar muchas líneas copiadas
+# de una planilla (Ctrl+V) y quitar las filas seleccionadas (Supr).
+#
+# Todas las filas tienen la misma altura fija: así la vista no necesita medir el
+# contenido de cada fila para desplazarse, y se mueve con fluidez aunque la
+# factura tenga decenas de miles de productos.
+
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QKeySequence
+from PyQt6.QtWidgets import QHeaderView, QTableView
+from src.ui.modelo_productos import COL_DESCRIPCION, ModeloProductos, interpretar_productos
+
+
+class TablaProductos(QTableView):
+    """Tabla de productos que acepta pegar líneas de una planilla y quitar filas con el teclado."""
+    # Resultado de interpretar el texto pegado: (productos, códigos, errores), ver interpretar_productos.
+    pegados = pyqtSignal(object)
+
+    def __init__(self, modelo: ModeloProductos, parent=None):
+        """
+        Args:
+            modelo (ModeloProductos): El modelo con los productos de la factura.
+            parent (QWidget, optional): El widget padre de la tabla.
+        """
+        super().__init__(parent)
+        self.setModel(modelo)
+        self.horizontalHeader().setSectionResizeMode(COL_DESCRIPCION, QHeaderView.ResizeMode.Stretch)
+        # Altura fija para todas las filas (ver el comentario del módulo).
+        vertical = self.verticalHeader()
+        vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical.setDefaultSectionSize(self.fontMetrics().height() + 8)
+
+    def keyPressEvent(self, evento):
+        """Ctrl+V pega productos; Supr quita las filas seleccionadas; el resto se maneja como siempre."""
+        if evento.matches(QKeySequence.StandardKey.Paste):
+            self.pegar()
+        elif evento.matches(QKeySequence.StandardKey.Delete) and self.state() != QTableView.State.EditingState:
+            self.quitar_seleccion()
+        else:
+            super().keyPressEvent(evento)
+
+    def pegar(self):
+        """Interpreta el texto del portapapeles como productos y emite 'pegados' con el resultado."""
+        texto = QGuiApplication.clipboard().text()
+        if texto.strip():
+            self.pegados.emit(interpretar_productos(texto.splitlines(), self.model().catalogo))
+
+    def quitar_seleccion(self):
+        """Quita las filas que tienen alguna celda seleccionada."""
+        self.model().quitar_filas(indice.row() for indice in self.selectionModel().selectedIndexes())
@@ -0,0 +1,124 @@
+# src/ui/trabajos.py
+# Define una cola de trabajos en segundo plano para la interfaz gráfica.
+# Guardar facturas y generar PDFs puede tardar (disco, ReportLab); si se hiciera
+# en el hilo de la interfaz, la ventana se congelaría. Los trabajos se ejecutan
+# en un QThreadPool y comunican su avance y su resultado mediante señales,
+# que Qt entrega en el hilo de la interfaz.
+
+from typing import Callable, Optional
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class SenalesTrabajo(QObject):
+    """
+    Señales de un trabajo. QRunnable no es un QObject y no puede declarar señales,
+    así que el trabajo las emite a través de este objeto.
+    """
+    # Texto que describe la etapa en curso (por ejemplo, "Generando PDF...").
+    progreso = pyqtSignal(str)
+    # Valor devuelto por la función del trabajo.
+    terminado = pyqtSignal(object)
+    # Mensaje de la excepción que interrumpió el trabajo.
+    fallido = pyqtSignal(str)
+
+
+class Trabajo(QRunnable):
+    """Ejecuta una función en un hilo del pool e informa el resultado con señales."""
+
+    def __init__(self, funcion: Callable[[Callable[[str], None]], object]):
+        """
+        Args:
+            funcion: Función a ejecutar. Recibe como único argumento una función
+                'informar(etapa)' para reportar su avance, y devuelve el resultado.
+        """
+        super().__init__()
+        self.funcion = funcion
+        self.senales = SenalesTrabajo()
+
+    def run(self):
+        """Se ejecuta en el hilo del pool; nunca debe tocar widgets directamente."""
+        try:
+            resultado = self.funcion(self.senales.progreso.emit)
+        except Exception as e:
+            self.senales.fallido.emit(str(e))
+        else:
+            self.senales.terminado.emit(resultado)
+
+
+class ColaTrabajos(QObject):
+    """
+    Cola de trabajos en segundo plano. Por defecto usa un solo hilo, de modo que
+    los trabajos se ejecutan de a uno y en el orden en que se encolaron: las
+    facturas exportadas seguidas se guardan en ese mismo orden.
+    """
+    # Cantidad de trabajos encolados o en ejecución, emitida cada vez que cambia.
+    pendientes_cambiaron = pyqtSignal(int)
+
+    def __init__(self, parent: Optional[QObject] = None, hilos: int = 1):
+        """
+        Args:
+            parent (QObject, optional): El objeto padre de la cola.
+            hilos (int): Cantidad máxima de trabajos ejecutándose a la vez.
+        """
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(hilos)
+        # Mantiene vivos los trabajos (y sus señales) hasta que terminan.
+        self._activos: set[Trabajo] = set()
+
+    def encolar(
+        self,
+        funcion: Callable[[Callable[[str], None]], object],
+        al_terminar: Optional[Callable[[object], None]] = None,
+        al_fallar: Optional[Callable[[str], None]] = None,
+        al_avanzar: Optional[Callable[[str], None]] = None,
+    ) -> Trabajo:
+        """
+        Agrega un trabajo a la cola. Los callbacks se conectan antes de iniciarlo
+        y se ejecutan en el hilo de la interfaz, así que pueden actualizar widgets.
+
+        Args:
+            funcion: La función a ejecutar en segundo plano (ver Trabajo).
+            al_terminar: Recibe el resultado de la función.
+            al_fallar: Recibe el mensaje de error si la función lanzó una excepción.
+            al_avanzar: Recibe cada etapa informada por la función.
+
+        Returns:
+            Trabajo: El trabajo encolado.
+        """
+        trabajo = Trabajo(funcion)
+        senales = trabajo.senales
+        if al_avanzar:
+            senales.progreso.connect(al_avanzar)
+        if al_terminar:
+            senales.terminado.connect(al_terminar)
+        if al_fallar:
+            senales.fallido.connect(al_fallar)
+        senales.terminado.connect(lambda _: self._finalizar(trabajo))
+        senales.fallido.connect(lambda _: self._finalizar(trabajo))
+
+        self._activos.add(trabajo)
+        self._pool.start(trabajo)
+        self.pendientes_cambiaron.emit(len(self._activos))
+        return trabajo
+
+    def pendientes(self) -> int:
+        """Devuelve la cantidad de trabajos encolados o en ejecución."""
+        return len(self._activos)
+
+    def esperar(self, milisegundos: int = -1) -> bool:
+        """
+        Bloquea hasta que terminen todos los trabajos, por ejemplo al cerrar la aplicación.
+
+        Args:
+            milisegundos (int): Tiempo máximo de espera; -1 espera sin límite.
+
+        Returns:
+            bool: True si todos los trabajos terminaron.
+        """
+        return self._pool.waitForDone(milisegundos)
+
+    def _finalizar(self, trabajo: Trabajo) -> None:
+        """Quita un trabajo terminado de la lista de activos."""
+        self._activos.discard(trabajo)
+        self.pendientes_cambiaron.emit(len(self._activos))
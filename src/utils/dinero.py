@@ -0,0 +1,223 @@
+# src/utils/dinero.py
+# Este módulo concentra la aritmética de dinero de la aplicación.
+# Los montos se calculan en centavos enteros para que las sumas sean exactas,
+# y cada operación tiene una versión escalar (un producto o una factura) y una
+# versión vectorizada con NumPy (miles de productos o facturas a la vez) que
+# produce exactamente los mismos resultados.
+#
+# Reglas:
+# - Un precio se convierte a centavos redondeando precio * 100 al entero más
+#   cercano (empates al par, igual que round() y numpy.rint).
+# - El subtotal de un producto se redondea una sola vez, sobre cantidad * precio:
+#   el precio se lleva a millonésimas (ESCALA_PRECIO, redondeando igual que
+#   round() y numpy.rint), se multiplica por la cantidad con aritmética entera y el
+#   resultado se redondea al centavo con los empates hacia arriba. Así un precio
+#   menor que un centavo (0.0035 x 1000 = 3.50) no se pierde al redondear antes
+#   de multiplicar. Una cantidad no entera (1.5 horas) se multiplica en coma
+#   flotante y se redondea con la misma fórmula en las dos versiones.
+# - El impuesto se aplica al subtotal de la factura con una tasa en puntos
+#   básicos (1900 = 19 %) y se redondea al centavo, con los empates hacia arriba.
+
+import math
+from numbers import Integral
+
+# Divisor de la tasa de impuesto: 10000 puntos básicos = 100 %.
+PUNTOS_BASICOS = 10000
+# Los precios unitarios se llevan a millonésimas antes de multiplicarlos por la cantidad.
+ESCALA_PRECIO = 10 ** 6
+# Millonésimas por centavo.
+_POR_CENTAVO = ESCALA_PRECIO // 100
+
+
+def a_centavos(monto: float) -> int:
+    """
+    Convierte un monto en unidades monetarias a centavos enteros.
+
+    Args:
+        monto (float): El monto, por ejemplo un precio unitario.
+
+    Returns:
+        int: El monto en centavos.
+    """
+    return int(round(monto * 100))
+
+
+def a_unidades(centavos: int) -> float:
+    """
+    Convierte centavos enteros a unidades monetarias.
+
+    Args:
+        centavos (int): El monto en centavos.
+
+    Returns:
+        float: El monto en unidades, con a lo sumo dos decimales significativos.
+    """
+    return centavos / 100
+
+
+def a_millonesimas(precio_unitario: float) -> int:
+    """
+    Convierte un precio unitario a millonésimas enteras (ESCALA_PRECIO), la escala
+    con que se multiplica por la cantidad; conserva los precios menores que un centavo.
+
+    Args:
+        precio_unitario (float): El precio por unidad.
+
+    Returns:
+        int: El precio en millonésimas.
+    """
+    return round(precio_unitario * ESCALA_PRECIO)
+
+
+def desde_millonesimas(millonesimas: int) -> float:
+    """
+    Convierte un precio en millonésimas enteras a unidades monetarias.
+
+    Args:
+        millonesimas (int): El precio en millonésimas.
+
+    Returns:
+        float: El precio en unidades, con a lo sumo seis decimales significativos.
+    """
+    return millonesimas / ESCALA_PRECIO
+
+
+def formato_precio(precio_unitario: float) -> str:
+    """
+    Escribe un precio unitario con dos decimales, o con los que hagan falta (hasta
+    seis) si es más preciso que un centavo: 12.5 -> "12.50", 0.0035 -> "0.0035".
+
+    Args:
+        precio_unitario (float): El precio por unidad.
+
+    Returns:
+        str: El precio sin símbolo de moneda.
+    """
+    texto = f"{precio_unitario:.6f}".rstrip("0")
+    entero, _, decimales = texto.partition(".")
+    return f"{entero}.{decimales.ljust(2, '0')}"
+
+
+def subtotal_centavos(cantidad: int, precio_unitario: float) -> int:
+    """
+    Calcula el subtotal de un producto, redondeado al centavo una sola vez.
+
+    Args:
+        cantidad (int): Número de unidades. Una cantidad no entera (por ejemplo, 1.5
+            horas) también se admite; su producto se calcula en coma flotante.
+        precio_unitario (float): Costo por unidad; puede ser menor que un centavo.
+
+    Returns:
+        int: El subtotal en centavos.
+    """
+    precio = a_millonesimas(precio_unitario)
+    # Se elige el cálculo por el valor, no por el tipo (2.0 es entera), igual que subtotales_centavos_np.
+    if isinstance(cantidad, Integral) or float(cantidad).is_integer():
+        # Empates hacia arriba con aritmética entera.
+        return (int(cantidad) * precio + _POR_CENTAVO // 2) // _POR_CENTAVO
+    return math.floor(float(cantidad) * precio / _POR_CENTAVO + 0.5)
+
+
+def impuesto_centavos(base_centavos: int, tasa_puntos_basicos: int) -> int:
+    """
+    Calcula el impuesto sobre un monto, redondeado al centavo.
+
+    Args:
+        base_centavos (int): El monto gravado, en centavos.
+        tasa_puntos_basicos (int): La tasa en puntos básicos (1900 = 19 %).
+
+    Returns:
+        int: El impuesto en centavos.
+    """
+    return (base_centavos * tasa_puntos_basicos + PUNTOS_BASICOS // 2) // PUNTOS_BASICOS
+
+
+def totales_factura(cantidades, precios, tasa_puntos_basicos: int = 0) -> tuple[int, int, int]:
+    """
+    Calcula los totales de una factura producto por producto (versión escalar).
+
+    Args:
+        cantidades: Cantidades de cada producto.
+        precios: Precios unitarios de cada producto.
+        tasa_puntos_basicos (int): Tasa de impuesto en puntos básicos.
+
+    Returns:
+        tuple[int, int, int]: Subtotal, impuesto y total de la factura, en centavos.
+    """
+    subtotal = 0
+    for cantidad, precio in zip(cantidades, precios):
+        subtotal += subtotal_centavos(cantidad, precio)
+    impuesto = impuesto_centavos(subtotal, tasa_puntos_basicos)
+    return subtotal, impuesto, subtotal + impuesto
+
+
+def subtotales_centavos_np(cantidades, precios):
+    """
+    Calcula los subtotales de muchos productos a la vez (versión vectorizada de subtotal_centavos).
+
+    Args:
+        cantidades: Arreglo o secuencia de cantidades; las no enteras se calculan
+            en coma flotante con la misma fórmula que subtotal_centavos.
+        precios: Arreglo o secuencia de precios unitarios.
+
+    Returns:
+        numpy.ndarray: Los subtotales en centavos, como enteros de 64 bits.
+    """
+    import numpy as np
+
+    precios_escalados = np.rint(np.asarray(precios, dtype=np.float64) * ESCALA_PRECIO).astype(np.int64)
+    cantidades = np.asarray(cantidades)
+    if cantidades.dtype.kind in "iub":
+        # La división entera de NumPy redondea hacia abajo, como // en Python.
+        return (cantidades.astype(np.int64) * precios_escalados + _POR_CENTAVO // 2) // _POR_CENTAVO
+    # Con cantidades no enteras, cada elemento usa el cálculo que le corresponde en subtotal_centavos.
+    flotantes = cantidades.astype(np.float64)
+    exactos = (flotantes.astype(np.int64) * precios_escalados + _POR_CENTAVO // 2) // _POR_CENTAVO
+    aproximados = np.floor(flotantes * precios_escalados / _POR_CENTAVO + 0.5).astype(np.int64)
+    return np.where(flotantes == np.floor(flotantes), exactos, aproximados)
+
+
+def impuestos_centavos_np(bases_centavos, tasa_puntos_basicos: int):
+    """
+    Calcula el impuesto de muchos montos a la vez (versión vectorizada de impuesto_centavos).
+
+    Args:
+        bases_centavos: Arreglo de montos gravados, en centavos.
+        tasa_puntos_basicos (int): La tasa en puntos básicos.
+
+    Returns:
+        numpy.ndarray: Los impuestos en centavos.
+    """
+    import numpy as np
+
+    bases = np.asarray(bases_centavos, dtype=np.int64)
+    return (bases * tasa_puntos_basicos + PUNTOS_BASICOS // 2) // PUNTOS_BASICOS
+
+
+def totales_lote_np(cantidades, precios, inicios, tasa_puntos_basicos: int = 0):
+    """
+    Calcula los totales de muchas facturas a la vez (versión vectorizada de totales_factura).
+    Los productos de todas las facturas van en arreglos únicos, una factura tras otra;
+    'inicios' indica la posición del primer producto de cada factura.
+    Cada factura debe tener al menos un producto.
+
+    Args:
+        cantidades: Cantidades de todos los productos.
+        precios: Precios unitarios de todos los productos.
+        inicios: Posición del primer producto de cada factura, en orden creciente.
+        tasa_puntos_basicos (int): Tasa de impuesto en puntos básicos.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: Subtotales, impuestos y
+        totales de cada factura, en centavos.
+    """
+    import numpy as np
+
+    if len(inicios) == 0:
+        vacio = np.zeros(0, dtype=np.int64)
+        return vacio, vacio, vacio
+    subtotales_productos = subtotales_centavos_np(cantidades, precios)
+    # reduceat suma cada tramo [inicios[i], inicios[i + 1]) con aritmética entera exacta.
+    subtotales = np.add.reduceat(subtotales_productos, np.asarray(inicios, dtype=np.intp))
+    impuestos = impuestos_centavos_np(subtotales, tasa_puntos_basicos)
+    return subtotales, impuestos, subtotales + impuestos
@@ -0,0 +1,252 @@
+# src/utils/metricas.py
+# Este módulo recoge métricas del flujo de facturación: cuánto tarda cada etapa
+# (validación, numeración, guardado, generación del PDF), cuántas veces se
+# ejecuta, cuántos bytes se escriben y el tamaño de los PDFs.
+#
+# Está desactivado por defecto. Mientras lo esté, etapa() devuelve un
+# administrador de contexto vacío y compartido, y las demás funciones retornan
+# en la primera línea, así que el costo en el camino crítico es despreciable.
+#
+# Uso:
+#     metricas.activar()
+#     ... facturar ...
+#     print(metricas.a_prometheus())      # o metricas.a_json(), metricas.escribir("run.prom")
+
+import json
+import time
+import cProfile
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+# Indica si se recogen métricas. Los puntos de medición lo consultan antes de hacer cualquier trabajo.
+ACTIVO = False
+
+# Contadores: nombre -> valor acumulado.
+_contadores: dict[str, float] = {}
+# Observaciones (duraciones, tamaños): nombre -> [cantidad, suma, mínimo, máximo].
+_observaciones: dict[str, list[float]] = {}
+# Funciones que reciben cada evento: (nombre, tipo, valor), con tipo "contador" u "observacion".
+_ganchos: list[Callable[[str, str, float], None]] = []
+_candado = threading.Lock()
+# Administrador de contexto vacío que devuelve etapa() cuando las métricas están desactivadas.
+_NULO = nullcontext()
+
+
+def activar(activo: bool = True) -> None:
+    """
+    Activa o desactiva la recolección de métricas.
+
+    Args:
+        activo (bool): True para recoger métricas.
+    """
+    global ACTIVO
+    ACTIVO = activo
+
+
+def reiniciar() -> None:
+    """Borra todas las métricas recogidas (los ganchos se conservan)."""
+    with _candado:
+        _contadores.clear()
+        _observaciones.clear()
+
+
+def contar(nombre: str, valor: float = 1) -> None:
+    """
+    Suma un valor a un contador, por ejemplo facturas guardadas o bytes escritos.
+
+    Args:
+        nombre (str): El nombre del contador, como "db.bytes_escritos".
+        valor (float): La cantidad a sumar.
+    """
+    if not ACTIVO:
+        return
+    with _candado:
+        _contadores[nombre] = _contadores.get(nombre, 0) + valor
+    for gancho in _ganchos:
+        gancho(nombre, "contador", valor)
+
+
+def observar(nombre: str, valor: float) -> None:
+    """
+    Registra una medición individual (una duración, el tamaño de un PDF...).
+    Se conservan la cantidad, la suma, el mínimo y el máximo.
+
+    Args:
+        nombre (str): El nombre de la observación, como "pdf.tamano_bytes".
+        valor (float): El valor medido.
+    """
+    if not ACTIVO:
+        return
+    with _candado:
+        datos = _observaciones.get(nombre)
+        if datos is None:
+            _observaciones[nombre] = [1, valor, valor, valor]
+        else:
+            datos[0] += 1
+            datos[1] += valor
+            datos[2] = min(datos[2], valor)
+            datos[3] = max(datos[3], valor)
+    for gancho in _ganchos:
+        gancho(nombre, "observacion", valor)
+
+
+def etapa(nombre: str):
+    """
+    Mide la duración de un bloque de código, registrada como "<nombre>_segundos".
+
+    Uso:
+        with metricas.etapa("db.guardado"):
+            ...
+
+    Args:
+        nombre (str): El nombre de la etapa.
+
+    Returns:
+        Un administrador de contexto; uno vacío si las métricas están desactivadas.
+    """
+    if not ACTIVO:
+        return _NULO
+    return _Cronometro(nombre)
+
+
+class _Cronometro:
+    """Administrador de contexto que observa la duración de su bloque."""
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar(self.nombre + "_segundos", time.perf_counter() - self.inicio)
+        return False
+
+
+def agregar_gancho(gancho: Callable[[str, str, float], None]) -> None:
+    """
+    Registra una función que recibe cada evento en el momento en que ocurre,
+    por ejemplo para reenviarlo a un sistema de monitoreo.
+
+    Args:
+        gancho: Función (nombre, tipo, valor); tipo es "contador" u "observacion".
+    """
+    _ganchos.append(gancho)
+
+
+def quitar_gancho(gancho: Callable[[str, str, float], None]) -> None:
+    """Quita una función registrada con agregar_gancho."""
+    _ganchos.remove(gancho)
+
+
+def gancho_logging(logger=None, nivel: int = 10) -> Callable[[str, str, float], None]:
+    """
+    Crea un gancho que escribe cada evento en un logger de 'logging'.
+
+    Args:
+        logger: El logger a usar. Por defecto, el logger "facturacion.metricas".
+        nivel (int): Nivel de los mensajes (10 = DEBUG).
+
+    Returns:
+        La función a registrar con agregar_gancho.
+    """
+    import logging
+
+    logger = logger or logging.getLogger("facturacion.metricas")
+
+    def gancho(nombre: str, tipo: str, valor: float) -> None:
+        logger.log(nivel, "%s %s=%s", tipo, nombre, valor)
+
+    return gancho
+
+
+def instantanea() -> dict:
+    """
+    Devuelve una copia de las métricas recogidas.
+
+    Returns:
+        dict: {"contadores": {nombre: valor}, "observaciones": {nombre: {cantidad, suma, min, max, media}}}.
+    """
+    with _candado:
+        return {
+            "contadores": dict(_contadores),
+            "observaciones": {
+                nombre: {"cantidad": n, "suma": s, "min": mn, "max": mx, "media": s / n}
+                for nombre, (n, s, mn, mx) in _observaciones.items()
+            },
+        }
+
+
+def a_json() -> str:
+    """Devuelve las métricas recogidas como texto JSON (ver instantanea)."""
+    return json.dumps(instantanea(), indent=2)
+
+
+def a_prometheus(prefijo: str = "facturacion") -> str:
+    """
+    Devuelve las métricas en el formato de texto de Prometheus. Los contadores se
+    publican como '<prefijo>_<nombre>_total' y las observaciones como resúmenes
+    ('_count' y '_sum') más un indicador '_max'. Los puntos del nombre pasan a '_'.
+
+    Args:
+        prefijo (str): Prefijo de todos los nombres.
+
+    Returns:
+        str: El texto listo para servir en un endpoint /metrics o guardar en un archivo.
+    """
+    datos = instantanea()
+    lineas = []
+    for nombre, valor in sorted(datos["contadores"].items()):
+        metrica = f"{prefijo}_{nombre.replace('.', '_')}_total"
+        lineas += [f"# TYPE {metrica} counter", f"{metrica} {valor}"]
+    for nombre, obs in sorted(datos["observaciones"].items()):
+        metrica = f"{prefijo}_{nombre.replace('.', '_')}"
+        lineas += [
+            f"# TYPE {metrica} summary",
+            f"{metrica}_count {obs['cantidad']}",
+            f"{metrica}_sum {obs['suma']}",
+            f"# TYPE {metrica}_max gauge",
+            f"{metrica}_max {obs['max']}",
+        ]
+    return "\n".join(lineas) + "\n"
+
+
+def escribir(ruta: str) -> None:
+    """
+    Guarda las métricas en un archivo: formato Prometheus si termina en '.prom'
+    o '.txt', y JSON en cualquier otro caso.
+
+    Args:
+        ruta (str): El archivo de destino.
+    """
+    texto = a_prometheus() if ruta.endswith((".prom", ".txt")) else a_json()
+    with open(ruta, mode="w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+@contextmanager
+def perfilar(ruta: Optional[str]):
+    """
+    Ejecuta un bloque bajo cProfile y guarda el perfil en 'ruta' al terminar,
+    para analizarlo con pstats o herramientas como snakeviz. Con ruta None no hace nada.
+
+    Uso:
+        with metricas.perfilar("lote.prof"):
+            manager.procesar_lote(...)
+
+    Args:
+        ruta (Optional[str]): Archivo donde se guarda el perfil.
+    """
+    if ruta is None:
+        yield None
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        perfil.dump_stats(ruta)
@@ -0,0 +1,20 @@
+# src/utils/texto.py
+# Este módulo contiene utilidades de texto compartidas por los índices de búsqueda
+# (registro de clientes, catálogo de productos).
+
+import unicodedata
+
+
+def normalizar(texto: str) -> str:
+    """
+    Prepara un texto para compararlo en las búsquedas: sin mayúsculas, sin tildes
+    y sin espacios al inicio o al final ("  José " y "jose" son iguales).
+    
+    Args:
+        texto (str): El texto a normalizar.
+        
+    Returns:
+        str: El texto normalizado.
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
@@ -1,6 +1,38 @@
 # src/utils/validators.py
 # Este módulo proporciona funciones de validación de propósito general
 # que pueden ser reutilizadas en diferentes partes de la aplicación.
+#
+# Cada regla tiene una versión escalar (un valor) y una versión vectorizada
+# (terminada en _np) que revisa una columna entera con NumPy/pandas y devuelve
+# una máscara booleana con True en los valores válidos. Ambas aceptan y rechazan
+# exactamente los mismos valores: la versión vectorizada resuelve el caso común
+# sin bucles de Python y consulta la regla escalar solo para los valores que el
+# camino rápido no pudo decidir.
+#
+# También define las reglas de una factura (campos obligatorios y mensajes), que
+# usan tanto InvoiceManager.validar_cliente/validar_productos como la
+# validación por columnas de InvoiceManager.validar_lote.
+
+# Campos obligatorios del cliente, en el orden en que se revisan, con el mensaje si faltan.
+CAMPOS_CLIENTE = (
+    ("nombre", "El nombre del cliente es obligatorio."),
+    ("identificacion", "La identificación del cliente es obligatoria."),
+    ("direccion", "La dirección del cliente es obligatoria."),
+    ("telefono", "El teléfono del cliente es obligatorio."),
+)
+# Mensajes de los productos; '{descripcion}' se reemplaza por la del producto.
+MENSAJE_SIN_PRODUCTOS = "Debe agregar al menos un producto a la factura."
+MENSAJE_DESCRIPCION = "La descripción del producto no puede estar vacía."
+MENSAJE_CANTIDAD_ENTERA = "La cantidad del producto '{descripcion}' debe ser un número entero."
+MENSAJE_CANTIDAD = "La cantidad del producto '{descripcion}' debe ser mayor que cero."
+MENSAJE_PRECIO_NUMERO = "El precio unitario del producto '{descripcion}' no es un número válido."
+MENSAJE_PRECIO = "El precio unitario del producto '{descripcion}' debe ser mayor que cero."
+# Patrones de un número y de un entero escritos en texto, con dígitos y espacios ASCII.
+# Todo texto que cumple el patrón es aceptado por float() o int(); el resto se
+# consulta a la regla escalar (ver convertir_numeros_np y validar_entero_np).
+PATRON_NUMERO = r"[ \t\n\r\f\v]*[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?[ \t\n\r\f\v]*"
+PATRON_ENTERO = r"[ \t\n\r\f\v]*[+-]?[0-9]+[ \t\n\r\f\v]*"
+
 
 def validar_no_vacio(texto: str) -> bool:
     """
@@ -33,6 +65,172 @@ def validar_numero(texto: str) -> bool:
         float(texto)
         # Si la conversión tiene éxito, la cadena es un número válido.
         return True
-    except ValueError:
+    except (ValueError, TypeError):
         # Si la conversión falla (lanza ValueError), la cadena no es un número.
-        return False
\ No newline at end of file
+        return False
+
+
+def validar_entero(texto: str) -> bool:
+    """
+    Verifica si una cadena de texto puede ser convertida a un número entero,
+    como las cantidades de los archivos de entrada ("3" sí, "3.5" o "3.0" no).
+    
+    Args:
+        texto (str): La cadena a validar.
+        
+    Returns:
+        bool: True si la cadena representa un entero, False en caso contrario.
+    """
+    try:
+        int(texto)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def validar_positivo(valor: float) -> bool:
+    """
+    Verifica que un número sea mayor que cero (cantidades y precios).
+    
+    Args:
+        valor (float): El número a validar.
+        
+    Returns:
+        bool: True si el número es mayor que cero.
+    """
+    return valor > 0
+
+
+def validar_no_vacio_np(textos):
+    """
+    Versión vectorizada de validar_no_vacio.
+    
+    Args:
+        textos: Columna de textos (lista, arreglo o Series); None y NaN cuentan como vacíos.
+        
+    Returns:
+        numpy.ndarray: Máscara booleana, True en los textos no vacíos.
+    """
+    # Los valores faltantes (NA) tienen longitud NA, que se cuenta como cero.
+    return _serie_texto(textos).str.strip().str.len().fillna(0).to_numpy() > 0
+
+
+def convertir_numeros_np(textos):
+    """
+    Convierte una columna de textos a números, como float() con cada uno.
+    
+    Args:
+        textos: Columna de textos o de números.
+        
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Los valores (float64, NaN en los inválidos)
+        y la máscara de validar_numero_np.
+    """
+    import numpy as np
+
+    numeros = _columna_numerica(textos)
+    if numeros is not None:
+        # Una columna ya numérica no requiere conversión; cualquier valor es un número.
+        return numeros.astype(np.float64), np.ones(len(numeros), dtype=bool)
+    serie = _serie_texto(textos)
+    validos = _cumple(serie, PATRON_NUMERO)
+    arreglo = serie.to_numpy(dtype=object)
+    valores = np.full(len(arreglo), np.nan)
+    # La conversión de objetos a float64 aplica float() a cada texto, sin bucle de Python:
+    # el resultado es idéntico al escalar (pandas.to_numeric puede diferir en el último decimal).
+    valores[validos] = arreglo[validos].astype(np.float64)
+    # Lo que el patrón no reconoce ("nan", "1_000", dígitos no latinos, textos inválidos)
+    # se decide con la regla escalar; en una columna correcta son pocos o ninguno.
+    for posicion in np.flatnonzero(~validos):
+        texto = arreglo[posicion]
+        if validar_numero(texto):
+            valores[posicion] = float(texto)
+            validos[posicion] = True
+    return valores, validos
+
+
+def validar_numero_np(textos):
+    """
+    Versión vectorizada de validar_numero.
+    
+    Args:
+        textos: Columna de textos o de números.
+        
+    Returns:
+        numpy.ndarray: Máscara booleana, True en los valores que float() acepta.
+    """
+    return convertir_numeros_np(textos)[1]
+
+
+def validar_entero_np(textos):
+    """
+    Versión vectorizada de validar_entero. En una columna numérica, los enteros
+    son los valores sin parte decimal.
+    
+    Args:
+        textos: Columna de textos o de números.
+        
+    Returns:
+        numpy.ndarray: Máscara booleana, True en los valores que int() acepta.
+    """
+    import numpy as np
+
+    numeros = _columna_numerica(textos)
+    if numeros is not None:
+        if numeros.dtype.kind in "iu":
+            return np.ones(len(numeros), dtype=bool)
+        return np.isfinite(numeros) & (numeros == np.floor(numeros))
+    serie = _serie_texto(textos)
+    validos = _cumple(serie, PATRON_ENTERO)
+    # Lo que el patrón no reconoce ("1_000", dígitos no latinos) se decide con la regla escalar.
+    for posicion in np.flatnonzero(~validos):
+        validos[posicion] = validar_entero(serie.iat[posicion])
+    return validos
+
+
+def validar_positivo_np(valores):
+    """
+    Versión vectorizada de validar_positivo. NaN no es positivo.
+    
+    Args:
+        valores: Columna de números.
+        
+    Returns:
+        numpy.ndarray: Máscara booleana, True en los valores mayores que cero.
+    """
+    import numpy as np
+
+    return np.asarray(valores, dtype=np.float64) > 0
+
+
+def _columna_numerica(valores):
+    """Devuelve la columna como arreglo de NumPy si ya es numérica (enteros o reales), o None si es de texto."""
+    import numpy as np
+
+    # Las listas se convierten para conocer su tipo; las Series y los arreglos ya lo indican.
+    tipo = getattr(valores, "dtype", None)
+    if tipo is None:
+        valores = np.asarray(valores)
+        tipo = valores.dtype
+    if tipo.kind not in "iuf":
+        return None
+    return np.asarray(valores)
+
+
+def _serie_texto(textos):
+    """
+    Devuelve la columna como Series de texto de pandas, con los faltantes como NA.
+    Con pyarrow instalado el texto queda en memoria columnar y las operaciones de
+    .str no recorren objetos de Python (las columnas de read_csv ya vienen así).
+    """
+    import pandas as pd
+
+    return pd.Series(textos, dtype="string", copy=False)
+
+
+def _cumple(serie, patron: str):
+    """Máscara de los textos que cumplen un patrón completo; los faltantes no lo cumplen."""
+    import numpy as np
+
+    # Copia modificable: quien llama completa la máscara con la regla escalar.
+    return np.array(serie.str.fullmatch(patron).to_numpy(dtype=bool, na_value=False))
@@ -0,0 +1,96 @@
+# tests/test_dinero.py
+# Comprueba que las versiones vectorizadas de src/utils/dinero.py dan exactamente
+# los mismos centavos que las escalares, y que el redondeo de cada línea es el
+# documentado (una sola vez, empates hacia arriba). Se ejecuta con: python -m pytest
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+from src.utils import dinero
+
+SEMILLA = 20240601
+
+
+def _precios_aleatorios(generador: np.random.Generator, cantidad: int) -> np.ndarray:
+    """Precios con hasta seis decimales, la mitad menores que un centavo."""
+    millonesimas = np.concatenate([
+        generador.integers(1, 10_000, cantidad // 2),
+        generador.integers(1, 10 ** 9, cantidad - cantidad // 2),
+    ])
+    return millonesimas / dinero.ESCALA_PRECIO
+
+
+def _escalares(cantidades, precios) -> list[int]:
+    return [dinero.subtotal_centavos(c, p) for c, p in zip(cantidades, precios)]
+
+
+def test_subtotales_np_igual_a_escalar_con_cantidades_enteras():
+    generador = np.random.default_rng(SEMILLA)
+    precios = _precios_aleatorios(generador, 20_000)
+    cantidades = generador.integers(1, 100_000, len(precios))
+    vectorizados = dinero.subtotales_centavos_np(cantidades, precios)
+    assert vectorizados.tolist() == _escalares(cantidades.tolist(), precios.tolist())
+
+
+def test_subtotales_np_igual_a_escalar_con_cantidades_no_enteras():
+    generador = np.random.default_rng(SEMILLA + 1)
+    precios = _precios_aleatorios(generador, 20_000)
+    # Mezcla cantidades fraccionarias con otras enteras guardadas como float.
+    cantidades = np.round(generador.uniform(0.01, 1000, len(precios)), 2)
+    cantidades[::7] = np.floor(cantidades[::7])
+    vectorizados = dinero.subtotales_centavos_np(cantidades, precios)
+    assert vectorizados.tolist() == _escalares(cantidades.tolist(), precios.tolist())
+
+
+def test_subtotales_np_con_lista_mixta():
+    cantidades = [1, 1.5, 2.0, 3, 0.25]
+    precios = [10.0, 10.0, 0.0035, 0.333, 0.02]
+    assert dinero.subtotales_centavos_np(cantidades, precios).tolist() == _escalares(cantidades, precios)
+    assert dinero.subtotales_centavos_np([1.5], [10.0]).tolist() == [1500]
+
+
+@pytest.mark.parametrize(
+    "cantidad, precio, centavos",
+    [
+        (1000, 0.0035, 350),  # Precio menor que un centavo: no se pierde.
+        (3, 0.333, 100),  # 0.999 -> 1.00; redondear el precio primero daría 0.99.
+        (1, 0.005, 1),  # Empate exacto: hacia arriba.
+        (1, 0.015, 2),
+        (1, 0.025, 3),  # Empate al par daría 2.
+        (3, 0.005, 2),  # 0.015
+        (7, 0.0015, 1),  # 0.0105
+        (1, 0.004999, 0),
+        (2, 1.005, 201),
+        (1, 2.675, 268),  # 2.675 no es exacto en binario, pero sí en millonésimas.
+    ],
+)
+def test_redondeo_de_linea_y_empates(cantidad, precio, centavos):
+    assert dinero.subtotal_centavos(cantidad, precio) == centavos
+    assert dinero.subtotales_centavos_np([cantidad], [precio]).tolist() == [centavos]
+
+
+def test_cantidades_enteras_exactas_frente_a_decimal():
+    generador = np.random.default_rng(SEMILLA + 2)
+    precios = _precios_aleatorios(generador, 2_000).tolist()
+    cantidades = generador.integers(1, 10_000, len(precios)).tolist()
+    for cantidad, precio in zip(cantidades, precios):
+        esperado = (cantidad * Decimal(f"{precio:.6f}") * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        assert dinero.subtotal_centavos(cantidad, precio) == int(esperado)
+
+
+@pytest.mark.parametrize("tasa", [0, 1900, 825])
+def test_totales_lote_np_igual_a_totales_factura(tasa):
+    generador = np.random.default_rng(SEMILLA + tasa)
+    lineas = generador.integers(1, 40, 500)
+    inicios = np.concatenate([[0], np.cumsum(lineas)[:-1]])
+    precios = _precios_aleatorios(generador, int(lineas.sum()))
+    cantidades = generador.integers(1, 500, len(precios)).astype(np.float64)
+    cantidades[::5] += 0.5
+    subtotales, impuestos, totales = dinero.totales_lote_np(cantidades, precios, inicios, tasa)
+    for i, (inicio, n) in enumerate(zip(inicios.tolist(), lineas.tolist())):
+        esperado = dinero.totales_factura(
+            cantidades[inicio:inicio + n].tolist(), precios[inicio:inicio + n].tolist(), tasa
+        )
+        assert (int(subtotales[i]), int(impuestos[i]), int(totales[i])) == esperado